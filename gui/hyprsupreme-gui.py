@@ -23,6 +23,13 @@ gi.require_version('WebKit', '6.0')
 
 from gi.repository import Gtk, Adw, GLib, Gio, Gdk, GdkPixbuf, WebKit
 
+# Preset files are compiled by the shared tool
+sys.path.append(str(Path(__file__).parent.parent / "tools"))
+try:
+    from preset_compiler import PresetCompiler, PresetError
+except ImportError:
+    PresetCompiler = None
+
 @dataclass
 class ConfigPreview:
     """Data class for preview information"""
@@ -849,9 +856,16 @@ class HyprSupremeWindow(Adw.ApplicationWindow):
             }
         }
         
-        if preset_id in preset_configs:
-            preset = preset_configs[preset_id]
+        preset = None
+        if PresetCompiler is not None and preset_id != 'custom':
+            try:
+                preset = PresetCompiler().load(preset_id)
+            except PresetError as e:
+                print(f"Warning: Could not load preset file {preset_id}: {e}")
+        if preset is None:
+            preset = preset_configs.get(preset_id)
             
+        if preset is not None:
             # Update switches
             for config_id, switch in self.config_switches.items():
                 switch.set_active(config_id in preset['configs'])
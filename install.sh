@@ -881,6 +881,15 @@ select_preset_simple() {
 # Load preset configuration
 load_preset() {
     local preset="$1"
+    local compiled
+    
+    # Prefer the compiled preset files; the built-in table covers missing python3
+    if command -v python3 &>/dev/null && [ -f "$SCRIPT_ROOT/presets/$preset.preset" ] && \
+        compiled=$(python3 "$SCRIPT_ROOT/tools/preset_compiler.py" shell "$preset" 2>>"$LOG"); then
+        eval "$compiled"
+        echo "${OK} Loaded preset: $preset" | tee -a "$LOG"
+        return 0
+    fi
     
     case "$preset" in
         "showcase")
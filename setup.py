@@ -42,7 +42,7 @@ setup(
         "": ["*.md", "*.txt", "*.json", "*.yml", "*.yaml", "*.sh"],
         "community": ["templates/*.html", "static/*"],
         "modules": ["**/*"],
-        "tools": ["*.py"],
+        "tools": ["*.py", "rules/*.json"],
         "gui": ["*.py"],
     },
     include_package_data=True,
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the HyprSupreme Cloud CLI subcommands
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+import pytest
+
+CLOUD_CLI = Path(__file__).parent.parent.parent / "tools" / "hyprsupreme-cloud.py"
+
+# Subcommands that never touch key material
+NON_CRYPTO_COMMANDS = [
+    ['list', '--local'],
+    ['search', '--local', '-q', 'gaming'],
+    ['search', '-q', 'gaming'],
+    ['delete', 'missing'],
+    ['apply', 'missing'],
+    ['upload', 'missing'],
+    ['download', 'missing'],
+    ['sync'],
+    ['auth', 'user', 'pass'],
+    ['create', 'bench'],
+]
+
+# Modules only sync, create and retention paths may import
+DEFERRED_MODULES = {'retention', 'preset_compiler', 'hypr_config'}
+
+# Subcommands that read local state only
+LOCAL_COMMANDS = [
+    ['list', '--local'],
+    ['search', '--local', '-q', 'gaming'],
+    ['delete', 'missing'],
+    ['apply', 'missing'],
+]
+
+# Budget per invocation including interpreter start-up
+STARTUP_BUDGET = 2.0
+
+
+def run_cli(args, home, modules=None):
+    """Run one CLI invocation and return its wall time
+
+    With a modules set, the invocation runs under -X importtime and every
+    module it imports is added to the set.
+    """
+    env = dict(os.environ, HOME=str(home))
+    importtime = ['-X', 'importtime'] if modules is not None else []
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable] + importtime + [str(CLOUD_CLI)] + args,
+        env=env, capture_output=True, text=True, timeout=60
+    )
+    elapsed = time.perf_counter() - start
+    assert result.returncode in (0, 1), result.stderr
+    if modules is not None:
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                modules.add(line.rsplit('|', 1)[1].strip())
+    return elapsed
+
+
+@pytest.fixture
+def bench_home():
+    """Temporary home with a minimal Hyprland config"""
+    home = Path(tempfile.mkdtemp())
+    hypr_dir = home / ".config" / "hypr"
+    hypr_dir.mkdir(parents=True)
+    (hypr_dir / "hyprland.conf").write_text("decoration {\n    rounding = 8\n}\n")
+
+    # First run creates the database and device id
+    run_cli(['list', '--local'], home)
+    yield home
+    shutil.rmtree(home, ignore_errors=True)
+
+
+class TestCloudStartup:
+    """Startup cost of each cloud subcommand"""
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("args", NON_CRYPTO_COMMANDS, ids=lambda a: ' '.join(a))
+    def test_subcommand_startup(self, bench_home, args):
+        """Test that subcommands start quickly and skip key derivation"""
+        elapsed = run_cli(args, bench_home)
+        assert elapsed < STARTUP_BUDGET, f"'{' '.join(args)}' took {elapsed:.3f}s"
+
+        # No master key or device keypair should have been created
+        keys_dir = bench_home / ".config" / "hyprsupreme" / "keys"
+        assert not any(keys_dir.iterdir()), f"'{' '.join(args)}' loaded key material"
+
+    @pytest.mark.parametrize("args", LOCAL_COMMANDS, ids=lambda a: ' '.join(a))
+    def test_helper_modules_deferred(self, bench_home, args):
+        """Test that local subcommands skip retention, preset and config-parser imports"""
+        modules = set()
+        run_cli(args, bench_home, modules)
+        assert not modules & DEFERRED_MODULES, f"'{' '.join(args)}' imported {sorted(modules & DEFERRED_MODULES)}"
+
+
+def main():
+    """Print a startup-time table for every subcommand"""
+    home = Path(tempfile.mkdtemp())
+    try:
+        (home / ".config" / "hypr").mkdir(parents=True)
+        (home / ".config" / "hypr" / "hyprland.conf").write_text("general {\n}\n")
+        run_cli(['list', '--local'], home)
+
+        print(f"{'subcommand':<32} {'best':>8} {'mean':>8}")
+        for args in NON_CRYPTO_COMMANDS:
+            times = [run_cli(args, home) for _ in range(5)]
+            print(f"{' '.join(args):<32} {min(times) * 1000:>6.0f}ms {sum(times) / len(times) * 1000:>6.0f}ms")
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
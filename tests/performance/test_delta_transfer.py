@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Bytes transferred and apply time of delta updates against full archives
+"""
+
+import sys
+import time
+import random
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from delta_update import publish_deltas, cheapest_chain, apply_chain, build_manifest
+
+# Shell modules in the fixture repository and files touched per release
+MODULE_COUNT = 300
+CHANGES_PER_RELEASE = 5
+RELEASES = ["1.0.0", "1.1.0", "1.2.0", "1.3.0"]
+
+
+def build_fixture(base: Path):
+    """Release trees of a repository where each release edits a few modules"""
+    rng = random.Random(42)
+    files = {
+        f"modules/module_{i:03d}.sh": "#!/bin/bash\n" + "".join(
+            f"step_{j}() {{ echo 'module {i} step {j} {rng.random():.8f}'; }}\n" for j in range(80)
+        )
+        for i in range(MODULE_COUNT)
+    }
+    trees = []
+    for release in RELEASES:
+        if trees:
+            for name in rng.sample(sorted(files), CHANGES_PER_RELEASE):
+                lines = files[name].splitlines(keepends=True)
+                lines[rng.randrange(1, len(lines))] = f"# changed in {release}\n"
+                files[name] = "".join(lines)
+        root = base / "releases" / release
+        for name, content in files.items():
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(content)
+
+        archive = base / "archives" / f"{release}.tar.gz"
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(archive, 'w:gz') as tar:
+            tar.add(root, arcname=f"HyprSupreme-Builder-{release}")
+        trees.append((release, root))
+    return trees
+
+
+def run_benchmark(base: Path) -> dict:
+    trees = build_fixture(base)
+    sizes = {release: (base / "archives" / f"{release}.tar.gz").stat().st_size for release, _ in trees}
+    published = base / "published"
+    index = publish_deltas(trees, published, archive_sizes=sizes)
+
+    installed = base / "installed"
+    shutil.copytree(trees[0][1], installed)
+    chain = cheapest_chain(index, RELEASES[0], RELEASES[-1])
+
+    start = time.perf_counter()
+    result = apply_chain(installed, index, chain, lambda name: (published / name).read_bytes())
+    apply_time = time.perf_counter() - start
+
+    manifest_bytes = (published / index['versions'][RELEASES[0]]['manifest']).stat().st_size
+    return {
+        'full_bytes': sizes[RELEASES[-1]],
+        'delta_bytes': result.bytes_transferred + manifest_bytes,
+        'patches': result.patches,
+        'apply_time': apply_time,
+        'verified': build_manifest(installed, RELEASES[-1])['tree_hash'] == index['versions'][RELEASES[-1]]['tree_hash']
+    }
+
+
+class TestDeltaUpdateBenchmark:
+    """Delta versus full archive on a fixture repository"""
+
+    @pytest.mark.slow
+    def test_delta_transfers_a_fraction_of_the_archive(self, tmp_path):
+        """Test that a three-release chain is far smaller than the archive"""
+        stats = run_benchmark(tmp_path)
+        assert stats['verified']
+        assert stats['patches'] == len(RELEASES) - 1
+        assert stats['delta_bytes'] < stats['full_bytes'] * 0.2, stats
+        assert stats['apply_time'] < 5.0, stats
+
+
+def main():
+    """Print transfer sizes and apply time"""
+    base = Path(tempfile.mkdtemp())
+    try:
+        stats = run_benchmark(base)
+        print(f"full archive:   {stats['full_bytes'] / 1024:8.1f} KB")
+        print(f"patch chain:    {stats['delta_bytes'] / 1024:8.1f} KB ({stats['patches']} patches, "
+              f"{stats['delta_bytes'] / stats['full_bytes']:.1%} of full)")
+        print(f"apply + verify: {stats['apply_time'] * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Rule matching through the decision index against a linear scan of every rule
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+
+import pytest
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from rule_engine import FEATURE_DOMAINS, DecisionIndex, Rule
+
+RULE_COUNT = 20000
+PROFILE_COUNT = 200
+
+
+def synthetic_rules(count: int, rng: random.Random) -> list:
+    """Rules conditioned on one to three features with one or two accepted values each"""
+    rules = []
+    features = list(FEATURE_DOMAINS)
+    for i in range(count):
+        when = {}
+        for feature in rng.sample(features, rng.randint(1, 3)):
+            domain = FEATURE_DOMAINS[feature]
+            when[feature] = frozenset(rng.sample(domain, rng.randint(1, min(2, len(domain) - 1))))
+        recommend = [("general", f"setting_{i}", "1", "synthetic", round(rng.random(), 2))]
+        rules.append(Rule(f"rule_{i}", "synthetic", "low", when, recommend, order=i))
+    return rules
+
+
+def synthetic_profiles(count: int, rng: random.Random) -> list:
+    profiles = []
+    for _ in range(count):
+        features = {feature: {rng.choice(domain)} for feature, domain in FEATURE_DOMAINS.items()}
+        if rng.random() < 0.2:
+            features['gpu_vendor'].add(rng.choice(FEATURE_DOMAINS['gpu_vendor']))
+        profiles.append(features)
+    return profiles
+
+
+def run_benchmark() -> dict:
+    rng = random.Random(1234)
+    rules = synthetic_rules(RULE_COUNT, rng)
+    profiles = synthetic_profiles(PROFILE_COUNT, rng)
+
+    start = time.perf_counter()
+    index = DecisionIndex(rules)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    linear = [[rule for rule in rules if rule.matches(features)] for features in profiles]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.match(features) for features in profiles]
+    indexed_time = time.perf_counter() - start
+
+    evaluated = sum(len(index.candidates(features)) for features in profiles)
+    return {
+        'compile_time': compile_time,
+        'linear_time': linear_time / PROFILE_COUNT,
+        'indexed_time': indexed_time / PROFILE_COUNT,
+        'evaluated': evaluated / PROFILE_COUNT,
+        'matched': sum(len(m) for m in indexed) / PROFILE_COUNT,
+        'identical': linear == indexed,
+    }
+
+
+class TestRuleIndexBenchmark:
+    """Decision index versus evaluating every rule"""
+
+    @pytest.mark.slow
+    def test_index_evaluates_only_relevant_rules(self):
+        """Test that the index returns the same matches while evaluating a fraction of the rules"""
+        stats = run_benchmark()
+        assert stats['identical']
+        assert stats['evaluated'] < RULE_COUNT * 0.5, stats
+        assert stats['indexed_time'] < stats['linear_time'], stats
+
+
+def main():
+    """Print per-profile match times"""
+    stats = run_benchmark()
+    print(f"rules:            {RULE_COUNT}")
+    print(f"compile index:    {stats['compile_time'] * 1000:8.2f} ms")
+    print(f"linear scan:      {stats['linear_time'] * 1000:8.2f} ms/profile ({RULE_COUNT} evaluated)")
+    print(f"decision index:   {stats['indexed_time'] * 1000:8.2f} ms/profile ({stats['evaluated']:.0f} evaluated)")
+    print(f"matches/profile:  {stats['matched']:8.0f}")
+    print(f"identical:        {stats['identical']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the AI update engine CLI
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+import pytest
+
+UPDATER_CLI = Path(__file__).parent.parent.parent / "tools" / "ai_updater.py"
+
+# Subcommands that only read local state
+SIMPLE_COMMANDS = [
+    ['history'],
+    ['list'],
+    ['--help'],
+]
+
+# Modules only analysis, download and backup paths may import
+DEFERRED_MODULES = {'requests', 'git', 'semver', 'tarfile', 'difflib', 'ai_assistant', 'psutil'}
+
+# Budget on top of a bare interpreter start
+STARTUP_BUDGET = 0.1
+
+
+def run_cli(args, home, importtime=False):
+    """Run one CLI invocation; returns wall time and the modules it imported"""
+    env = dict(os.environ, HOME=str(home))
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [str(UPDATER_CLI)] + args
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=60)
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0, result.stderr
+
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip())
+    return elapsed, modules
+
+
+def interpreter_startup() -> float:
+    """Best wall time of a bare interpreter start"""
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@pytest.fixture
+def bench_home():
+    """Temporary home with an initialized update database"""
+    home = Path(tempfile.mkdtemp())
+    run_cli(['list'], home)
+    yield home
+    shutil.rmtree(home, ignore_errors=True)
+
+
+class TestUpdaterStartup:
+    """Startup cost of simple updater subcommands"""
+
+    @pytest.mark.parametrize("args", SIMPLE_COMMANDS, ids=lambda a: ' '.join(a))
+    def test_heavy_modules_deferred(self, bench_home, args):
+        """Test that simple subcommands skip network, VCS and AI imports"""
+        _, modules = run_cli(args, bench_home, importtime=True)
+        assert not modules & DEFERRED_MODULES, f"'{' '.join(args)}' imported {sorted(modules & DEFERRED_MODULES)}"
+
+    def test_backup_skips_hardware_probe(self, bench_home):
+        """Test that a plain backup does not build the AI assistant"""
+        _, modules = run_cli(['backup'], bench_home, importtime=True)
+        assert 'ai_assistant' not in modules
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("args", SIMPLE_COMMANDS, ids=lambda a: ' '.join(a))
+    def test_subcommand_startup(self, bench_home, args):
+        """Test that simple subcommands return within budget"""
+        baseline = interpreter_startup()
+        elapsed = min(run_cli(args, bench_home)[0] for _ in range(3))
+        assert elapsed - baseline < STARTUP_BUDGET, f"'{' '.join(args)}' took {elapsed - baseline:.3f}s over baseline"
+
+
+def main():
+    """Print a startup-time table for the simple subcommands"""
+    home = Path(tempfile.mkdtemp())
+    try:
+        run_cli(['list'], home)
+        baseline = interpreter_startup()
+        print(f"interpreter start: {baseline * 1000:.0f}ms")
+        print(f"{'subcommand':<12} {'best':>8} {'over baseline':>14}")
+        for args in SIMPLE_COMMANDS:
+            best = min(run_cli(args, home)[0] for _ in range(5))
+            print(f"{' '.join(args):<12} {best * 1000:>6.0f}ms {(best - baseline) * 1000:>12.0f}ms")
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
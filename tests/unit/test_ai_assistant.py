@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the AI assistant
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from io import StringIO
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import ai_assistant
+from ai_assistant import AIAssistant
+
+
+class TestSystemProfileCache(unittest.TestCase):
+    """Test the persistent, per-field system profile cache"""
+
+    def setUp(self):
+        """Set up a private home and package database"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.package_db = self.test_dir / "status"
+        self.package_db.write_text("Package: vim\n")
+
+        self.patches = [
+            patch.dict(os.environ, {"HOME": str(self.test_dir)}),
+            patch.object(ai_assistant, "PACKAGE_DATABASES", [str(self.package_db)]),
+            patch.object(AIAssistant, "_detect_usage_pattern", autospec=True, return_value="development"),
+            patch.object(AIAssistant, "_detect_gpu", autospec=True, return_value=["Test GPU"]),
+        ]
+        for p in self.patches:
+            p.start()
+        self.usage_probe = AIAssistant._detect_usage_pattern
+        self.gpu_probe = AIAssistant._detect_gpu
+
+    def tearDown(self):
+        """Clean up test environment"""
+        for p in reversed(self.patches):
+            p.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_profile_is_reused(self):
+        """Test that a second start does not probe anything"""
+        first = AIAssistant().system_profile
+        second = AIAssistant().system_profile
+
+        self.assertEqual(first, second)
+        self.assertEqual(second.gpu_info, ["Test GPU"])
+        self.assertEqual(self.usage_probe.call_count, 1)
+        self.assertEqual(self.gpu_probe.call_count, 1)
+
+    def test_only_stale_fields_are_probed(self):
+        """Test that a package database change re-probes only the usage pattern"""
+        AIAssistant()
+        self.package_db.write_text("Package: vim\nPackage: steam\n")
+        os.utime(self.package_db, ns=(0, 12345))
+        self.usage_probe.return_value = "gaming"
+
+        profile = AIAssistant().system_profile
+        self.assertEqual(profile.usage_pattern, "gaming")
+        self.assertEqual(self.usage_probe.call_count, 2)
+        self.assertEqual(self.gpu_probe.call_count, 1)
+
+    def test_failed_probe_uses_defaults(self):
+        """Test that a failing probe falls back and is retried next time"""
+        self.gpu_probe.side_effect = RuntimeError("no lspci")
+        self.assertEqual(AIAssistant().system_profile.gpu_info, ["unknown"])
+
+        self.gpu_probe.side_effect = None
+        self.assertEqual(AIAssistant().system_profile.gpu_info, ["Test GPU"])
+
+    def test_missing_builtin_rules_warn(self):
+        """Test that a missing built-in rule directory is reported"""
+        with patch.object(ai_assistant, "RULES_DIR", self.test_dir / "rules"), \
+                patch("sys.stdout", new_callable=StringIO) as stdout:
+            assistant = AIAssistant()
+        self.assertIn("built-in rules not found", stdout.getvalue())
+        self.assertEqual(assistant.knowledge_base.rules, [])
+
+    def test_config_analysis_follows_sources(self):
+        """Test that settings in sourced files count in the analysis"""
+        self.gpu_probe.return_value = ["NVIDIA GeForce RTX 3070"]
+        hypr_dir = self.test_dir / "hypr"
+        hypr_dir.mkdir()
+        (hypr_dir / "hyprland.conf").write_text("source = nvidia.conf\ndecoration {\n  blur {\n    enabled = false\n  }\n}\n")
+        (hypr_dir / "nvidia.conf").write_text("env = LIBVA_DRIVER_NAME,nvidia\n")
+
+        analysis = AIAssistant().analyze_current_config(hypr_dir / "hyprland.conf")
+        self.assertEqual(analysis['issues'], [])
+        self.assertEqual(analysis['optimizations'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
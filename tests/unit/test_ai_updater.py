@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the AI update engine
+"""
+
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import ai_updater
+
+
+def make_release(tag: str, body: str = "") -> dict:
+    return {
+        'tag_name': tag,
+        'published_at': '2025-01-01T00:00:00Z',
+        'body': body,
+        'zipball_url': f'https://example.invalid/{tag}.zip'
+    }
+
+
+class ReleaseServer:
+    """Local stand-in for the GitHub releases API with ETag support"""
+
+    def __init__(self):
+        self.releases = [make_release("v2.0.0", "- Added things")]
+        self.etag = '"v1"'
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                if self.headers.get('If-None-Match') == server.etag:
+                    self.send_response(304)
+                    self.send_header('ETag', server.etag)
+                    self.end_headers()
+                    return
+                body = json.dumps(server.releases).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', server.etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestReleaseCache(unittest.TestCase):
+    """Test conditional requests for GitHub release checks"""
+
+    def setUp(self):
+        """Set up an engine pointed at the stub server"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.server = ReleaseServer()
+        self.engine = ai_updater.AIUpdateEngine(str(self.test_dir))
+        self.engine.current_version = "1.0.0"
+        self.engine.update_sources['github']['api_url'] = f"{self.server.url}/repos/test"
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.server.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_unchanged_releases_cost_one_304(self):
+        """Test that a re-check revalidates instead of downloading"""
+        first = self.engine._check_github_updates()
+        second = self.engine._check_github_updates()
+
+        self.assertEqual([u.version for u in first], ["2.0.0"])
+        self.assertEqual([u.version for u in second], ["2.0.0"])
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertNotIn('If-None-Match', self.server.requests[0][1])
+        self.assertEqual(self.server.requests[1][1].get('If-None-Match'), '"v1"')
+
+    def test_changed_releases_are_refetched(self):
+        """Test that a new ETag replaces the cached body"""
+        self.engine._check_github_updates()
+        self.server.releases.insert(0, make_release("v2.1.0"))
+        self.server.etag = '"v2"'
+
+        versions = [u.version for u in self.engine._check_github_updates()]
+        self.assertEqual(versions, ["2.1.0", "2.0.0"])
+
+    def test_offline_uses_cached_releases(self):
+        """Test that cached releases are served when the API is unreachable"""
+        self.engine._check_github_updates()
+        self.server.stop()
+
+        versions = [u.version for u in self.engine._check_github_updates()]
+        self.assertEqual(versions, ["2.0.0"])
+
+
+class TestUpdateAnalysis(unittest.TestCase):
+    """Test changelog classification and memoized analysis"""
+
+    def setUp(self):
+        """Set up an engine with a private database"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.engine = ai_updater.AIUpdateEngine(str(self.test_dir))
+        self.engine.current_version = "1.0.0"
+        if not self.engine.ai_assistant:
+            self.skipTest("AI assistant not available")
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def make_update(self, version: str, changelog: str) -> ai_updater.UpdateInfo:
+        return ai_updater.UpdateInfo(
+            version=version, release_date="", changelog=changelog, download_url="https://example.invalid",
+            checksum="", size=0, compatibility_score=0.0, risk_level="medium",
+            ai_recommendation="", breaking_changes=[], new_features=[], fixes=[]
+        )
+
+    def test_classification_priority(self):
+        """Test that each line lands in its highest priority category"""
+        result = ai_updater.classify_changelog(
+            "## 2.0\n- Added X, REMOVED Y\n- New theme\n- Fixed a bug\nnothing here"
+        )
+        self.assertEqual(result['breaking_changes'], ["- Added X, REMOVED Y"])
+        self.assertEqual(result['new_features'], ["- New theme"])
+        self.assertEqual(result['fixes'], ["- Fixed a bug"])
+
+    def test_results_are_memoized(self):
+        """Test that unchanged releases are not analyzed again"""
+        changelog = "- Breaking: removed old config keys\n- Added a feature\n- Fixed crash"
+        first = self.engine._ai_analyze_updates([self.make_update("2.0.0", changelog),
+                                                  self.make_update("1.5.0", "- Fixed bug")])
+
+        with patch.object(self.engine, '_parse_changelog') as parse:
+            again = self.engine._ai_analyze_updates([self.make_update("2.0.0", changelog),
+                                                      self.make_update("1.5.0", "- Fixed bug")])
+            parse.assert_not_called()
+        self.assertEqual([(u.version, u.risk_level, u.breaking_changes) for u in first],
+                         [(u.version, u.risk_level, u.breaking_changes) for u in again])
+
+        with patch.object(self.engine, '_parse_changelog') as parse:
+            self.engine._ai_analyze_updates([self.make_update("2.0.0", changelog + "\n- New")])
+            parse.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
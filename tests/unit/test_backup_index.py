@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for indexed backup archives
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+import tarfile
+import importlib.util
+from pathlib import Path
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from backup_index import BackupIndex, write_indexed_archive, read_member_at
+
+spec = importlib.util.spec_from_file_location("hyprsupreme_migrate", TOOLS_DIR / "hyprsupreme-migrate.py")
+hyprsupreme_migrate = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(hyprsupreme_migrate)
+
+
+class TestIndexedArchive(unittest.TestCase):
+    """Test seekable archive writing and member reads"""
+
+    def setUp(self):
+        """Set up a small config tree"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.src = self.test_dir / "waybar"
+        (self.src / "modules").mkdir(parents=True)
+        (self.src / "config").write_text('{"layer": "top"}\n')
+        (self.src / "style.css").write_bytes(os.urandom(300_000))
+        (self.src / "modules" / ("long_name_" * 12 + ".json")).write_text("{}\n")
+        self.archive = self.test_dir / "backup.tar.gz"
+        self.entries = write_indexed_archive(self.archive, [(self.src, "config/waybar")])
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_archive_is_a_regular_tarball(self):
+        """Test that standard tools can still read the archive"""
+        with tarfile.open(self.archive, 'r:gz') as tar:
+            names = set(tar.getnames())
+        self.assertIn("config/waybar/config", names)
+        self.assertEqual(len(self.entries), 3)
+
+    def test_each_member_reads_from_its_offset(self):
+        """Test that members decompress independently"""
+        for entry in self.entries:
+            expected = Path(entry.source).read_bytes()
+            self.assertEqual(read_member_at(self.archive, entry), expected)
+        self.assertTrue(all(entry.offset > 0 for entry in self.entries))
+
+    def test_corruption_is_detected(self):
+        """Test that a damaged member fails its hash check"""
+        entry = next(e for e in self.entries if e.path.endswith("style.css"))
+        data = bytearray(self.archive.read_bytes())
+        data[entry.offset + 5000] ^= 0xFF
+        self.archive.write_bytes(bytes(data))
+        with self.assertRaises(Exception):
+            read_member_at(self.archive, entry)
+
+
+class TestMigratorBackupFiles(unittest.TestCase):
+    """Test list, diff and single-file restore through the migrator"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.home = self.test_dir / "home"
+        self.waybar = self.home / ".config" / "waybar"
+        self.waybar.mkdir(parents=True)
+        (self.waybar / "config").write_text('{"layer": "top"}\n')
+        (self.waybar / "style.css").write_text("* { font-size: 12px; }\n")
+
+        self.env_patch = patch.dict(os.environ, {"HOME": str(self.home)})
+        self.env_patch.start()
+        self.migrator = hyprsupreme_migrate.HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.backup_id = self.migrator.create_backup("test", components=["waybar"])
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.env_patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_list_and_diff(self):
+        """Test listing members and comparing with current files"""
+        paths = {f['path'] for f in self.migrator.list_backup_files(self.backup_id)}
+        self.assertEqual(paths, {".config/waybar/config", ".config/waybar/style.css"})
+
+        (self.waybar / "config").write_text('{"layer": "bottom"}\n')
+        (self.waybar / "style.css").unlink()
+        diff = self.migrator.diff_backup(self.backup_id)
+        self.assertEqual(diff['modified'], [".config/waybar/config"])
+        self.assertEqual(diff['deleted'], [".config/waybar/style.css"])
+
+    def test_restore_one_file(self):
+        """Test that only the requested file is restored"""
+        (self.waybar / "config").write_text("changed\n")
+        (self.waybar / "style.css").write_text("changed\n")
+
+        self.assertTrue(self.migrator.restore_backup_file(self.backup_id, "waybar/config"))
+        self.assertEqual((self.waybar / "config").read_text(), '{"layer": "top"}\n')
+        self.assertEqual((self.waybar / "style.css").read_text(), "changed\n")
+
+    def test_index_dropped_with_backup(self):
+        """Test that pruning a backup removes its index"""
+        self.migrator.delete_retention_item(self.backup_id)
+        self.assertFalse(BackupIndex(self.migrator.config_dir / "backup_index.db").has(self.backup_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the backup scrubber
+"""
+
+import os
+import sys
+import hashlib
+import unittest
+import tempfile
+import shutil
+import importlib.util
+from pathlib import Path
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import backup_scrub
+from backup_scrub import digest_file, scrub
+
+spec = importlib.util.spec_from_file_location("hyprsupreme_migrate", TOOLS_DIR / "hyprsupreme-migrate.py")
+hyprsupreme_migrate = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(hyprsupreme_migrate)
+
+
+class TestDigest(unittest.TestCase):
+    """Test large-read hashing"""
+
+    def test_digest_matches_hashlib(self):
+        """Test both the fast path and the throttled mmap path"""
+        with tempfile.NamedTemporaryFile() as f:
+            data = os.urandom(3 * 1024 * 1024 + 17)
+            f.write(data)
+            f.flush()
+            expected = hashlib.sha256(data).hexdigest()
+            self.assertEqual(digest_file(Path(f.name)), expected)
+            self.assertEqual(digest_file(Path(f.name), rate_limit_mb=1000), expected)
+
+
+class TestMigratorScrub(unittest.TestCase):
+    """Test scrubbing migrator backups"""
+
+    def setUp(self):
+        """Set up test environment with one backup"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.home = self.test_dir / "home"
+        (self.home / ".config" / "hypr").mkdir(parents=True)
+        (self.home / ".config" / "hypr" / "hyprland.conf").write_text("a = 1\n" * 1000)
+
+        self.env_patch = patch.dict(os.environ, {"HOME": str(self.home)})
+        self.env_patch.start()
+        self.migrator = hyprsupreme_migrate.HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.backup_id = self.migrator.create_backup("test", components=["hyprland"])
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.env_patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_healthy_backup_recorded(self):
+        """Test that a verification result and timing are stored"""
+        report = scrub([self.migrator], idle_io=False, alert=False)
+        self.assertEqual(report.corrupt, [])
+
+        history = self.migrator.get_backup_verifications(self.backup_id)
+        self.assertEqual(len(history), 1)
+        self.assertTrue(history[0]['ok'])
+        self.assertGreater(history[0]['bytes'], 0)
+
+    def test_corruption_is_alerted(self):
+        """Test that a damaged archive fails and triggers an alert"""
+        archive = Path(self.migrator.list_backups()[0]['path'])
+        data = bytearray(archive.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        archive.write_bytes(bytes(data))
+
+        with patch.object(backup_scrub, "alert_corruption") as alert:
+            report = scrub([self.migrator], idle_io=False)
+
+        self.assertEqual([r.id for r in report.corrupt], [self.backup_id])
+        alert.assert_called_once()
+        self.assertFalse(self.migrator.get_backup_verifications(self.backup_id)[0]['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Unit tests for HyprSupreme Cloud profile sync
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import importlib.util
+from pathlib import Path
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+spec = importlib.util.spec_from_file_location("hyprsupreme_cloud", TOOLS_DIR / "hyprsupreme-cloud.py")
+hyprsupreme_cloud = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(hyprsupreme_cloud)
+
+HyprSupremeCloud = hyprsupreme_cloud.HyprSupremeCloud
+
+from config_merge import merge_config_text, split_blocks
+
+
+class TestConfigMerge(unittest.TestCase):
+    """Test block-level three-way merging"""
+
+    def test_split_blocks_keeps_sections_together(self):
+        """Test that brace sections become single blocks"""
+        text = "$mod = SUPER\ndecoration {\n    rounding = 8\n    blur {\n        size = 3\n    }\n}\nbind = $mod, Q, exec, kitty\n"
+        blocks = split_blocks(text)
+        self.assertEqual(len(blocks), 3)
+        self.assertTrue(blocks[1].startswith("decoration {"))
+        self.assertTrue(blocks[1].endswith("}\n"))
+
+    def test_merge_non_overlapping_changes(self):
+        """Test that independent local and incoming edits are both kept"""
+        base = "a = 1\ngeneral {\n    gaps_in = 5\n}\nb = 2\n"
+        ours = "a = 1\ngeneral {\n    gaps_in = 5\n}\nb = 3\n"
+        theirs = "a = 9\ngeneral {\n    gaps_in = 5\n}\nb = 2\n"
+
+        merged, conflicts = merge_config_text(base, ours, theirs)
+        self.assertEqual(conflicts, 0)
+        self.assertEqual(merged, "a = 9\ngeneral {\n    gaps_in = 5\n}\nb = 3\n")
+
+    def test_merge_conflict_prefers_incoming(self):
+        """Test that conflicting blocks resolve to the incoming side"""
+        base = "general {\n    gaps_in = 5\n}\n"
+        ours = "general {\n    gaps_in = 2\n}\n"
+        theirs = "general {\n    gaps_in = 10\n}\n"
+
+        merged, conflicts = merge_config_text(base, ours, theirs)
+        self.assertEqual(conflicts, 1)
+        self.assertEqual(merged, theirs)
+
+
+class TestThreeWayApply(unittest.TestCase):
+    """Test three-way profile apply"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.home = self.test_dir / "home"
+        self.hypr_dir = self.home / ".config" / "hypr"
+        self.hypr_dir.mkdir(parents=True)
+
+        self.env_patch = patch.dict(os.environ, {"HOME": str(self.home)})
+        self.env_patch.start()
+
+        self.cloud = HyprSupremeCloud(str(self.test_dir / "cloud"))
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.env_patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_profile_file_index_saved(self):
+        """Test that profiles get a per-file hash index"""
+        (self.hypr_dir / "hyprland.conf").write_text("a = 1\n")
+        profile_id = self.cloud.create_profile_from_current("Indexed", "")
+
+        index = self.cloud.get_profile_file_index(profile_id)
+        self.assertIn("hypr/hyprland.conf", index)
+        self.assertEqual(len(index["hypr/hyprland.conf"]), 64)
+
+    def test_apply_writes_only_differing_files(self):
+        """Test that unchanged files are not rewritten"""
+        conf = self.hypr_dir / "hyprland.conf"
+        keys = self.hypr_dir / "keybinds.conf"
+        conf.write_text("a = 1\n")
+        keys.write_text("bind = SUPER, Q, exec, kitty\n")
+        profile_id = self.cloud.create_profile_from_current("Snapshot", "")
+
+        conf.write_text("a = 2\n")
+        keys_mtime = keys.stat().st_mtime_ns
+
+        self.assertTrue(self.cloud.apply_profile(profile_id, overwrite_local=True))
+        self.assertEqual(conf.read_text(), "a = 1\n")
+        self.assertEqual(keys.stat().st_mtime_ns, keys_mtime)
+
+        # Backup holds only the overwritten file
+        backups = [p for p in self.cloud.list_local_profiles() if p['name'].startswith("Auto-backup")]
+        self.assertEqual(len(backups), 1)
+        self.assertEqual(list(self.cloud.get_profile_file_index(backups[0]['id'])), ["hypr/hyprland.conf"])
+
+    def test_apply_keeps_local_edits_when_profile_unchanged(self):
+        """Test that local edits survive re-applying the same profile"""
+        conf = self.hypr_dir / "hyprland.conf"
+        conf.write_text("a = 1\n")
+        profile_id = self.cloud.create_profile_from_current("Snapshot", "")
+        self.assertTrue(self.cloud.apply_profile(profile_id))
+
+        conf.write_text("a = 1\nb = 2\n")
+        self.assertTrue(self.cloud.apply_profile(profile_id))
+        self.assertEqual(conf.read_text(), "a = 1\nb = 2\n")
+
+    def test_apply_without_base_keeps_local(self):
+        """Test that a first apply saves the profile version beside an edited file"""
+        conf = self.hypr_dir / "hyprland.conf"
+        conf.write_text("a = 1\n")
+        profile_id = self.cloud.create_profile_from_current("Snapshot", "")
+        conf.write_text("a = 2\n")
+
+        self.assertFalse(self.cloud.apply_profile(profile_id))
+        self.assertEqual(conf.read_text(), "a = 2\n")
+        self.assertEqual((self.hypr_dir / "hyprland.conf.update").read_text(), "a = 1\n")
+
+        # The conflict is not recorded as resolved, so applying again reports it again
+        result = self.cloud.merge_profile(profile_id)
+        self.assertEqual((result.conflicts, result.kept), (["hypr/hyprland.conf"], []))
+
+        self.assertTrue(self.cloud.apply_profile(profile_id, overwrite_local=True))
+        self.assertEqual(conf.read_text(), "a = 1\n")
+
+    def test_apply_conflict_keeps_local(self):
+        """Test that overlapping edits leave the local file alone"""
+        conf = self.hypr_dir / "hyprland.conf"
+        conf.write_text("a = 1\nc = 0\nb = 1\n")
+        old_id = self.cloud.create_profile_from_current("Old", "")
+        self.assertTrue(self.cloud.apply_profile(old_id))
+
+        conf.write_text("a = 2\nc = 0\nb = 1\n")
+        new_id = self.cloud.create_profile_from_current("New", "")
+        conf.write_text("a = 3\nc = 0\nb = 1\n")
+
+        result = self.cloud.merge_profile(new_id)
+        self.assertEqual((result.merged, result.conflicts), ([], ["hypr/hyprland.conf"]))
+        self.assertEqual(conf.read_text(), "a = 3\nc = 0\nb = 1\n")
+        self.assertIn("a = 2", (self.hypr_dir / "hyprland.conf.update").read_text())
+        self.assertEqual(self.cloud.merge_profile(new_id).conflicts, ["hypr/hyprland.conf"])
+
+    def test_apply_merges_both_sides(self):
+        """Test block-level merge when local and profile both changed"""
+        conf = self.hypr_dir / "hyprland.conf"
+        conf.write_text("a = 1\nc = 0\nb = 1\n")
+        old_id = self.cloud.create_profile_from_current("Old", "")
+        self.assertTrue(self.cloud.apply_profile(old_id))
+
+        conf.write_text("a = 2\nc = 0\nb = 1\n")
+        new_id = self.cloud.create_profile_from_current("New", "")
+
+        conf.write_text("a = 1\nc = 0\nb = 3\n")
+
+        self.assertTrue(self.cloud.apply_profile(new_id))
+        self.assertEqual(conf.read_text(), "a = 2\nc = 0\nb = 3\n")
+
+
+
+class TestProfileSearch(unittest.TestCase):
+    """Test the local profile catalogue"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cloud = HyprSupremeCloud(str(self.test_dir / "cloud"))
+
+        self._add_profile("p1", "Gaming Setup", "Fast and minimal for games", ["Gaming", "performance"],
+                          ["hyprland", "waybar"], ["animations"])
+        self._add_profile("p2", "Work Desk", "Calm layout for gaming breaks", ["work"],
+                          ["hyprland"], ["blur"])
+        self._add_profile("p3", "Showcase", "All the eye candy", ["showcase", "gaming"],
+                          ["hyprland", "ags"], ["blur", "animations"])
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def _add_profile(self, profile_id, name, description, tags, components, features):
+        profile = hyprsupreme_cloud.ConfigProfile(
+            id=profile_id, name=name, description=description, author="tester",
+            version="1.0.0", created_at="2024-01-01T00:00:00", updated_at=f"2024-01-0{profile_id[-1]}T00:00:00",
+            tags=tags, components=components, features=features, preset="custom",
+            checksum="", size=0
+        )
+        self.cloud.save_profile_to_db(profile, "")
+
+    def test_full_text_ranking(self):
+        """Test that name matches rank above description matches"""
+        results = self.cloud.search_local_profiles("gam")
+        self.assertEqual(results[0]['id'], "p1")
+        self.assertEqual({r['id'] for r in results}, {"p1", "p2", "p3"})
+
+    def test_tag_and_facet_filters(self):
+        """Test normalized tags and component/feature facets"""
+        ids = {r['id'] for r in self.cloud.search_local_profiles(tags=["GAMING"])}
+        self.assertEqual(ids, {"p1", "p3"})
+
+        ids = {r['id'] for r in self.cloud.search_local_profiles(tags=["gaming"], features=["blur"])}
+        self.assertEqual(ids, {"p3"})
+
+        ids = {r['id'] for r in self.cloud.search_local_profiles(components=["waybar"])}
+        self.assertEqual(ids, {"p1"})
+
+    def test_catalogue_follows_updates_and_deletes(self):
+        """Test that re-saving and deleting keep the catalogue in sync"""
+        self._add_profile("p2", "Work Desk", "Quiet", ["office"], ["hyprland"], [])
+        self.assertEqual(self.cloud.search_local_profiles(tags=["work"]), [])
+        self.assertEqual(self.cloud.search_local_profiles("quiet")[0]['id'], "p2")
+
+        self.assertTrue(self.cloud.delete_profile("p2"))
+        self.assertEqual(self.cloud.search_local_profiles("quiet"), [])
+
+        facets = self.cloud.get_profile_facets()
+        self.assertEqual(facets['tags']['gaming'], 2)
+        self.assertEqual(facets['features']['animations'], 2)
+
+
+
+class TestSyncHistory(unittest.TestCase):
+    """Test buffered sync history and compaction"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cloud = HyprSupremeCloud(str(self.test_dir / "cloud"))
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def _raw_count(self):
+        with sqlite3.connect(self.cloud.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM sync_history").fetchone()[0]
+
+    def test_events_are_buffered_until_flush(self):
+        """Test that logging does not hit the database per event"""
+        for _ in range(5):
+            self.cloud.log_sync_action("p1", "upload", True)
+        self.assertEqual(self._raw_count(), 0)
+
+        self.cloud.flush_history()
+        self.assertEqual(self._raw_count(), 5)
+
+    def test_batch_size_triggers_flush(self):
+        """Test automatic flush when the batch is full"""
+        self.cloud.history.batch_size = 3
+        for _ in range(3):
+            self.cloud.log_sync_action("p1", "upload", True)
+        self.assertEqual(self._raw_count(), 3)
+
+    def test_time_range_query_and_compaction(self):
+        """Test range queries and rolling old events into daily totals"""
+        with sqlite3.connect(self.cloud.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO sync_history (profile_id, action, timestamp, success, error_message) VALUES (?, ?, ?, ?, ?)",
+                [
+                    ("p1", "upload", "2020-01-01T10:00:00", True, None),
+                    ("p1", "upload", "2020-01-01T11:00:00", False, "timeout"),
+                    ("p1", "upload", "2020-01-02T09:00:00", True, None),
+                ]
+            )
+        self.cloud.log_sync_action("p1", "download", True)
+
+        self.assertEqual(len(self.cloud.get_sync_history("p1", since="2020-01-01", until="2020-01-01")), 2)
+        self.assertEqual(len(self.cloud.get_sync_history("p1")), 4)
+
+        self.assertEqual(self.cloud.compact_sync_history(older_than_days=30), 3)
+        self.assertEqual(len(self.cloud.get_sync_history("p1")), 1)
+
+        daily = {row['day']: row for row in self.cloud.get_sync_history_daily("p1")}
+        self.assertEqual(daily["2020-01-01"]['success_count'], 1)
+        self.assertEqual(daily["2020-01-01"]['failure_count'], 1)
+        self.assertEqual(daily["2020-01-01"]['last_error'], "timeout")
+        self.assertEqual(daily["2020-01-02"]['success_count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
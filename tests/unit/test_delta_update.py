@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Unit tests for delta update packages
+"""
+
+import sys
+import random
+import unittest
+import tempfile
+import shutil
+import threading
+import functools
+from pathlib import Path
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import ai_updater
+from delta_update import (
+    DeltaError, encode_delta, apply_delta, build_manifest, publish_deltas,
+    cheapest_chain, apply_chain
+)
+
+
+def write_tree(root: Path, files: dict):
+    for path, content in files.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+
+
+class TestDeltaEncoding(unittest.TestCase):
+    """Test the copy/insert delta format"""
+
+    def test_round_trip(self):
+        """Test that random edits reconstruct exactly"""
+        rng = random.Random(7)
+        old_lines = [f"line {i} {rng.random()}\n" for i in range(500)]
+        for _ in range(20):
+            new_lines = list(old_lines)
+            for _ in range(rng.randint(1, 10)):
+                pos = rng.randrange(len(new_lines))
+                if rng.random() < 0.5:
+                    new_lines[pos] = f"changed {rng.random()}\n"
+                else:
+                    del new_lines[pos]
+            old, new = "".join(old_lines).encode(), "".join(new_lines).encode()
+            delta = encode_delta(old, new)
+            self.assertEqual(apply_delta(old, delta), new)
+            self.assertLess(len(delta), len(new) // 4)
+
+    def test_copy_out_of_range(self):
+        """Test that a delta for a different base is rejected"""
+        delta = encode_delta(b"a\nb\nc\n", b"a\nb\nc\nd\n")
+        with self.assertRaises(DeltaError):
+            apply_delta(b"a\n", delta)
+
+
+class TestPatchChains(unittest.TestCase):
+    """Test planning and applying chains of patches"""
+
+    def setUp(self):
+        """Set up three release trees and their published deltas"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.versions = {}
+        files = {f"modules/mod{i}.sh": f"#!/bin/bash\n" + f"echo {i}\n" * 200 for i in range(10)}
+        for version in ("1.0.0", "1.1.0", "1.2.0"):
+            if version == "1.1.0":
+                files["modules/mod3.sh"] += "echo patched\n"
+                files["modules/new.sh"] = "echo new\n"
+            elif version == "1.2.0":
+                del files["modules/mod5.sh"]
+                files["install.sh"] = "#!/bin/bash\necho install\n"
+            root = self.test_dir / version
+            write_tree(root, files)
+            self.versions[version] = root
+        self.published = self.test_dir / "published"
+        self.index = publish_deltas(list(self.versions.items()), self.published)
+        self.fetch = lambda name: (self.published / name).read_bytes()
+
+        self.installed = self.test_dir / "installed"
+        shutil.copytree(self.versions["1.0.0"], self.installed)
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_cheapest_chain(self):
+        """Test that a direct patch is preferred over a longer chain"""
+        chain = cheapest_chain(self.index, "1.0.0", "1.2.0")
+        self.assertEqual([(p['from'], p['to']) for p in chain], [("1.0.0", "1.1.0"), ("1.1.0", "1.2.0")])
+
+        self.index['patches'].append({'from': "1.0.0", 'to': "1.2.0", 'file': "direct", 'size': 1, 'sha256': ""})
+        self.assertEqual(len(cheapest_chain(self.index, "1.0.0", "1.2.0")), 1)
+        self.assertIsNone(cheapest_chain(self.index, "1.0.0", "1.2.0", full_size=1))
+        self.assertIsNone(cheapest_chain(self.index, "0.9.0", "1.2.0"))
+
+    def test_apply_reconstructs_target(self):
+        """Test that the patched tree matches the target manifest"""
+        chain = cheapest_chain(self.index, "1.0.0", "1.2.0")
+        result = apply_chain(self.installed, self.index, chain, self.fetch)
+
+        self.assertEqual(result.files_deleted, 1)
+        self.assertEqual(build_manifest(self.installed, "1.2.0")['tree_hash'],
+                         self.index['versions']["1.2.0"]['tree_hash'])
+
+    def test_modified_base_is_rejected(self):
+        """Test that local edits abort the chain without writing anything"""
+        (self.installed / "modules" / "mod3.sh").write_text("local edit\n")
+        chain = cheapest_chain(self.index, "1.0.0", "1.2.0")
+        with self.assertRaises(DeltaError):
+            apply_chain(self.installed, self.index, chain, self.fetch)
+        self.assertFalse((self.installed / "install.sh").exists())
+
+    def test_engine_uses_patch_chain(self):
+        """Test download and apply through the update engine"""
+        handler = functools.partial(SimpleHTTPRequestHandler, directory=str(self.published))
+        handler.log_message = lambda *args: None
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            engine = ai_updater.AIUpdateEngine(str(self.test_dir / "config"))
+            engine.project_root = self.installed
+            engine.current_version = "1.0.0"
+            engine.settings['delta_index_url'] = f"http://127.0.0.1:{httpd.server_address[1]}/index.json"
+
+            update = ai_updater.UpdateInfo(
+                version="1.2.0", release_date="", changelog="", download_url="http://127.0.0.1:1/full.zip",
+                checksum="", size=10 ** 9, compatibility_score=0.0, risk_level="low",
+                ai_recommendation="", breaking_changes=[], new_features=[], fixes=[]
+            )
+            self.assertTrue(engine.download_update(update))
+            self.assertTrue(engine._update_from_archive(update, conservative=True))
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+        self.assertEqual((self.installed / "install.sh").read_text(), "#!/bin/bash\necho install\n")
+        self.assertFalse((self.installed / "modules" / "mod5.sh").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incremental git updates
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import git
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import ai_updater
+from git_update import GitUpdater, GitUpdateError
+
+AUTHOR = git.Actor("Test", "test@example.invalid")
+
+HYPRLAND_CONF = """\
+general {
+    gaps_in = 5
+}
+
+decoration {
+    rounding = 8
+}
+
+bind = SUPER, Q, exec, kitty
+"""
+
+
+def commit(repo: git.Repo, files: dict, message: str, remove=()):
+    root = Path(repo.working_tree_dir)
+    for name, content in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(content)
+    if files:
+        repo.index.add(list(files))
+    if remove:
+        repo.index.remove(list(remove), working_tree=True)
+    return repo.index.commit(message, author=AUTHOR, committer=AUTHOR)
+
+
+class TestGitUpdater(unittest.TestCase):
+    """Test path-by-path updates of a checkout"""
+
+    def setUp(self):
+        """Set up an upstream repository and a checkout of it"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.upstream = git.Repo.init(self.test_dir / "upstream", initial_branch="main")
+        commit(self.upstream, {
+            "configs/hyprland.conf": HYPRLAND_CONF,
+            "modules/setup.sh": "#!/bin/bash\necho setup\n",
+            "modules/old.sh": "echo old\n",
+            "README.md": "readme\n",
+        }, "Initial")
+        self.checkout = git.Repo.clone_from(self.upstream.working_tree_dir, self.test_dir / "checkout")
+        self.root = Path(self.checkout.working_tree_dir)
+
+        commit(self.upstream, {
+            "configs/hyprland.conf": HYPRLAND_CONF.replace("gaps_in = 5", "gaps_in = 3"),
+            "modules/setup.sh": "#!/bin/bash\necho setup v2\n",
+            "modules/new.sh": "echo new\n",
+        }, "Tune gaps")
+        commit(self.upstream, {}, "Drop old module", remove=["modules/old.sh"])
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_pending_and_changed_files(self):
+        """Test that one fetch yields the commit list and changed paths"""
+        updater = GitUpdater(self.root)
+        count, lines = updater.pending()
+        self.assertEqual(count, 2)
+        self.assertTrue(lines[0].endswith("Drop old module"))
+        self.assertEqual([c.path for c in updater.changed_files()],
+                         ["configs/hyprland.conf", "modules/new.sh", "modules/old.sh", "modules/setup.sh"])
+
+    def test_only_changed_paths_are_touched(self):
+        """Test a clean fast-forward"""
+        readme = self.root / "README.md"
+        os.utime(readme, ns=(0, 0))
+
+        result = GitUpdater(self.root).apply()
+        self.assertEqual(sorted(result.written), ["configs/hyprland.conf", "modules/new.sh", "modules/setup.sh"])
+        self.assertEqual(result.deleted, ["modules/old.sh"])
+        self.assertEqual(readme.stat().st_mtime_ns, 0)
+        self.assertEqual(self.checkout.head.commit, self.upstream.head.commit)
+        self.assertFalse(self.checkout.is_dirty(untracked_files=True))
+        self.assertEqual((self.root / "modules" / "setup.sh").read_text(), "#!/bin/bash\necho setup v2\n")
+
+    def test_local_edits_are_merged_or_kept(self):
+        """Test that local modifications survive the update"""
+        conf = self.root / "configs" / "hyprland.conf"
+        conf.write_text(HYPRLAND_CONF.replace("rounding = 8", "rounding = 12"))
+        (self.root / "modules" / "setup.sh").write_text("#!/bin/bash\necho my setup\n")
+        (self.root / "modules" / "old.sh").write_text("echo still mine\n")
+
+        result = GitUpdater(self.root).apply()
+        self.assertEqual(result.merged, ["configs/hyprland.conf"])
+        self.assertEqual(result.conflicts, [])
+        self.assertEqual(sorted(result.kept), ["modules/old.sh", "modules/setup.sh"])
+        self.assertIn("gaps_in = 3", conf.read_text())
+        self.assertIn("rounding = 12", conf.read_text())
+        self.assertEqual((self.root / "modules" / "setup.sh").read_text(), "#!/bin/bash\necho my setup\n")
+        self.assertEqual((self.root / "modules" / "setup.sh.update").read_text(), "#!/bin/bash\necho setup v2\n")
+        self.assertTrue((self.root / "modules" / "old.sh").exists())
+
+    def test_conflicting_edits_are_kept(self):
+        """Test that overlapping edits leave the local file alone"""
+        conf = self.root / "configs" / "hyprland.conf"
+        local = HYPRLAND_CONF.replace("gaps_in = 5", "gaps_in = 10")
+        conf.write_text(local)
+
+        result = GitUpdater(self.root).apply()
+        self.assertEqual(result.conflicts, ["configs/hyprland.conf"])
+        self.assertEqual(result.merged, [])
+        self.assertEqual(conf.read_text(), local)
+        self.assertIn("gaps_in = 3", (self.root / "configs" / "hyprland.conf.update").read_text())
+
+    def test_undecodable_file_is_kept(self):
+        """Test that non-UTF-8 config files are not rewritten"""
+        conf = self.root / "configs" / "hyprland.conf"
+        local = HYPRLAND_CONF.replace("rounding = 8", "# caf\xe9\nrounding = 12").encode('latin-1')
+        conf.write_bytes(local)
+
+        result = GitUpdater(self.root).apply()
+        self.assertEqual(result.kept, ["configs/hyprland.conf"])
+        self.assertEqual(conf.read_bytes(), local)
+        self.assertIn("gaps_in = 3", (self.root / "configs" / "hyprland.conf.update").read_text())
+
+    def test_diverged_history_is_refused(self):
+        """Test that local commits are not silently reverted"""
+        commit(self.checkout, {"local.txt": "mine\n"}, "Local work")
+        with self.assertRaises(GitUpdateError):
+            GitUpdater(self.root).apply()
+        self.assertEqual((self.root / "modules" / "setup.sh").read_text(), "#!/bin/bash\necho setup\n")
+
+    def test_engine_uses_single_fetch(self):
+        """Test check, download and apply through the update engine"""
+        engine = ai_updater.AIUpdateEngine(str(self.test_dir / "config"))
+        engine.update_sources['local']['path'] = str(self.root)
+        updates = engine._check_local_updates()
+        self.assertEqual(len(updates), 1)
+        self.assertIn("(2 commits)", updates[0].changelog)
+
+        with patch.object(git.Remote, 'fetch') as fetch:
+            self.assertTrue(engine.download_update(updates[0]))
+            self.assertTrue(engine._apply_incremental_update(updates[0], None))
+            fetch.assert_not_called()
+        self.assertEqual((self.root / "modules" / "new.sh").read_text(), "echo new\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Hyprland config parser
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import hypr_config
+from hypr_config import HyprConfigParser, Section, Variable, Source, parse_config
+
+MAIN_CONFIG = """\
+# Main config
+$mainMod = SUPER
+$term = kitty
+source = ./conf.d/*.conf
+
+decoration {
+    rounding = 10 # corners
+    blur { enabled = true }
+    col.active_border = rgba(33ccffee) ## not a comment
+}
+bind = $mainMod, Q, exec, $term
+bind = $mainMod, C, killactive,
+animations:enabled = no
+"""
+
+
+class TestGrammar(unittest.TestCase):
+    """Test parsing of a single file"""
+
+    def test_nodes(self):
+        """Test variables, sources and nested sections"""
+        parsed = parse_config(MAIN_CONFIG)
+        self.assertEqual(parsed.errors, [])
+        self.assertIsInstance(parsed.body[0], Variable)
+        self.assertIsInstance(parsed.body[2], Source)
+        decoration = parsed.body[3]
+        self.assertIsInstance(decoration, Section)
+        self.assertEqual([type(n).__name__ for n in decoration.body], ["Assignment", "Section", "Assignment"])
+        self.assertEqual(decoration.body[2].value, "rgba(33ccffee) # not a comment")
+
+    def test_errors(self):
+        """Test that broken structure is reported with line numbers"""
+        parsed = parse_config("general {\n  gaps_in 5\n}\n}\nmisc {\n")
+        self.assertEqual([line for line, _ in parsed.errors], [2, 4, 5])
+
+
+class TestResolvedConfig(unittest.TestCase):
+    """Test source includes, variables and the AST cache"""
+
+    def setUp(self):
+        """Set up a config split over several files"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.main = self.test_dir / "hyprland.conf"
+        self.main.write_text(MAIN_CONFIG)
+        conf_d = self.test_dir / "conf.d"
+        conf_d.mkdir()
+        (conf_d / "env.conf").write_text("env = LIBVA_DRIVER_NAME,nvidia\n$term = foot\n")
+        (conf_d / "looks.conf").write_text("decoration:active_opacity = 0.9\n")
+        self.parser = HyprConfigParser()
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_queries(self):
+        """Test lookups across sourced files"""
+        config = self.parser.load(self.main)
+        self.assertEqual(len(config.files), 3)
+        self.assertTrue(config.get_bool('decoration:blur:enabled'))
+        self.assertFalse(config.get_bool('animations:enabled', True))
+        self.assertEqual(config.get_float('decoration:active_opacity'), 0.9)
+        self.assertEqual(config.env(), {'LIBVA_DRIVER_NAME': 'nvidia'})
+        self.assertEqual(config.get_all('bind'), ["SUPER, Q, exec, foot", "SUPER, C, killactive,"])
+        self.assertEqual(config.section('decoration:blur'), {'enabled': 'true'})
+
+    def test_repeated_loads_are_cached(self):
+        """Test that unchanged files are not parsed again"""
+        with patch.object(hypr_config, 'parse_config', wraps=parse_config) as parse:
+            first = self.parser.load(self.main)
+            self.assertIs(self.parser.load(self.main), first)
+            self.assertEqual(parse.call_count, 3)
+
+            looks = self.test_dir / "conf.d" / "looks.conf"
+            looks.write_text("decoration:active_opacity = 1.0\n")
+            os.utime(looks, ns=(0, 1))
+            config = self.parser.load(self.main)
+            self.assertEqual(parse.call_count, 4)
+            self.assertEqual(config.get_float('decoration:active_opacity'), 1.0)
+
+            (self.test_dir / "conf.d" / "new.conf").write_text("misc:vrr = 1\n")
+            os.utime(self.test_dir / "conf.d", ns=(0, 2))
+            self.assertEqual(self.parser.load(self.main).get('misc:vrr'), "1")
+
+    def test_external_reader(self):
+        """Test that a reader callable supplies every file and bypasses stat()"""
+        texts = {}
+
+        def read(path):
+            texts[path] = path.read_text() if path.is_file() else None
+            return texts[path]
+
+        parser = HyprConfigParser(read=read)
+        with patch.object(hypr_config, '_stat_key') as stat:
+            config = parser.load(self.main)
+            stat.assert_not_called()
+        self.assertEqual(config.get_float('decoration:active_opacity'), 0.9)
+        self.assertIn(self.main, texts)
+        self.assertIn(self.test_dir / "conf.d" / "looks.conf", texts)
+
+    def test_source_cycle(self):
+        """Test that a file sourcing itself is reported, not followed"""
+        self.main.write_text("source = hyprland.conf\ngeneral:gaps_in = 5\n")
+        config = self.parser.load(self.main)
+        self.assertEqual(config.get('general:gaps_in'), "5")
+        self.assertIn("source cycle", config.errors[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the HyprSupreme migration engine
+"""
+
+import io
+import os
+import sys
+import difflib
+import time
+import unittest
+import tempfile
+import shutil
+import sqlite3
+import importlib.util
+from pathlib import Path
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+spec = importlib.util.spec_from_file_location("hyprsupreme_migrate", TOOLS_DIR / "hyprsupreme-migrate.py")
+hyprsupreme_migrate = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(hyprsupreme_migrate)
+
+HyprSupremeMigrator = hyprsupreme_migrate.HyprSupremeMigrator
+MigrationRule = hyprsupreme_migrate.MigrationRule
+
+# Fake binaries run with only their own directory on PATH
+SLEEP = shutil.which("sleep")
+
+
+def make_rule(rule_id, actions, from_version="1.0.0", to_version="1.1.0", conditions=None):
+    """Build a minimal migration rule"""
+    return MigrationRule(
+        id=rule_id, name=rule_id, description=rule_id,
+        from_version=from_version, to_version=to_version,
+        component="hyprland", rule_type="config_update",
+        conditions=conditions or [], actions=actions, rollback_actions=[]
+    )
+
+
+class TestCompiledPipeline(unittest.TestCase):
+    """Test single-pass file rewrites"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.migrator = HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.conf = self.test_dir / "hyprland.conf"
+        self.conf.write_text("gaps_in = 5\nrounding = 8\nblur_size = 3\n")
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_rules_on_same_file_share_one_pipeline(self):
+        """Test that several rules compile into one read/write of a file"""
+        rules = [
+            make_rule("r1", [{"type": "replace_text", "file": str(self.conf),
+                              "replacements": [{"old": "gaps_in", "new": "gaps_inner"}]}]),
+            make_rule("r2", [{"type": "replace_regex", "file": str(self.conf),
+                              "patterns": [{"pattern": r"rounding = (\d+)", "replacement": r"rounding = \1 # px"}]}]),
+            make_rule("r3", [{"type": "replace_text", "file": str(self.conf),
+                              "replacements": [{"old": "blur_size", "new": "blur:size"}]}]),
+        ]
+
+        steps = self.migrator.compile_rules(rules)
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(steps[0].payload.rule_ids, ["r1", "r2", "r3"])
+
+        with patch.object(hyprsupreme_migrate, "atomic_write", wraps=hyprsupreme_migrate.atomic_write) as writer:
+            timings = self.migrator._run_compiled_steps(steps)
+
+        self.assertEqual(writer.call_count, 1)
+        self.assertEqual(self.conf.read_text(), "gaps_inner = 5\nrounding = 8 # px\nblur:size = 3\n")
+        self.assertTrue(timings[0]['changed'])
+        self.assertEqual(timings[0]['transforms'], 3)
+
+    def test_barrier_actions_keep_order(self):
+        """Test that non-text actions split pipelines for the same file"""
+        moved = self.test_dir / "moved.conf"
+        rules = [
+            make_rule("r1", [{"type": "replace_text", "file": str(self.conf),
+                              "replacements": [{"old": "gaps_in", "new": "gaps_inner"}]}]),
+            make_rule("r2", [{"type": "move_file", "source": str(self.conf), "dest": str(moved)}]),
+            make_rule("r3", [{"type": "replace_text", "file": str(moved),
+                              "replacements": [{"old": "gaps_inner", "new": "gaps"}]}]),
+        ]
+
+        steps = self.migrator.compile_rules(rules)
+        self.assertEqual([step.kind for step in steps], ["pipeline", "action", "pipeline"])
+
+        self.migrator._run_compiled_steps(steps)
+        self.assertFalse(self.conf.exists())
+        self.assertTrue(moved.read_text().startswith("gaps = 5\n"))
+
+    def test_unchanged_file_is_not_rewritten(self):
+        """Test that a pipeline with no effect leaves the file alone"""
+        mtime = self.conf.stat().st_mtime_ns
+        rule = make_rule("r1", [{"type": "replace_text", "file": str(self.conf),
+                                 "replacements": [{"old": "missing", "new": "x"}]}])
+
+        timings = self.migrator._run_compiled_steps(self.migrator.compile_rules([rule]))
+        self.assertFalse(timings[0]['changed'])
+        self.assertEqual(self.conf.stat().st_mtime_ns, mtime)
+
+
+class TestVersionDetection(unittest.TestCase):
+    """Test concurrent, cached component version probes"""
+
+    def setUp(self):
+        """Set up fake component binaries on PATH"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.bin_dir = self.test_dir / "bin"
+        self.bin_dir.mkdir()
+        self.calls = self.test_dir / "calls"
+
+        self._fake_binary("hyprctl", "echo 'Hyprland v0.45.2 built from branch'")
+        self._fake_binary("waybar", "echo 'Waybar v0.10.4'")
+        self._fake_binary("kitty", "echo 'kitty 0.36.1 created by Kovid Goyal'")
+
+        self.env_patch = patch.dict(os.environ, {"PATH": str(self.bin_dir)})
+        self.env_patch.start()
+        self.migrator = HyprSupremeMigrator(str(self.test_dir / "config"))
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.env_patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _fake_binary(self, name, body, delay=0.0):
+        path = self.bin_dir / name
+        path.write_text(f"#!/bin/sh\necho {name} >> '{self.calls}'\n{SLEEP} {delay}\n{body}\n")
+        path.chmod(0o755)
+        return path
+
+    def _call_count(self):
+        return len(self.calls.read_text().split()) if self.calls.exists() else 0
+
+    def test_versions_parsed(self):
+        """Test that each probe output is parsed"""
+        versions = self.migrator.detect_installed_versions()
+        self.assertEqual(versions, {"hyprland": "0.45.2", "waybar": "0.10.4", "kitty": "0.36.1"})
+
+    def test_probes_run_concurrently(self):
+        """Test that slow probes overlap instead of adding up"""
+        self._fake_binary("hyprctl", "echo 'Hyprland v0.45.2'", delay=0.5)
+        self._fake_binary("waybar", "echo 'Waybar v0.10.4'", delay=0.5)
+        self._fake_binary("kitty", "echo 'kitty 0.36.1'", delay=0.5)
+
+        start = time.perf_counter()
+        versions = self.migrator.detect_installed_versions(use_cache=False)
+        self.assertLess(time.perf_counter() - start, 1.4)
+        self.assertEqual(len(versions), 3)
+
+    def test_probe_timeout(self):
+        """Test that a hanging probe is abandoned and not cached"""
+        self._fake_binary("waybar", "echo 'Waybar v0.10.4'", delay=5)
+        self.migrator.probe_timeout = 0.3
+
+        versions = self.migrator.detect_installed_versions()
+        self.assertNotIn("waybar", versions)
+        self.assertNotIn("waybar", self.migrator._load_version_cache())
+
+    def test_cache_until_binary_changes(self):
+        """Test that cached results are reused until the binary changes"""
+        self.migrator.detect_installed_versions()
+        self.assertEqual(self._call_count(), 3)
+
+        self.assertEqual(self.migrator.detect_installed_versions()["waybar"], "0.10.4")
+        self.assertEqual(self._call_count(), 3)
+
+        waybar = self._fake_binary("waybar", "echo 'Waybar v0.11.0'")
+        later = time.time() + 10
+        os.utime(waybar, (later, later))
+        self.assertEqual(self.migrator.detect_installed_versions()["waybar"], "0.11.0")
+        self.assertEqual(self._call_count(), 4)
+
+
+class TestRuleGraphPlanner(unittest.TestCase):
+    """Test version-indexed migration planning"""
+
+    def setUp(self):
+        """Set up a migrator with a custom rule set"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.migrator = HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.migrator.migration_rules = {}
+        self.migrator.invalidate_rule_graph()
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def _add(self, rule_id, from_version, to_version, component="waybar", priority=0):
+        rule = make_rule(rule_id, [], from_version, to_version)
+        rule.component = component
+        rule.priority = priority
+        self.migrator.migration_rules[rule_id] = rule
+        self.migrator.invalidate_rule_graph()
+
+    def test_parse_version(self):
+        """Test numeric, padded and pre-release ordering"""
+        parse = hyprsupreme_migrate.parse_version
+        self.assertLess(parse("0.9.0"), parse("0.10.0"))
+        self.assertEqual(parse("v1.2"), parse("1.2.0"))
+        self.assertLess(parse("1.2.0-beta"), parse("1.2.0"))
+
+    def test_chain_orders_by_numeric_version(self):
+        """Test that steps follow version order, not string order"""
+        self._add("b", "0.10.0", "0.11.0")
+        self._add("a", "0.9.0", "0.10.0")
+        self.migrator.current_version["waybar"] = "0.9.0"
+
+        plan = self.migrator.plan_migration("0.11.0", "waybar")
+        self.assertEqual([r.id for r in plan.rules], ["a", "b"])
+
+    def test_all_rules_in_range_and_grouped_edges(self):
+        """Test that intermediate steps run alongside a direct edge, which keeps all its rules"""
+        self._add("step1", "1.0.0", "1.1.0")
+        self._add("step2", "1.1.0", "2.0.0")
+        self._add("direct_late", "1.0.0", "2.0.0", priority=5)
+        self._add("direct_early", "1.0.0", "2.0.0", priority=1)
+        self._add("other", "1.0.0", "2.0.0", component="rofi")
+        self.migrator.current_version["waybar"] = "1.0.0"
+
+        plan = self.migrator.plan_migration("2.0.0", "waybar")
+        self.assertEqual([r.id for r in plan.rules], ["step1", "direct_early", "direct_late", "step2"])
+
+    def test_failed_condition_falls_back_to_other_path(self):
+        """Test that a direct edge whose condition fails does not block a valid two-step path"""
+        missing = str(self.test_dir / "missing.conf")
+        self._add("step1", "1.0.0", "1.5.0")
+        self._add("step2", "1.5.0", "2.0.0")
+        self._add("direct", "1.0.0", "2.0.0")
+        self.migrator.migration_rules["direct"].conditions = [f"file_exists:{missing}"]
+        self.migrator.current_version["waybar"] = "1.0.0"
+
+        plan = self.migrator.plan_migration("2.0.0", "waybar")
+        self.assertEqual([r.id for r in plan.rules], ["step1", "step2"])
+
+        # A failing first step leaves nothing reachable beyond it
+        self.migrator.migration_rules["step1"].conditions = [f"file_exists:{missing}"]
+        self.assertIsNone(self.migrator.plan_migration("2.0.0", "waybar"))
+
+    def test_chain_is_reused_across_sessions(self):
+        """Test that repeated planning reuses the computed chain until rules change"""
+        missing = str(self.test_dir / "missing.conf")
+        self._add("step1", "1.0.0", "1.5.0")
+        self._add("step2", "1.5.0", "2.0.0")
+        self._add("direct", "1.0.0", "2.0.0")
+        self.migrator.current_version["waybar"] = "1.0.0"
+
+        sweep = hyprsupreme_migrate.RuleGraph._sweep
+        with patch.object(hyprsupreme_migrate.RuleGraph, "_sweep", side_effect=sweep) as sweeps:
+            first = self.migrator.plan_migration("2.0.0", "waybar")
+            self.migrator.migration_rules["direct"].conditions = [f"file_exists:{missing}"]
+            second = self.migrator.plan_migration("2.0.0", "waybar")
+            # One chain build, then one condition pass per plan
+            self.assertEqual(sweeps.call_count, 3)
+
+            self.migrator.invalidate_rule_graph()
+            self.migrator.plan_migration("2.0.0", "waybar")
+            self.assertEqual(sweeps.call_count, 5)
+
+        self.assertEqual([r.id for r in first.rules], ["step1", "direct", "step2"])
+        self.assertEqual([r.id for r in second.rules], ["step1", "step2"])
+
+    def test_skips_already_applied_and_overshooting_rules(self):
+        """Test that rules behind the current version or past the target are ignored"""
+        self._add("old", "0.1.0", "0.2.0")
+        self._add("next", "0.2.0", "0.3.0")
+        self._add("future", "0.3.0", "0.4.0")
+        self.migrator.current_version["waybar"] = "0.2.0"
+
+        plan = self.migrator.plan_migration("0.3.5", "waybar")
+        self.assertEqual([r.id for r in plan.rules], ["next"])
+
+    def test_check_for_updates_plans_each_component(self):
+        """Test parallel planning across components"""
+        self._add("w", "0.9.0", "0.10.0")
+        self._add("r", "1.7.0", "2.0.0", component="rofi")
+        self.migrator.current_version.update({"waybar": "0.9.0", "rofi": "1.7.0"})
+
+        with patch.object(self.migrator, "detect_installed_versions",
+                          return_value={"waybar": "0.10.4", "rofi": "2.0.0"}):
+            plans = self.migrator.check_for_updates()
+
+        self.assertEqual(sorted(r.id for plan in plans for r in plan.rules), ["r", "w"])
+
+
+class TestRuleScheduler(unittest.TestCase):
+    """Test DAG scheduling of plan steps"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.migrator = HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.a = self.test_dir / "a.conf"
+        self.b = self.test_dir / "b.conf"
+        self.a.write_text("x = 1\n")
+        self.b.write_text("y = 1\n")
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def _replace(self, path, old, new):
+        return {"type": "replace_text", "file": str(path), "replacements": [{"old": old, "new": new}]}
+
+    def _script(self, name, body):
+        (self.migrator.migrations_dir / name).write_text(body)
+        return {"type": "run_script", "script": name}
+
+    def test_disjoint_files_share_a_wave(self):
+        """Test that rules on different files are independent"""
+        rules = [make_rule("r1", [self._replace(self.a, "x", "z")]),
+                 make_rule("r2", [self._replace(self.b, "y", "z")])]
+        waves = self.migrator.schedule_waves(self.migrator.compile_rules(rules))
+        self.assertEqual(len(waves), 1)
+
+    def test_undeclared_script_orders_its_component(self):
+        """Test that scripts without outputs conflict with their component"""
+        rules = [make_rule("r1", [self._replace(self.a, "x", "z")]),
+                 make_rule("r2", [self._script("s.py", "pass\n")]),
+                 make_rule("r3", [self._replace(self.b, "y", "z")])]
+        waves = self.migrator.schedule_waves(self.migrator.compile_rules(rules))
+        self.assertEqual([[s.rule_ids for s in wave] for wave in waves],
+                         [[["r1"]], [["r2"]], [["r3"]]])
+
+        rules[1].outputs = [str(self.test_dir / "other.conf")]
+        waves = self.migrator.schedule_waves(self.migrator.compile_rules(rules))
+        self.assertEqual(len(waves), 1)
+
+    def test_declared_outputs_run_in_parallel(self):
+        """Test that independent slow rules overlap"""
+        rules = []
+        for i in range(3):
+            rule = make_rule(f"r{i}", [self._script(f"s{i}.py", "import time\ntime.sleep(0.4)\n")])
+            rule.outputs = [f"component:part{i}"]
+            rules.append(rule)
+
+        start = time.perf_counter()
+        results = self.migrator.run_scheduled_steps(self.migrator.compile_rules(rules), rules)
+        self.assertLess(time.perf_counter() - start, 1.1)
+        self.assertTrue(all(r['status'] == 'done' for r in results.values()))
+
+    def test_failure_skips_dependents(self):
+        """Test per-rule failure reporting"""
+        rules = [make_rule("bad", [self._script("bad.py", "raise SystemExit(1)\n")]),
+                 make_rule("after", [self._replace(self.a, "x", "z")])]
+        results = self.migrator.run_scheduled_steps(self.migrator.compile_rules(rules), rules)
+
+        self.assertEqual(results["bad"]['status'], "failed")
+        self.assertEqual(results["after"]['status'], "skipped")
+        self.assertEqual(self.a.read_text(), "x = 1\n")
+
+    def test_dry_run_changes_nothing(self):
+        """Test that a dry run only prints the schedule"""
+        rules = [make_rule("r1", [self._replace(self.a, "x", "z")])]
+        plan = hyprsupreme_migrate.MigrationPlan(
+            id="p", name="p", from_version="1.0.0", to_version="1.1.0", rules=rules,
+            estimated_time=30, backup_required=True, risk_level="low", changelog=[]
+        )
+        self.assertTrue(self.migrator.execute_migration(plan, dry_run=True))
+        self.assertEqual(self.a.read_text(), "x = 1\n")
+
+
+class TestMigrationJournal(unittest.TestCase):
+    """Test write-ahead journaling and journal rollback"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.migrator = HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.files = self.test_dir / "files"
+        self.files.mkdir()
+        (self.files / "edit.conf").write_text("gaps_in = 5\n")
+        (self.files / "move.conf").write_text("moved\n")
+        (self.files / "gone.conf").write_text("deleted\n")
+        (self.files / "gone.conf").chmod(0o640)
+        (self.files / "untouched.conf").write_text("same\n")
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def _plan(self):
+        rules = [
+            make_rule("edit", [{"type": "replace_text", "file": str(self.files / "edit.conf"),
+                                "replacements": [{"old": "gaps_in", "new": "gaps:inner"}]}]),
+            make_rule("move", [{"type": "move_file", "source": str(self.files / "move.conf"),
+                                "dest": str(self.files / "new" / "move.conf")}]),
+            make_rule("delete", [{"type": "delete_file", "file": str(self.files / "gone.conf")}]),
+        ]
+        return hyprsupreme_migrate.MigrationPlan(
+            id="journal-test", name="journal test", from_version="1.0.0", to_version="1.1.0",
+            rules=rules, estimated_time=90, backup_required=True, risk_level="medium", changelog=[]
+        )
+
+    def test_migration_journals_only_touched_files(self):
+        """Test that no archive is made and only mutated paths are journaled"""
+        self.assertTrue(self.migrator.execute_migration(self._plan()))
+
+        self.assertEqual(self.migrator.list_backups(), [])
+        with sqlite3.connect(self.migrator.db_path) as conn:
+            paths = {Path(row[0]).name for row in conn.execute("SELECT path FROM migration_journal")}
+        self.assertEqual(paths, {"edit.conf", "move.conf", "gone.conf"})
+        self.assertTrue(self.migrator.list_migrations()[0]['rollback_available'])
+
+    def test_rollback_replays_journal(self):
+        """Test that rollback restores originals and removes created files"""
+        self.assertTrue(self.migrator.execute_migration(self._plan()))
+        untouched_mtime = (self.files / "untouched.conf").stat().st_mtime_ns
+
+        self.assertTrue(self.migrator.rollback_migration("journal-test"))
+
+        self.assertEqual((self.files / "edit.conf").read_text(), "gaps_in = 5\n")
+        self.assertEqual((self.files / "move.conf").read_text(), "moved\n")
+        self.assertFalse((self.files / "new" / "move.conf").exists())
+        self.assertEqual((self.files / "gone.conf").read_text(), "deleted\n")
+        self.assertEqual((self.files / "gone.conf").stat().st_mode & 0o777, 0o640)
+        self.assertEqual((self.files / "untouched.conf").stat().st_mtime_ns, untouched_mtime)
+
+        # The journal is gone, so it cannot be replayed over later edits
+        (self.files / "edit.conf").write_text("gaps_in = 7\n")
+        self.assertFalse(self.migrator.rollback_migration("journal-test"))
+        self.assertEqual((self.files / "edit.conf").read_text(), "gaps_in = 7\n")
+        self.assertFalse(self.migrator.list_migrations()[0]['rollback_available'])
+
+    def test_commit_releases_older_journals(self):
+        """Test that a newer committed migration frees the previous journal's blobs"""
+        self.assertTrue(self.migrator.execute_migration(self._plan()))
+        (self.files / "edit.conf").write_text("gaps_in = 5\n")
+        second = self._plan()
+        second.id = "journal-second"
+        second.rules = second.rules[:1]
+        self.assertTrue(self.migrator.execute_migration(second))
+
+        with sqlite3.connect(self.migrator.db_path) as conn:
+            ids = {row[0] for row in conn.execute("SELECT migration_id FROM migration_journal")}
+        self.assertEqual(ids, {"journal-second"})
+        journal_store = self.migrator.retention_blob_stores()[1]
+        self.assertEqual(len(journal_store.live), 1)
+        history = {m['id']: m['rollback_available'] for m in self.migrator.list_migrations()}
+        self.assertEqual(history, {"journal-test": 0, "journal-second": 1})
+
+    def test_superseded_mixed_migration_cannot_roll_back(self):
+        """Test that an archive-backed migration loses its rollback once its journal is dropped"""
+        home = self.test_dir / "home"
+        (home / ".config" / "hypr").mkdir(parents=True)
+        (home / ".config" / "hypr" / "hyprland.conf").write_text("gaps_in = 5\n")
+        (self.migrator.migrations_dir / "noop.py").write_text("pass\n")
+
+        mixed = self._plan()
+        mixed.rules.append(make_rule("script", [{"type": "run_script", "script": "noop.py"}]))
+        with patch.dict(os.environ, {"HOME": str(home)}):
+            self.assertTrue(self.migrator.execute_migration(mixed))
+        self.assertIsNotNone(self.migrator.list_migrations()[0]['backup_id'])
+
+        (self.files / "move.conf").write_text("moved\n")
+        second = self._plan()
+        second.id = "journal-second"
+        second.rules = second.rules[1:2]
+        self.assertTrue(self.migrator.execute_migration(second))
+
+        history = {m['id']: m['rollback_available'] for m in self.migrator.list_migrations()}
+        self.assertEqual(history["journal-test"], 0)
+        with patch.dict(os.environ, {"HOME": str(home)}):
+            self.assertFalse(self.migrator.rollback_migration("journal-test"))
+        self.assertEqual((self.files / "edit.conf").read_text(), "gaps:inner = 5\n")
+
+
+class TestConditionSession(unittest.TestCase):
+    """Test cached condition evaluation"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.conf = self.test_dir / "hyprland.conf"
+        self.conf.write_text("$mod = SUPER\ngeneral {\n    gaps_in = 5 # inner\n}\ndecoration {\n"
+                             "    blur {\n        size = 3\n    }\n}\n")
+        self.json_conf = self.test_dir / "config.json"
+        self.json_conf.write_text('{"layer": "top", "clock": {"format": "{:%H:%M}"}}')
+        self.session = hyprsupreme_migrate.ConditionSession({"waybar": "0.10.0"})
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_condition_types(self):
+        """Test file_exists, version_gte, file_contains and config_key"""
+        evaluate = self.session.evaluate
+        self.assertTrue(evaluate(f"file_exists:{self.conf}"))
+        self.assertTrue(evaluate("version_gte:waybar:0.9.5"))
+        self.assertFalse(evaluate("version_gte:waybar:0.10.1"))
+        self.assertTrue(evaluate(f"file_contains:{self.conf}:$mod = SUPER"))
+        self.assertTrue(evaluate(f"config_key:{self.conf}:general:gaps_in=5"))
+        self.assertTrue(evaluate(f"config_key:{self.conf}:decoration:blur:size"))
+        self.assertFalse(evaluate(f"config_key:{self.conf}:general:gaps_out"))
+        self.assertTrue(evaluate(f"config_key:{self.json_conf}:clock:format={{:%H:%M}}"))
+        self.assertFalse(evaluate(f"file_contains:{self.test_dir / 'missing'}:x"))
+
+    def test_one_read_per_file(self):
+        """Test that conditions over the same file share one raw read and one parse"""
+        conditions = [f"file_contains:{self.conf}:gaps_in",
+                      f"config_key:{self.conf}:general:gaps_in",
+                      f"config_key:{self.conf}:decoration:blur:size=3"]
+        with patch.object(Path, "read_text", autospec=True, side_effect=Path.read_text) as reader:
+            self.assertTrue(self.session.check(conditions))
+            self.assertTrue(self.session.check(conditions))
+        self.assertEqual(reader.call_count, 1)
+
+    def test_config_key_follows_sources(self):
+        """Test that config_key sees sourced files and variables like feature detection does"""
+        (self.test_dir / "looks.conf").write_text("$radius = 10\ndecoration {\n    rounding = $radius\n}\n")
+        self.conf.write_text(self.conf.read_text() + "source = looks.conf\n")
+        self.assertTrue(self.session.evaluate(f"config_key:{self.conf}:decoration:rounding=10"))
+
+
+class TestDryRunPreview(unittest.TestCase):
+    """Test in-memory dry-run diffs"""
+
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.migrator = HyprSupremeMigrator(str(self.test_dir / "config"))
+        self.conf = self.test_dir / "hyprland.conf"
+        self.conf.write_text("gaps_in = 5\nborder_size = 2\n")
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_trimmed_diff_matches_difflib(self):
+        """Test hunk positions on a large file with one change"""
+        before = "".join(f"line {i}\n" for i in range(10000))
+        after = before.replace("line 5000\n", "changed\n")
+        expected = "".join(difflib.unified_diff(before.splitlines(True), after.splitlines(True), "a/f", "b/f"))
+        self.assertEqual(hyprsupreme_migrate.unified_diff(before, after, "f"), expected)
+
+    def test_preview_follows_moves_and_deletes(self):
+        """Test that later rewrites see earlier moves in the overlay"""
+        moved = self.test_dir / "moved.conf"
+        doomed = self.test_dir / "old.conf"
+        doomed.write_text("legacy\n")
+        rules = [
+            make_rule("move", [{"type": "move_file", "source": str(self.conf), "dest": str(moved)}]),
+            make_rule("edit", [{"type": "replace_text", "file": str(moved),
+                                "replacements": [{"old": "gaps_in", "new": "gaps:inner"}]}]),
+            make_rule("delete", [{"type": "delete_file", "file": str(doomed)}]),
+        ]
+
+        previews = {Path(p['file']).name: p for p in self.migrator.preview_steps(self.migrator.compile_rules(rules))}
+
+        self.assertEqual(previews["hyprland.conf"]['status'], "deleted")
+        self.assertEqual(previews["moved.conf"]['status'], "created")
+        self.assertIn("+gaps:inner = 5", previews["moved.conf"]['diff'])
+        self.assertEqual(previews["old.conf"]['lines_removed'], 1)
+        self.assertTrue(self.conf.exists())
+        self.assertFalse(moved.exists())
+
+    def test_size_cap_reports_deltas_only(self):
+        """Test that oversized files skip the diff"""
+        rule = make_rule("edit", [{"type": "replace_text", "file": str(self.conf),
+                                   "replacements": [{"old": "gaps_in", "new": "gaps:inner"}]}])
+        preview = self.migrator.preview_steps(self.migrator.compile_rules([rule]), size_cap=10)[0]
+        self.assertIsNone(preview['diff'])
+        self.assertEqual(preview['bytes_after'] - preview['bytes_before'], 3)
+        self.assertIn("diff skipped", preview['note'])
+
+    def test_parallel_diffs(self):
+        """Test that large batches diff in worker processes with the same result"""
+        files = []
+        for i in range(3):
+            path = self.test_dir / f"big{i}.conf"
+            path.write_text("".join(f"key_{j} = {j}\n" for j in range(20000)))
+            files.append(path)
+        rules = [make_rule(f"r{i}", [{"type": "replace_regex", "file": str(path),
+                                      "patterns": [{"pattern": r"^key_100 = ", "replacement": "renamed = "}]}])
+                 for i, path in enumerate(files)]
+        for rule in rules:
+            rule.actions[0]["patterns"][0]["pattern"] = r"(?m)^key_100 = "
+
+        previews = self.migrator.preview_steps(self.migrator.compile_rules(rules))
+        self.assertEqual(len(previews), 3)
+        self.assertTrue(all(p['lines_added'] == 1 and p['lines_removed'] == 1 for p in previews))
+
+    def test_dry_run_prints_diff(self):
+        """Test that execute_migration(dry_run=True) streams diffs without writing"""
+        rule = make_rule("edit", [{"type": "replace_text", "file": str(self.conf),
+                                   "replacements": [{"old": "border_size", "new": "general:border_size"}]}])
+        plan = hyprsupreme_migrate.MigrationPlan(
+            id="p", name="p", from_version="1.0.0", to_version="1.1.0", rules=[rule],
+            estimated_time=30, backup_required=True, risk_level="low", changelog=[]
+        )
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertTrue(self.migrator.execute_migration(plan, dry_run=True))
+
+        self.assertIn("+general:border_size = 2", output.getvalue())
+        self.assertIn("+1 -1", output.getvalue())
+        self.assertEqual(self.conf.read_text(), "gaps_in = 5\nborder_size = 2\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
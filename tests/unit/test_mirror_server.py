@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the local caching mirror
+"""
+
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+import ai_updater
+from mirror_server import MirrorStore, make_server, mirror_url, upstream_url
+
+
+class UpstreamServer:
+    """Stand-in for GitHub: release metadata and archives with ETags"""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.heads = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                upstream.requests.append((self.path, self.headers.get('If-None-Match')))
+                body = upstream.files.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{len(body)}-{hash(body) & 0xffff}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                upstream.heads.append(self.path)
+                body = upstream.files.get(self.path)
+                self.send_response(404 if body is None else 200)
+                if body is not None:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestMirror(unittest.TestCase):
+    """Test caching, revalidation and client routing"""
+
+    def setUp(self):
+        """Set up an upstream and a mirror in front of it"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.upstream = UpstreamServer()
+        self.upstream.files['/archive/v2.0.0.zip'] = b"PK" + b"x" * 100000
+        self.upstream.files['/copy/v2.0.0.zip'] = self.upstream.files['/archive/v2.0.0.zip']
+
+        self.store = MirrorStore(self.test_dir / "mirror", ttl=3600, allowed_hosts=['127.0.0.1'])
+        self.httpd = make_server(self.store, '127.0.0.1', 0)
+        self.mirror = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        """Clean up test environment"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.upstream.stop()
+        shutil.rmtree(self.test_dir)
+
+    def fetch(self, path: str, **kwargs) -> requests.Response:
+        return requests.get(mirror_url(self.upstream.url + path, self.mirror), timeout=10, **kwargs)
+
+    def test_url_mapping(self):
+        """Test that mirror paths map back to the upstream URL"""
+        mirrored = mirror_url("https://api.github.com/repos/x/releases?per_page=5", "http://m:8765/")
+        self.assertEqual(mirrored, "http://m:8765/https/api.github.com/repos/x/releases?per_page=5")
+        self.assertEqual(mirror_url(mirrored, "http://m:8765"), mirrored)
+        self.assertEqual(upstream_url(mirrored[len("http://m:8765"):]),
+                         "https://api.github.com/repos/x/releases?per_page=5")
+        self.assertEqual(mirror_url("https://x.invalid/a", None), "https://x.invalid/a")
+
+    def test_many_clients_one_upstream_fetch(self):
+        """Test that concurrent clients share one upstream download"""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.fetch('/archive/v2.0.0.zip')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(r.content == self.upstream.files['/archive/v2.0.0.zip'] for r in results))
+        self.assertEqual(len(self.upstream.requests), 1)
+        self.assertEqual(sorted(r.headers['X-Mirror-Cache'] for r in results), ['fetched'] + ['hit'] * 7)
+
+        etag = results[0].headers['ETag']
+        self.assertEqual(self.fetch('/archive/v2.0.0.zip', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_content_addressed(self):
+        """Test that identical bodies from different URLs are stored once"""
+        self.fetch('/archive/v2.0.0.zip')
+        self.fetch('/copy/v2.0.0.zip')
+        usage = self.store.usage()
+        self.assertEqual((usage['entries'], usage['objects']), (2, 1))
+        self.assertEqual(len(list((self.store.objects).glob("*/*"))), 1)
+
+    def test_revalidation_and_stale(self):
+        """Test conditional revalidation and serving stale data when upstream is down"""
+        self.fetch('/archive/v2.0.0.zip')
+        self.store.ttl = 0
+
+        response = self.fetch('/archive/v2.0.0.zip')
+        self.assertEqual(response.headers['X-Mirror-Cache'], 'revalidated')
+        self.assertIsNotNone(self.upstream.requests[-1][1])
+
+        self.upstream.stop()
+        response = self.fetch('/archive/v2.0.0.zip')
+        self.assertEqual(response.headers['X-Mirror-Cache'], 'stale')
+        self.assertEqual(response.content, self.upstream.files['/archive/v2.0.0.zip'])
+        self.assertEqual(self.fetch('/archive/missing.zip').status_code, 502)
+
+    def test_head_uses_cached_metadata(self):
+        """Test that HEAD never downloads a body"""
+        url = mirror_url(self.upstream.url + '/archive/v2.0.0.zip', self.mirror)
+        response = requests.head(url, timeout=10)
+        self.assertEqual((response.status_code, response.headers['X-Mirror-Cache']), (200, 'miss'))
+        self.assertEqual((self.upstream.requests, self.upstream.heads), ([], ['/archive/v2.0.0.zip']))
+
+        etag = self.fetch('/archive/v2.0.0.zip').headers['ETag']
+        response = requests.head(url, timeout=10)
+        self.assertEqual(response.headers['X-Mirror-Cache'], 'cached')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(self.upstream.requests), 1)
+        self.assertEqual(len(self.upstream.heads), 1)
+
+    def test_refetch_keeps_open_body_readable(self):
+        """Test that a reader keeps its body when a refetch drops the old object"""
+        url = self.upstream.url + '/archive/v2.0.0.zip'
+        old = self.upstream.files['/archive/v2.0.0.zip']
+        entry, _, body = self.store.open(url)
+        with body:
+            self.upstream.files['/archive/v2.0.0.zip'] = b"PK" + b"y" * 100
+            self.store.ttl = 0
+            new_entry, how, new_body = self.store.open(url)
+            new_body.close()
+            self.assertEqual(how, 'fetched')
+            self.assertNotEqual(new_entry.sha256, entry.sha256)
+            self.assertFalse(self.store.object_path(entry.sha256).exists())
+            self.assertEqual(body.read(), old)
+
+    def test_disallowed_host(self):
+        """Test that the mirror is not an open proxy"""
+        response = requests.get(f"{self.mirror}/https/example.com/", timeout=10)
+        self.assertEqual(response.status_code, 403)
+
+    def test_updater_through_mirror(self):
+        """Test that release checks and archive URLs go through the mirror"""
+        self.upstream.files['/repos/test/releases'] = json.dumps([{
+            'tag_name': 'v2.0.0', 'published_at': '2025-01-01T00:00:00Z', 'body': '',
+            'zipball_url': f"{self.upstream.url}/archive/v2.0.0.zip"
+        }]).encode()
+        engine = ai_updater.AIUpdateEngine(str(self.test_dir / "config"))
+        engine.current_version = "1.0.0"
+        engine.update_sources['github']['api_url'] = f"{self.upstream.url}/repos/test"
+        engine.update_sources['github'].pop('upstream_api_url')
+        engine.use_mirror(self.mirror)
+
+        updates = engine._check_github_updates()
+        self.assertTrue(updates[0].download_url.startswith(self.mirror + "/http/127.0.0.1"))
+        self.assertEqual(self.store.usage()['entries'], 1)
+
+        engine.use_mirror(None)
+        self.assertEqual(engine.update_sources['github']['api_url'], f"{self.upstream.url}/repos/test")
+
+
+if __name__ == '__main__':
+    unittest.main()
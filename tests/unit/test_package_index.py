@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the installed package index
+"""
+
+import sys
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from package_index import PackageIndex, PrefixTrie, read_dpkg_status, read_pacman_local
+
+DPKG_STATUS = """\
+Package: git
+Status: install ok installed
+Version: 1:2.39.2-1
+
+Package: obs-studio:amd64
+Status: install ok installed
+
+Package: steam
+Status: deinstall ok config-files
+
+Package: Vim
+Status: install ok installed"""
+
+
+class TestDatabaseReaders(unittest.TestCase):
+    """Test reading package databases without the package manager"""
+
+    def setUp(self):
+        """Set up fake pacman and dpkg databases"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.local = self.test_dir / "local"
+        for entry in ("lib32-gamemode-1.8.1-1", "xdg-desktop-portal-hyprland-1.3.1-2", "steam-1.0.0.79-1"):
+            (self.local / entry).mkdir(parents=True)
+        (self.local / "ALPM_DB_VERSION").write_text("9\n")
+        self.status = self.test_dir / "status"
+        self.status.write_text(DPKG_STATUS)
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_pacman_local(self):
+        """Test that version and release are split off directory names"""
+        self.assertEqual(read_pacman_local(self.local),
+                         {"lib32-gamemode", "xdg-desktop-portal-hyprland", "steam"})
+
+    def test_dpkg_status(self):
+        """Test that only installed packages are kept and names are normalized"""
+        self.assertEqual(read_dpkg_status(self.status), {"git", "obs-studio", "vim"})
+
+    def test_load_prefers_pacman(self):
+        """Test database selection order"""
+        index = PackageIndex.load(self.local, self.status)
+        self.assertEqual(index.source, "pacman")
+        index = PackageIndex.load(self.test_dir / "missing", self.status)
+        self.assertEqual(index.source, "dpkg")
+
+
+class TestPackageMatching(unittest.TestCase):
+    """Test exact and prefix matches"""
+
+    def setUp(self):
+        """Set up a small index"""
+        self.index = PackageIndex(["obs-studio", "lib32-gamemode", "git", "git-lfs", "Code"])
+
+    def test_matches(self):
+        """Test exact names, prefixes and '-' components"""
+        self.assertIn("code", self.index)
+        for app in ("git", "obs", "gamemode", "CODE"):
+            self.assertTrue(self.index.matches(app), app)
+        for app in ("steam", "studio-x", "lfs-git"):
+            self.assertFalse(self.index.matches(app), app)
+
+    def test_find(self):
+        """Test that every name reachable by a prefix is returned once"""
+        self.assertEqual(self.index.find("git"), ["git", "git-lfs"])
+        self.assertEqual(self.index.find("lfs"), ["git-lfs"])
+        self.assertEqual(PrefixTrie(["a", "ab"]).with_prefix("a"), ["a", "ab"])
+
+
+if __name__ == '__main__':
+    unittest.main()
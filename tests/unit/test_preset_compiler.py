@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the preset compiler
+"""
+
+import re
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from preset_compiler import PresetCompiler, PresetError, parse_preset, shell_assignments
+
+REPO_PRESETS = Path(__file__).parent.parent.parent / "presets"
+INSTALL_SCRIPT = Path(__file__).parent.parent.parent / "install.sh"
+
+
+def install_case_labels(function: str) -> set:
+    """Return the quoted case labels handled by one install.sh function"""
+    body = re.search(rf"^{function}\(\) {{\n(.*?)^}}", INSTALL_SCRIPT.read_text(), re.M | re.S).group(1)
+    return set(re.findall(r'^\s+"([\w-]+)"\)', body, re.M))
+
+
+class TestPresetParser(unittest.TestCase):
+    """Test parsing of single preset files"""
+
+    def test_repo_presets_compile(self):
+        """Test that every shipped preset compiles, including YAML-style lists"""
+        cache = Path(tempfile.mkdtemp())
+        try:
+            presets = PresetCompiler(REPO_PRESETS, cache).load_all()
+            self.assertEqual(set(presets), {p.stem for p in REPO_PRESETS.glob("*.preset")})
+            gaming = presets["gaming"]
+            self.assertEqual(gaming["configs"], ["jakoolit", "ml4w"])
+            self.assertEqual(gaming["components"][:4], ["hyprland", "waybar", "rofi", "warp"])
+            self.assertIn("scripts", gaming["components"])
+            self.assertEqual(gaming["settings"]["vrr"], "2")
+            self.assertEqual(gaming["title"], "Gaming")
+        finally:
+            shutil.rmtree(cache)
+
+    def test_repo_presets_match_installer(self):
+        """Test that every compiled config and component is one install.sh handles"""
+        cache = Path(tempfile.mkdtemp())
+        try:
+            presets = PresetCompiler(REPO_PRESETS, cache).load_all()
+            components = install_case_labels("install_components")
+            configs = install_case_labels("download_configs")
+            for name, preset in presets.items():
+                with self.subTest(preset=name):
+                    self.assertLessEqual(set(preset["components"]), components)
+                    self.assertLessEqual(set(preset["configs"]), configs)
+        finally:
+            shutil.rmtree(cache)
+
+    def test_syntax_errors(self):
+        """Test that malformed presets are rejected with a location"""
+        with self.assertRaisesRegex(PresetError, "<preset>:1"):
+            parse_preset("configs=(\n  \"a\"\n")
+        with self.assertRaisesRegex(PresetError, "must be a list"):
+            parse_preset('features="blur"\n')
+        with self.assertRaisesRegex(PresetError, "invalid"):
+            parse_preset('configs=("a;rm")\n')
+
+    def test_inline_comments_and_quotes(self):
+        """Test that comments are stripped outside quotes only"""
+        parsed = parse_preset('theme="a#b"  # comment\nfeatures=("x" "y")\n')
+        self.assertEqual(parsed["settings"]["theme"], "a#b")
+        self.assertEqual(parsed["assign"]["features"], ["x", "y"])
+
+
+class TestPresetInheritance(unittest.TestCase):
+    """Test layering and caching"""
+
+    def setUp(self):
+        """Set up a presets directory with a small hierarchy"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.presets = self.test_dir / "presets"
+        self.presets.mkdir()
+        (self.presets / "base.preset").write_text(
+            'configs=(\n    "jakoolit"\n)\n'
+            'features=("animations" "blur")\n'
+            'corner_radius="8"\n'
+        )
+        (self.presets / "child.preset").write_text(
+            '# HyprSupreme-Builder Preset: Child\n# A layered preset\n\n'
+            'inherits="base"\n'
+            'features+=("performance")\n'
+            'configs=("ml4w")\n'
+            'corner_radius="0"\n'
+        )
+        self.compiler = PresetCompiler(self.presets, self.test_dir / "cache")
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def test_flattening(self):
+        """Test that '=' replaces, '+=' appends and settings override"""
+        child = self.compiler.load("child")
+        self.assertEqual(child["configs"], ["ml4w"])
+        self.assertEqual(child["features"], ["animations", "blur", "performance"])
+        self.assertEqual(child["settings"]["corner_radius"], "0")
+        self.assertEqual(child["description"], "A layered preset")
+        self.assertIn('SELECTED_FEATURES=\'"animations" "blur" "performance"\'', shell_assignments(child))
+
+    def test_cache_keyed_on_source_hash(self):
+        """Test that editing a parent invalidates the child's artifact"""
+        self.compiler.load("child")
+        artifact = json.loads(self.compiler.artifact_path("child").read_text())
+        self.assertEqual(len(artifact["sources"]), 2)
+
+        (self.presets / "base.preset").write_text('features=("shadows")\n')
+        self.assertEqual(self.compiler.load("child")["features"], ["shadows", "performance"])
+
+    def test_cycles_and_missing_parents(self):
+        """Test that broken hierarchies are reported"""
+        (self.presets / "base.preset").write_text('inherits="child"\n')
+        with self.assertRaisesRegex(PresetError, "cycle"):
+            self.compiler.load("child")
+        (self.presets / "base.preset").write_text('inherits="nowhere"\n')
+        with self.assertRaisesRegex(PresetError, "not found"):
+            self.compiler.load("child")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the HyprSupreme retention engine
+"""
+
+import os
+import sys
+import time
+import unittest
+import tempfile
+import shutil
+import importlib.util
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from retention import (RetentionPolicy, RetentionItem, BlobStore, select_retained,
+                       collect_garbage, find_orphans)
+
+spec = importlib.util.spec_from_file_location("hyprsupreme_cloud", TOOLS_DIR / "hyprsupreme-cloud.py")
+hyprsupreme_cloud = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(hyprsupreme_cloud)
+
+
+def make_items(hours, size=1024):
+    """One item per entry in ``hours``, each that many hours old"""
+    now = datetime(2024, 6, 15, 12, 0)
+    return [
+        RetentionItem(id=f"b{h}", store="test", created_at=now - timedelta(hours=h), size=size)
+        for h in hours
+    ]
+
+
+class TestSelectRetained(unittest.TestCase):
+    """Test retention policy selection"""
+
+    def test_keep_last(self):
+        """Test that keep_last keeps the newest N"""
+        items = make_items(range(10))
+        keep, prune = select_retained(items, RetentionPolicy(keep_last=3, keep_daily=0, keep_weekly=0))
+        self.assertEqual([i.id for i in keep], ["b0", "b1", "b2"])
+        self.assertEqual(len(prune), 7)
+
+    def test_daily_thinning(self):
+        """Test that one snapshot per day is kept for N days"""
+        # Four snapshots a day for five days
+        items = make_items([d * 24 + h for d in range(5) for h in (0, 3, 6, 9)])
+        policy = RetentionPolicy(keep_last=1, keep_daily=3, keep_weekly=0)
+        keep, _ = select_retained(items, policy)
+        self.assertEqual(len({i.created_at.date() for i in keep}), 3)
+        self.assertEqual(len(keep), 3)
+
+    def test_size_quota_never_drops_newest_or_pinned(self):
+        """Test size quota enforcement"""
+        items = make_items(range(6), size=1024 * 1024)
+        items[-1].pinned = True
+        policy = RetentionPolicy(keep_last=6, keep_daily=0, keep_weekly=0, max_total_mb=2)
+        keep, _ = select_retained(items, policy)
+        self.assertEqual({i.id for i in keep}, {"b0", "b5"})
+
+    def test_unbounded_policy_keeps_everything(self):
+        """Test that an all-zero policy prunes nothing"""
+        policy = RetentionPolicy(keep_last=0, keep_daily=0, keep_weekly=0)
+        keep, prune = select_retained(make_items(range(4)), policy)
+        self.assertEqual(len(keep), 4)
+        self.assertEqual(prune, [])
+
+
+class TestOrphanSweep(unittest.TestCase):
+    """Test mark-and-sweep over blob directories"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_only_old_unreferenced_blobs_are_orphans(self):
+        """Test grace period and live set"""
+        old = time.time() - 7200
+        for name in ("live", "dead", "fresh"):
+            (self.test_dir / name).write_bytes(b"x" * 10)
+        os.utime(self.test_dir / "live", (old, old))
+        os.utime(self.test_dir / "dead", (old, old))
+
+        orphans = find_orphans(BlobStore(self.test_dir, {"live"}), grace_hours=1)
+        self.assertEqual([p.name for p, _ in orphans], ["dead"])
+
+
+class TestCloudGarbageCollection(unittest.TestCase):
+    """Test retention against cloud auto-backups"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.env_patch = patch.dict(os.environ, {"HOME": str(self.test_dir / "home")})
+        self.env_patch.start()
+        self.cloud = hyprsupreme_cloud.HyprSupremeCloud(str(self.test_dir / "cloud"))
+
+        now = datetime.now()
+        for i in range(6):
+            archive = self.cloud.cache_dir / f"auto{i}.tar.gz"
+            archive.write_bytes(b"x" * 100)
+            self._save(f"auto{i}", f"Auto-backup-{i}", now - timedelta(days=i), str(archive))
+        self._save("named", "My Rice", now - timedelta(days=30), "")
+
+    def tearDown(self):
+        self.env_patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _save(self, profile_id, name, created_at, local_path):
+        profile = hyprsupreme_cloud.ConfigProfile(
+            id=profile_id, name=name, description="", author="tester", version="1.0.0",
+            created_at=created_at.isoformat(), updated_at=created_at.isoformat(),
+            tags=[], components=[], features=[], preset="custom", checksum="", size=100
+        )
+        self.cloud.save_profile_to_db(profile, local_path)
+
+    def test_dry_run_changes_nothing(self):
+        """Test that a dry run only reports"""
+        policy = RetentionPolicy(keep_last=2, keep_daily=0, keep_weekly=0)
+        report = collect_garbage([self.cloud], policy, dry_run=True)
+        self.assertEqual(len(report.pruned), 4)
+        self.assertEqual(len(self.cloud.list_local_profiles()), 7)
+
+    def test_prunes_auto_backups_only(self):
+        """Test that named profiles are never pruned by default"""
+        policy = RetentionPolicy(keep_last=2, keep_daily=0, keep_weekly=0)
+        report = collect_garbage([self.cloud], policy)
+
+        remaining = {p['id'] for p in self.cloud.list_local_profiles()}
+        self.assertEqual(remaining, {"auto0", "auto1", "named"})
+        self.assertEqual(len(report.pruned), 4)
+        self.assertEqual(sorted(p.name for p in self.cloud.cache_dir.iterdir()), ["auto0.tar.gz", "auto1.tar.gz"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Unit tests for declarative recommendation rules
+"""
+
+import sys
+import json
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / "tools"
+sys.path.insert(0, str(TOOLS_DIR))
+
+from rule_engine import RULES_DIR, DecisionIndex, Rule, RuleError, load_rule_files, profile_features
+
+
+def make_profile(**overrides) -> SimpleNamespace:
+    profile = dict(cpu_cores=4, ram_gb=16.0, gpu_info=["Intel UHD 620"], display_count=1,
+                   usage_pattern="general")
+    profile.update(overrides)
+    return SimpleNamespace(**profile)
+
+
+class TestRuleFiles(unittest.TestCase):
+    """Test loading and validating rule files"""
+
+    def setUp(self):
+        """Set up a private rules directory"""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.test_dir)
+
+    def write_rules(self, name: str, rules: list, **header):
+        (self.test_dir / name).write_text(json.dumps(dict(header, rules=rules)))
+
+    def test_shipped_rules_load(self):
+        """Test that the bundled rules compile"""
+        names = [rule.name for rule in load_rule_files([RULES_DIR])]
+        self.assertIn("nvidia_optimization", names)
+        self.assertIn("multimedia_setup", names)
+
+    def test_shipped_rules_are_package_data(self):
+        """Test that the bundled rules live inside the tools package"""
+        self.assertEqual(RULES_DIR.parent, TOOLS_DIR)
+        self.assertTrue(any(RULES_DIR.glob("*.json")))
+
+    def test_override_keeps_position(self):
+        """Test that a later rule with the same name replaces the earlier one"""
+        self.write_rules("10-base.json", [{"name": "a", "recommend": []}, {"name": "b", "recommend": []}])
+        self.write_rules("20-user.json", [{"name": "a", "when": {"displays": "multi"}, "recommend": []}],
+                         impact="high")
+        rules = load_rule_files([self.test_dir])
+        self.assertEqual([rule.name for rule in rules], ["a", "b"])
+        self.assertEqual(rules[0].impact, "high")
+        self.assertEqual(rules[0].when, {"displays": frozenset({"multi"})})
+
+    def test_invalid_rules(self):
+        """Test that unknown features and values are rejected"""
+        self.write_rules("bad.json", [{"name": "x", "when": {"ram_tier": ["huge"]}}])
+        with self.assertRaisesRegex(RuleError, "invalid ram_tier"):
+            load_rule_files([self.test_dir])
+        self.write_rules("bad.json", [{"name": "x", "when": {"colour": ["red"]}}])
+        with self.assertRaisesRegex(RuleError, "unknown feature"):
+            load_rule_files([self.test_dir])
+
+
+class TestDecisionIndex(unittest.TestCase):
+    """Test indexed matching"""
+
+    def setUp(self):
+        """Set up the shipped rules"""
+        self.index = DecisionIndex.from_paths([RULES_DIR])
+
+    def names(self, **profile) -> list:
+        return [rule.name for rule in self.index.match(profile_features(make_profile(**profile)))]
+
+    def test_matches_profile(self):
+        """Test that only rules whose conditions hold are returned"""
+        self.assertEqual(self.names(), [])
+        self.assertEqual(self.names(ram_gb=4.0, display_count=2, usage_pattern="multimedia"),
+                         ["low_ram", "multi_monitor", "multimedia_setup"])
+        self.assertEqual(self.names(usage_pattern="gaming"), [])
+        self.assertEqual(self.names(usage_pattern="gaming", cpu_cores=16,
+                                    gpu_info=["Intel UHD 620", "NVIDIA GeForce RTX 3070"]),
+                         ["high_performance", "nvidia_optimization"])
+
+    def test_only_relevant_rules_are_visited(self):
+        """Test that rules for other feature values are never candidates"""
+        features = profile_features(make_profile(usage_pattern="development"))
+        self.assertEqual([rule.name for rule in self.index.candidates(features)], ["development_setup"])
+
+    def test_multi_valued_feature_matches_once(self):
+        """Test that a rule filed under two of the profile's values is returned once"""
+        index = DecisionIndex([Rule("discrete", "test", "low", {"gpu_vendor": frozenset({"nvidia", "amd"})}, [])])
+        features = profile_features(make_profile(gpu_info=["NVIDIA GeForce", "AMD Radeon"]))
+        self.assertEqual(len(index.candidates(features)), 2)
+        self.assertEqual([rule.name for rule in index.match(features)], ["discrete"])
+
+
+if __name__ == '__main__':
+    unittest.main()
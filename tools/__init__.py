@@ -11,6 +11,17 @@ __all__ = [
     "hyprsupreme_community",
     "hyprsupreme_migrate", 
     "hyprsupreme_cloud",
-    "ai_assistant"
+    "ai_assistant",
+    "config_merge",
+    "retention",
+    "backup_index",
+    "backup_scrub",
+    "preset_compiler",
+    "delta_update",
+    "package_index",
+    "hypr_config",
+    "rule_engine",
+    "mirror_server",
+    "git_update"
 ]
 
@@ -15,8 +15,32 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 
+sys.path.append(str(Path(__file__).parent))
+from config_merge import atomic_write
+from package_index import PackageIndex
+from hypr_config import load_config
+from rule_engine import RULES_DIR, DecisionIndex, RuleError, profile_features
+
+# Bump when a probe changes so cached profiles are discarded
+PROFILE_CACHE_VERSION = 1
+
+# Package databases whose modification marks installed software as changed
+PACKAGE_DATABASES = ['/var/lib/pacman/local', '/var/lib/dpkg/status', '/var/lib/rpm']
+
+DRM_DIR = Path('/sys/class/drm')
+
+# Used for any field whose probe fails
+PROFILE_DEFAULTS = {
+    'cpu_cores': 4, 'cpu_freq': 2000.0, 'ram_gb': 8.0,
+    'gpu_info': ["unknown"], 'display_resolution': "1920x1080",
+    'display_count': 1, 'desktop_environment': "unknown",
+    'kernel_version': "unknown", 'distro': "unknown",
+    'usage_pattern': "general"
+}
+
 @dataclass
 class SystemProfile:
     """System hardware and software profile"""
@@ -42,6 +66,72 @@ class ConfigRecommendation:
     impact: str  # low, medium, high
     reversible: bool
 
+def _stat_key(path) -> str:
+    """Cheap change marker of a file or directory"""
+    try:
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+    except OSError:
+        return "missing"
+
+
+def _read_text(path) -> str:
+    try:
+        with open(path, 'r', errors='replace') as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _cpu_key() -> str:
+    """Hash of /proc/cpuinfo without the constantly changing clock lines"""
+    lines = [line for line in _read_text('/proc/cpuinfo').splitlines() if not line.startswith('cpu MHz')]
+    return hashlib.sha256('\n'.join(lines).encode()).hexdigest()
+
+
+def _memory_key() -> str:
+    for line in _read_text('/proc/meminfo').splitlines():
+        if line.startswith('MemTotal:'):
+            return line
+    return "unknown"
+
+
+def _drm_entries() -> List[str]:
+    try:
+        return sorted(os.listdir(DRM_DIR))
+    except OSError:
+        return []
+
+
+def _gpu_key() -> str:
+    """GPUs present according to /sys/class/drm, plus the running kernel"""
+    parts = [platform.release()]
+    for name in _drm_entries():
+        if name.startswith('card') and '-' not in name:
+            device = DRM_DIR / name / 'device'
+            parts.append(f"{name}:{_read_text(device / 'vendor')}:{_read_text(device / 'device')}")
+    return '|'.join(parts)
+
+
+def _display_key() -> str:
+    """Connector state according to /sys/class/drm, plus the session"""
+    parts = [os.environ.get('WAYLAND_DISPLAY', ''), os.environ.get('DISPLAY', '')]
+    for name in _drm_entries():
+        if name.startswith('card') and '-' in name:
+            modes = _read_text(DRM_DIR / name / 'modes').split('\n')[0]
+            parts.append(f"{name}:{_read_text(DRM_DIR / name / 'status')}:{modes}")
+    return '|'.join(parts)
+
+
+def _system_key() -> str:
+    return '|'.join([platform.release(), _stat_key('/etc/os-release'),
+                     os.environ.get('XDG_CURRENT_DESKTOP', 'unknown')])
+
+
+def _packages_key() -> str:
+    return '|'.join(_stat_key(path) for path in PACKAGE_DATABASES)
+
+
 class AIAssistant:
     def __init__(self):
         self.config_dir = Path.home() / ".config" / "hyprsupreme"
@@ -52,51 +142,93 @@ class AIAssistant:
         self.user_preferences = self._load_user_preferences()
         self.knowledge_base = self._load_knowledge_base()
         
-    def _analyze_system(self) -> SystemProfile:
-        """Analyze system hardware and software configuration"""
-        try:
-            # CPU information
-            cpu_cores = psutil.cpu_count(logical=False)
-            cpu_freq = psutil.cpu_freq().max if psutil.cpu_freq() else 0.0
-            
-            # Memory information
-            ram_gb = psutil.virtual_memory().total / (1024**3)
-            
-            # GPU information
-            gpu_info = self._detect_gpu()
-            
-            # Display information
-            display_info = self._detect_displays()
-            
-            # System information
-            distro = self._detect_distro()
-            kernel = platform.release()
-            de = os.environ.get('XDG_CURRENT_DESKTOP', 'unknown')
-            
-            # Usage pattern detection
-            usage_pattern = self._detect_usage_pattern()
+    def _profile_probes(self) -> Dict[str, Tuple[Any, Any]]:
+        """Profile field groups as (invalidation key, probe) pairs
+        
+        Keys are cheap reads of /proc, /sys and package database metadata;
+        a probe only runs when its key differs from the cached one.
+        """
+        return {
+            'cpu': (_cpu_key, lambda: {
+                'cpu_cores': psutil.cpu_count(logical=False),
+                'cpu_freq': psutil.cpu_freq().max if psutil.cpu_freq() else 0.0
+            }),
+            'memory': (_memory_key, lambda: {
+                'ram_gb': psutil.virtual_memory().total / (1024**3)
+            }),
+            'gpu': (_gpu_key, lambda: {
+                'gpu_info': self._detect_gpu()
+            }),
+            'displays': (_display_key, self._probe_displays),
+            'system': (_system_key, lambda: {
+                'desktop_environment': os.environ.get('XDG_CURRENT_DESKTOP', 'unknown'),
+                'kernel_version': platform.release(),
+                'distro': self._detect_distro()
+            }),
+            'usage': (_packages_key, lambda: {
+                'usage_pattern': self._detect_usage_pattern()
+            }),
+        }
+    
+    def _analyze_system(self, use_cache: bool = True) -> SystemProfile:
+        """Analyze system hardware and software configuration
+        
+        The profile is cached in ai_cache/system_profile.json per field
+        group. Only groups whose invalidation key changed are re-probed,
+        in parallel since most probes wait on external commands.
+        """
+        cache_file = self.ai_cache_dir / "system_profile.json"
+        cached = {}
+        if use_cache:
+            try:
+                data = json.loads(cache_file.read_text())
+                if data.get('version') == PROFILE_CACHE_VERSION:
+                    cached = data.get('groups', {})
+            except (OSError, ValueError):
+                pass
+        
+        values = dict(PROFILE_DEFAULTS)
+        groups = {}
+        stale = []
+        for group, (key_func, probe) in self._profile_probes().items():
+            try:
+                key = key_func()
+            except Exception:
+                key = None
+            entry = cached.get(group)
+            if key is not None and entry and entry.get('key') == key:
+                values.update(entry['values'])
+                groups[group] = entry
+            else:
+                stale.append((group, key, probe))
+        
+        if stale:
+            with ThreadPoolExecutor(max_workers=len(stale)) as executor:
+                results = list(executor.map(self._run_probe, [(group, probe) for group, _, probe in stale]))
+            for (group, key, _), result in zip(stale, results):
+                if result is None:
+                    continue  # keep defaults, probe again next time
+                values.update(result)
+                if key is not None:
+                    groups[group] = {'key': key, 'values': result, 'probed_at': datetime.now().isoformat()}
             
-            return SystemProfile(
-                cpu_cores=cpu_cores,
-                cpu_freq=cpu_freq,
-                ram_gb=ram_gb,
-                gpu_info=gpu_info,
-                display_resolution=display_info['resolution'],
-                display_count=display_info['count'],
-                desktop_environment=de,
-                kernel_version=kernel,
-                distro=distro,
-                usage_pattern=usage_pattern
-            )
+            try:
+                atomic_write(cache_file, json.dumps(
+                    {'version': PROFILE_CACHE_VERSION, 'groups': groups}, indent=2
+                ).encode())
+            except OSError as e:
+                print(f"Warning: Could not cache system profile: {e}")
+        
+        return SystemProfile(**values)
+    
+    @staticmethod
+    def _run_probe(job) -> Optional[Dict[str, Any]]:
+        group, probe = job
+        try:
+            return probe()
         except Exception as e:
-            print(f"Warning: Could not fully analyze system: {e}")
-            return SystemProfile(
-                cpu_cores=4, cpu_freq=2000.0, ram_gb=8.0,
-                gpu_info=["unknown"], display_resolution="1920x1080",
-                display_count=1, desktop_environment="unknown",
-                kernel_version="unknown", distro="unknown",
-                usage_pattern="general"
-            )
+            print(f"Warning: Could not fully analyze system ({group}): {e}")
+            return None
     
     def _detect_gpu(self) -> List[str]:
         """Detect GPU information"""
@@ -127,6 +259,10 @@ class AIAssistant:
             
         return gpu_info if gpu_info else ["unknown"]
     
+    def _probe_displays(self) -> Dict[str, Any]:
+        info = self._detect_displays()
+        return {'display_count': info['count'], 'display_resolution': info['resolution']}
+    
     def _detect_displays(self) -> Dict[str, Any]:
         """Detect display configuration"""
         try:
@@ -173,24 +309,11 @@ class AIAssistant:
             'productivity': ['libreoffice', 'firefox', 'thunderbird']
         }
         
-        installed_apps = []
-        try:
-            # Check common package managers
-            for cmd in [['pacman', '-Q'], ['dpkg', '-l'], ['rpm', '-qa']]:
-                try:
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode == 0:
-                        installed_apps.extend(result.stdout.lower().split())
-                        break
-                except FileNotFoundError:
-                    continue
-        except Exception:
-            pass
+        installed = PackageIndex.load()
         
         pattern_scores = {}
         for pattern, apps in patterns.items():
-            score = sum(1 for app in apps if any(app in installed for installed in installed_apps))
-            pattern_scores[pattern] = score
+            pattern_scores[pattern] = sum(1 for app in apps if installed.matches(app))
         
         if pattern_scores:
             return max(pattern_scores, key=pattern_scores.get)
@@ -213,94 +336,33 @@ class AIAssistant:
             'customization_level': 'moderate'
         }
     
-    def _load_knowledge_base(self) -> Dict:
-        """Load AI knowledge base for configuration recommendations"""
-        return {
-            'performance_rules': {
-                'low_ram': {
-                    'condition': lambda profile: profile.ram_gb < 8,
-                    'recommendations': [
-                        ('animations', 'enabled', 'false', 'Reduce memory usage', 0.9),
-                        ('decoration', 'blur', 'false', 'Improve performance', 0.8),
-                        ('misc', 'vfr', 'true', 'Variable refresh rate saves resources', 0.7)
-                    ]
-                },
-                'high_performance': {
-                    'condition': lambda profile: 'gaming' in profile.usage_pattern and profile.cpu_cores >= 8,
-                    'recommendations': [
-                        ('general', 'gaps_in', '2', 'Minimal gaps for gaming', 0.8),
-                        ('decoration', 'drop_shadow', 'false', 'Reduce visual overhead', 0.7),
-                        ('misc', 'vrr', '1', 'Enable variable refresh rate', 0.9)
-                    ]
-                },
-                'nvidia_optimization': {
-                    'condition': lambda profile: any('nvidia' in gpu.lower() for gpu in profile.gpu_info),
-                    'recommendations': [
-                        ('env', 'LIBVA_DRIVER_NAME', 'nvidia', 'NVIDIA VA-API driver', 0.9),
-                        ('env', 'XDG_SESSION_TYPE', 'wayland', 'Wayland for NVIDIA', 0.7),
-                        ('env', 'GBM_BACKEND', 'nvidia-drm', 'NVIDIA GBM backend', 0.8)
-                    ]
-                },
-                'multi_monitor': {
-                    'condition': lambda profile: profile.display_count > 1,
-                    'recommendations': [
-                        ('monitor', 'workspace', 'auto', 'Automatic workspace assignment', 0.8),
-                        ('general', 'gaps_workspaces', '50', 'Gaps between workspaces', 0.6),
-                        ('misc', 'focus_on_activate', 'true', 'Focus follows activation', 0.7)
-                    ]
-                }
-            },
-            'aesthetic_rules': {
-                'development_setup': {
-                    'condition': lambda profile: 'development' in profile.usage_pattern,
-                    'recommendations': [
-                        ('general', 'gaps_in', '5', 'Comfortable gaps for coding', 0.7),
-                        ('decoration', 'rounding', '8', 'Moderate rounding', 0.6),
-                        ('general', 'border_size', '2', 'Clear window borders', 0.8)
-                    ]
-                },
-                'multimedia_setup': {
-                    'condition': lambda profile: 'multimedia' in profile.usage_pattern,
-                    'recommendations': [
-                        ('decoration', 'blur', 'true', 'Enhanced visual experience', 0.8),
-                        ('decoration', 'drop_shadow', 'true', 'Depth perception', 0.7),
-                        ('animations', 'enabled', 'true', 'Smooth transitions', 0.9)
-                    ]
-                }
-            }
-        }
+    def _load_knowledge_base(self) -> DecisionIndex:
+        """Compile the shipped rules plus any in ~/.config/hyprsupreme/rules"""
+        if not any(RULES_DIR.glob("*.json")):
+            print(f"Warning: built-in rules not found in {RULES_DIR}; only custom rules will apply")
+        try:
+            return DecisionIndex.from_paths([RULES_DIR, self.config_dir / "rules"])
+        except RuleError as e:
+            print(f"Warning: ignoring custom rules: {e}")
+            return DecisionIndex.from_paths([RULES_DIR])
     
     def generate_recommendations(self) -> List[ConfigRecommendation]:
         """Generate AI-powered configuration recommendations"""
         recommendations = []
         
-        # Apply performance rules
-        for rule_name, rule in self.knowledge_base['performance_rules'].items():
-            if rule['condition'](self.system_profile):
-                for category, setting, value, reason, confidence in rule['recommendations']:
-                    recommendations.append(ConfigRecommendation(
-                        category=category,
-                        setting=setting,
-                        value=value,
-                        reason=reason,
-                        confidence=confidence,
-                        impact='medium',
-                        reversible=True
-                    ))
-        
-        # Apply aesthetic rules
-        for rule_name, rule in self.knowledge_base['aesthetic_rules'].items():
-            if rule['condition'](self.system_profile):
-                for category, setting, value, reason, confidence in rule['recommendations']:
-                    recommendations.append(ConfigRecommendation(
-                        category=category,
-                        setting=setting,
-                        value=value,
-                        reason=reason,
-                        confidence=confidence,
-                        impact='low',
-                        reversible=True
-                    ))
+        # Only rules filed under this profile's features are evaluated
+        features = profile_features(self.system_profile)
+        for rule in self.knowledge_base.match(features):
+            for category, setting, value, reason, confidence in rule.recommend:
+                recommendations.append(ConfigRecommendation(
+                    category=category,
+                    setting=setting,
+                    value=value,
+                    reason=reason,
+                    confidence=confidence,
+                    impact=rule.impact,
+                    reversible=True
+                ))
         
         # Sort by confidence and impact
         recommendations.sort(key=lambda x: (x.confidence, x.impact == 'high'), reverse=True)
@@ -321,11 +383,19 @@ class AIAssistant:
                 analysis['issues'].append("Configuration file not found")
                 return analysis
             
-            with open(config_path, 'r') as f:
-                config_content = f.read()
+            config = load_config(config_path)
+            for error in config.errors:
+                analysis['issues'].append({
+                    'type': 'syntax',
+                    'message': f'Configuration error at {error}',
+                    'suggestion': 'Fix the line so Hyprland does not ignore it',
+                    'severity': 'high'
+                })
             
-            # Check for common issues
-            if 'blur = true' in config_content and self.system_profile.ram_gb < 8:
+            # Check for common issues; Hyprland blurs unless told otherwise
+            blur_enabled = config.get_bool('decoration:blur:enabled',
+                                           config.get_bool('decoration:blur', True))
+            if blur_enabled and self.system_profile.ram_gb < 8:
                 analysis['issues'].append({
                     'type': 'performance',
                     'message': 'Blur effects enabled on low-RAM system',
@@ -334,7 +404,7 @@ class AIAssistant:
                 })
             
             if 'nvidia' in str(self.system_profile.gpu_info).lower():
-                if 'env = LIBVA_DRIVER_NAME,nvidia' not in config_content:
+                if config.env().get('LIBVA_DRIVER_NAME') != 'nvidia':
                     analysis['optimizations'].append({
                         'type': 'nvidia',
                         'message': 'Missing NVIDIA-specific optimizations',
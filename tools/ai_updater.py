@@ -8,28 +8,68 @@ import os
 import sys
 import json
 import subprocess
-import requests
+import bisect
 import hashlib
 import sqlite3
 import shutil
 import tempfile
-import tarfile
-import git
 from pathlib import Path
+from urllib.parse import urljoin
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass, asdict
-import semver
-import difflib
 
-# Import AI Assistant for intelligent analysis
+# requests, semver, tarfile (via the backup modules), the delta tools and the
+# AI assistant are imported where they are used, so simple subcommands start
+# without paying for them
 sys.path.append(str(Path(__file__).parent))
-try:
-    from ai_assistant import AIAssistant, SystemProfile, ConfigRecommendation
-    AI_AVAILABLE = True
-except ImportError:
-    print("Warning: AI Assistant not available. Using fallback update logic.")
-    AI_AVAILABLE = False
+from config_merge import atomic_write
+from retention import RetentionPolicy, RetentionItem, BlobStore
+from mirror_server import MIRROR_ENV, mirror_url
+
+# Changelog line categories in priority order: a line goes to the first that matches
+CHANGELOG_CATEGORIES = (
+    ('breaking_changes', ('breaking', 'removed', 'deprecated', 'incompatible', 'migration')),
+    ('new_features', ('added', 'new', 'feature', 'enhancement', 'improved')),
+    ('fixes', ('fixed', 'bug', 'issue', 'patch', 'security')),
+)
+
+# Bump when the analysis heuristics change to invalidate memoized results
+ANALYSIS_VERSION = "1"
+
+
+def classify_changelog(changelog: str) -> Dict[str, List[str]]:
+    """Split changelog lines into breaking changes, new features and fixes
+    
+    Each keyword is searched for across the whole lowercased changelog
+    instead of testing every keyword against every line, so lines without
+    any keyword cost nothing beyond the lowercasing.
+    """
+    lines = changelog.split('\n')
+    text = changelog.lower()
+    line_starts = []
+    position = 0
+    for line in text.split('\n'):  # lowercasing may change lengths, so measure the lowered lines
+        line_starts.append(position)
+        position += len(line) + 1
+    
+    best: Dict[int, int] = {}  # line number -> highest priority category
+    for category, (_, keywords) in enumerate(CHANGELOG_CATEGORIES):
+        for keyword in keywords:
+            found = text.find(keyword)
+            while found != -1:
+                line_no = bisect.bisect_right(line_starts, found) - 1
+                if best.get(line_no, len(CHANGELOG_CATEGORIES)) > category:
+                    best[line_no] = category
+                line_end = text.find('\n', found)
+                if line_end == -1:
+                    break
+                found = text.find(keyword, line_end + 1)
+    
+    result = {name: [] for name, _ in CHANGELOG_CATEGORIES}
+    for line_no in sorted(best):
+        result[CHANGELOG_CATEGORIES[best[line_no]][0]].append(lines[line_no].strip())
+    return result
 
 @dataclass
 class UpdateInfo:
@@ -72,19 +112,23 @@ class AIUpdateEngine:
             directory.mkdir(parents=True, exist_ok=True)
         
         self.db_path = self.config_dir / "updates.db"
+        self._backup_index = None
         self.settings_path = self.config_dir / "update_settings.json"
         
         # Initialize components
         self.init_database()
         self.settings = self.load_settings()
         
-        # AI components
-        if AI_AVAILABLE:
-            self.ai_assistant = AIAssistant()
-            self.system_profile = self.ai_assistant.system_profile
-        else:
-            self.ai_assistant = None
-            self.system_profile = None
+        # AI components, created on first use: profiling the system is slow
+        self._ai_assistant = None
+        self._ai_loaded = False
+        
+        # HTTP session, created on first request and reused for keep-alive
+        self._session = None
+        self._git_updater = None
+        
+        # Downloaded patch chains by target version
+        self._delta_plans: Dict[str, Tuple[Dict, List[Dict], Path]] = {}
         
         # Project information
         self.project_root = Path(__file__).parent.parent
@@ -102,6 +146,41 @@ class AIUpdateEngine:
                 'enabled': True
             }
         }
+        
+        # Caching mirror shared by several machines, if configured
+        self.mirror = None
+        self.use_mirror(self.settings.get('mirror_url') or os.environ.get(MIRROR_ENV))
+    
+    def use_mirror(self, mirror: Optional[str]):
+        """Route release checks and downloads through a mirror_server.py instance"""
+        self.mirror = mirror.rstrip('/') if mirror else None
+        github = self.update_sources['github']
+        upstream = github.setdefault('upstream_api_url', github['api_url'])
+        github['api_url'] = mirror_url(upstream, self.mirror)
+    
+    @property
+    def ai_assistant(self):
+        """AIAssistant for analysis commands, or None if it is unavailable"""
+        if not self._ai_loaded:
+            self._ai_loaded = True
+            try:
+                from ai_assistant import AIAssistant
+                self._ai_assistant = AIAssistant()
+            except ImportError:
+                print("Warning: AI Assistant not available. Using fallback update logic.")
+        return self._ai_assistant
+    
+    @property
+    def system_profile(self):
+        return self.ai_assistant.system_profile if self.ai_assistant else None
+    
+    @property
+    def backup_index(self):
+        """Member index of backup archives, shared with the migrator"""
+        if self._backup_index is None:
+            from backup_index import BackupIndex, INDEX_DB_NAME
+            self._backup_index = BackupIndex(self.config_dir / INDEX_DB_NAME)
+        return self._backup_index
     
     def init_database(self):
         """Initialize update tracking database"""
@@ -154,7 +233,41 @@ class AIUpdateEngine:
                     learned_date TEXT
                 );
                 
+                CREATE TABLE IF NOT EXISTS backup_verifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    backup_id TEXT NOT NULL,
+                    verified_at TEXT,
+                    ok BOOLEAN,
+                    error TEXT,
+                    duration REAL,
+                    bytes INTEGER
+                );
+                
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body TEXT,  -- parsed JSON of the last 200 response
+                    fetched_at TEXT,
+                    validated_at TEXT
+                );
+                
+                CREATE TABLE IF NOT EXISTS update_analysis (
+                    tag TEXT NOT NULL,
+                    changelog_hash TEXT NOT NULL,
+                    breaking_changes TEXT,  -- JSON lists
+                    new_features TEXT,
+                    fixes TEXT,
+                    context TEXT,  -- inputs the scores below depend on
+                    compatibility_score REAL,
+                    risk_level TEXT,
+                    ai_recommendation TEXT,
+                    analyzed_at TEXT,
+                    PRIMARY KEY (tag, changelog_hash)
+                );
+                
                 CREATE INDEX IF NOT EXISTS idx_updates_version ON updates(version);
+                CREATE INDEX IF NOT EXISTS idx_backup_verifications_backup ON backup_verifications(backup_id, verified_at);
                 CREATE INDEX IF NOT EXISTS idx_backup_version ON backup_points(version);
                 CREATE INDEX IF NOT EXISTS idx_update_history_date ON update_history(update_date);
             """)
@@ -175,7 +288,15 @@ class AIUpdateEngine:
             'rollback_timeout': 30,  # minutes
             'preserve_user_configs': True,
             'last_check': None,
-            'update_blacklist': []
+            'update_blacklist': [],
+            'delta_updates': True,
+            'delta_index_url': None,  # index.json published by delta_update.py
+            'mirror_url': None,  # e.g. http://mirror.lan:8765, see mirror_server.py
+            'retention': {
+                'keep_last': 5,
+                'keep_weekly': 4,
+                'max_total_mb': 0
+            }
         }
         
         try:
@@ -237,7 +358,7 @@ class AIUpdateEngine:
         available_updates.extend(local_updates)
         
         # AI analysis of updates
-        if AI_AVAILABLE and available_updates:
+        if available_updates and self.ai_assistant:
             available_updates = self._ai_analyze_updates(available_updates)
         
         # Save check timestamp
@@ -277,11 +398,9 @@ class AIUpdateEngine:
             
             # Get latest releases
             url = f"{github_config['api_url']}/releases"
-            response = requests.get(url, timeout=30)
+            releases = self._http_get_json(url)
             
-            if response.status_code == 200:
-                releases = response.json()
-                
+            if releases is not None:
                 for release in releases[:5]:  # Check last 5 releases
                     version = release['tag_name'].lstrip('v')
                     
@@ -294,7 +413,7 @@ class AIUpdateEngine:
                         version=version,
                         release_date=release['published_at'],
                         changelog=release['body'] or '',
-                        download_url=release['zipball_url'],
+                        download_url=mirror_url(release['zipball_url'], self.mirror),
                         checksum='',  # Calculate after download
                         size=0,  # Will be set during download
                         compatibility_score=0.0,  # AI will calculate
@@ -312,6 +431,83 @@ class AIUpdateEngine:
         
         return updates
     
+    @property
+    def git_updater(self) -> 'GitUpdater':
+        """GitPython-backed updater for the local checkout, fetched at most once"""
+        if self._git_updater is None:
+            from git_update import GitUpdater
+            self._git_updater = GitUpdater(Path(self.update_sources['local']['path']))
+        return self._git_updater
+    
+    @property
+    def session(self) -> 'requests.Session':
+        """Pooled HTTP session shared by all update requests"""
+        if self._session is None:
+            import requests
+            import requests.adapters
+            
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept': 'application/vnd.github+json',
+                'User-Agent': f'HyprSupreme-Updater/{self.current_version}'
+            })
+            self._session = session
+        return self._session
+    
+    def _http_get_json(self, url: str, timeout: int = 30) -> Optional[Any]:
+        """GET a JSON document through the conditional-request cache
+        
+        The ETag/Last-Modified validators and the parsed body are kept in
+        the http_cache table, so an unchanged resource costs one 304 round
+        trip. When the request fails, the cached body is returned instead.
+        """
+        import requests
+        
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, body FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            if row:
+                print(f"Warning: {url} unreachable ({e.__class__.__name__}), using cached data")
+                return json.loads(row[2])
+            raise
+        
+        now = datetime.now().isoformat()
+        if response.status_code == 304 and row:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("UPDATE http_cache SET validated_at = ? WHERE url = ?", (now, url))
+            return json.loads(row[2])
+        
+        if response.status_code == 200:
+            data = response.json()
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO http_cache
+                    (url, etag, last_modified, body, fetched_at, validated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (url, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                      json.dumps(data), now, now))
+            return data
+        
+        if row:
+            print(f"Warning: {url} returned HTTP {response.status_code}, using cached data")
+            return json.loads(row[2])
+        return None
+    
     def _check_local_updates(self) -> List[UpdateInfo]:
         """Check local git repository for updates"""
         updates = []
@@ -324,59 +520,31 @@ class AIUpdateEngine:
             if not (repo_path / '.git').exists():
                 return updates
             
-            # Fetch latest changes
-            result = subprocess.run(
-                ['git', 'fetch', 'origin'],
-                cwd=repo_path,
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                # Check for commits ahead
-                result = subprocess.run(
-                    ['git', 'rev-list', '--count', 'HEAD..origin/main'],
-                    cwd=repo_path,
-                    capture_output=True,
-                    text=True
+            # One fetch per engine, reused when the update is downloaded and applied
+            commit_count, commits = self.git_updater.pending(limit=10)
+            if commit_count > 0:
+                changelog = '\n'.join(commits)
+                
+                # Create update info for latest commits
+                next_version = self._calculate_next_version()
+                
+                update_info = UpdateInfo(
+                    version=next_version,
+                    release_date=datetime.now().isoformat(),
+                    changelog=f"Development updates ({commit_count} commits):\n{changelog}",
+                    download_url='local_git',
+                    checksum='',
+                    size=0,
+                    compatibility_score=0.0,
+                    risk_level='low',  # Local updates are usually safer
+                    ai_recommendation='',
+                    breaking_changes=[],
+                    new_features=[],
+                    fixes=[]
                 )
                 
-                if result.returncode == 0 and int(result.stdout.strip()) > 0:
-                    # There are updates available
-                    commit_count = int(result.stdout.strip())
-                    
-                    # Get latest commit info
-                    result = subprocess.run(
-                        ['git', 'log', '--oneline', '-n', '10', 'origin/main'],
-                        cwd=repo_path,
-                        capture_output=True,
-                        text=True
-                    )
-                    
-                    if result.returncode == 0:
-                        commits = result.stdout.strip().split('\n')
-                        changelog = '\n'.join(commits)
-                        
-                        # Create update info for latest commits
-                        next_version = self._calculate_next_version()
-                        
-                        update_info = UpdateInfo(
-                            version=next_version,
-                            release_date=datetime.now().isoformat(),
-                            changelog=f"Development updates ({commit_count} commits):\n{changelog}",
-                            download_url='local_git',
-                            checksum='',
-                            size=0,
-                            compatibility_score=0.0,
-                            risk_level='low',  # Local updates are usually safer
-                            ai_recommendation='',
-                            breaking_changes=[],
-                            new_features=[],
-                            fixes=[]
-                        )
-                        
-                        updates.append(update_info)
-                        
+                updates.append(update_info)
+                
         except Exception as e:
             print(f"Warning: Could not check local git updates: {e}")
         
@@ -389,49 +557,100 @@ class AIUpdateEngine:
         
         print("🤖 AI analyzing updates for compatibility and risk...")
         
-        for update in updates:
-            try:
-                # Analyze changelog for breaking changes, features, and fixes
-                self._parse_changelog(update)
-                
-                # Calculate compatibility score based on system profile
-                update.compatibility_score = self._calculate_compatibility_score(update)
-                
-                # Determine risk level using AI
-                update.risk_level = self._assess_risk_level(update)
-                
-                # Generate AI recommendation
-                update.ai_recommendation = self._generate_ai_recommendation(update)
-                
-            except Exception as e:
-                print(f"Warning: AI analysis failed for {update.version}: {e}")
-                update.ai_recommendation = "AI analysis unavailable"
+        # Reuse earlier results for releases whose changelog is unchanged
+        pending = [update for update in updates if not self._load_analysis(update)]
+        
+        if pending:
+            from concurrent.futures import ThreadPoolExecutor
+            
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                outcomes = list(executor.map(self._analyze_update, pending))
+            for update, ok in zip(pending, outcomes):
+                if ok:
+                    self._save_analysis(update)
         
         # Sort by AI recommendation and compatibility
         updates.sort(key=lambda x: (x.compatibility_score, x.version), reverse=True)
         
         return updates
     
+    def _analyze_update(self, update: UpdateInfo) -> bool:
+        """Run the full analysis of one update; returns False on failure"""
+        try:
+            # Analyze changelog for breaking changes, features, and fixes
+            self._parse_changelog(update)
+            
+            # Calculate compatibility score based on system profile
+            update.compatibility_score = self._calculate_compatibility_score(update)
+            
+            # Determine risk level using AI
+            update.risk_level = self._assess_risk_level(update)
+            
+            # Generate AI recommendation
+            update.ai_recommendation = self._generate_ai_recommendation(update)
+            return True
+            
+        except Exception as e:
+            print(f"Warning: AI analysis failed for {update.version}: {e}")
+            update.ai_recommendation = "AI analysis unavailable"
+            return False
+    
+    def _analysis_key(self, update: UpdateInfo) -> Tuple[str, str, str]:
+        """(tag, changelog hash, scoring context) of an update's analysis"""
+        changelog_hash = hashlib.sha256(update.changelog.encode()).hexdigest()
+        profile = self.system_profile
+        context = json.dumps([
+            ANALYSIS_VERSION, self.current_version, update.download_url == 'local_git',
+            profile.ram_gb if profile else None, profile.usage_pattern if profile else None
+        ])
+        return update.version, changelog_hash, context
+    
+    def _load_analysis(self, update: UpdateInfo) -> bool:
+        """Fill in a memoized analysis; returns False if it must be recomputed"""
+        tag, changelog_hash, context = self._analysis_key(update)
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("""
+                SELECT breaking_changes, new_features, fixes, context,
+                       compatibility_score, risk_level, ai_recommendation
+                FROM update_analysis WHERE tag = ? AND changelog_hash = ?
+            """, (tag, changelog_hash)).fetchone()
+        if not row:
+            return False
+        
+        update.breaking_changes = json.loads(row[0])
+        update.new_features = json.loads(row[1])
+        update.fixes = json.loads(row[2])
+        if row[3] == context:
+            update.compatibility_score, update.risk_level, update.ai_recommendation = row[4:7]
+        else:
+            # Changelog unchanged but the system or installed version is not: rescore only
+            update.compatibility_score = self._calculate_compatibility_score(update)
+            update.risk_level = self._assess_risk_level(update)
+            update.ai_recommendation = self._generate_ai_recommendation(update)
+            self._save_analysis(update)
+        return True
+    
+    def _save_analysis(self, update: UpdateInfo):
+        tag, changelog_hash, context = self._analysis_key(update)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO update_analysis
+                (tag, changelog_hash, breaking_changes, new_features, fixes, context,
+                 compatibility_score, risk_level, ai_recommendation, analyzed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                tag, changelog_hash, json.dumps(update.breaking_changes),
+                json.dumps(update.new_features), json.dumps(update.fixes), context,
+                update.compatibility_score, update.risk_level, update.ai_recommendation,
+                datetime.now().isoformat()
+            ))
+    
     def _parse_changelog(self, update: UpdateInfo):
         """Parse changelog to extract breaking changes, features, and fixes"""
-        changelog = update.changelog.lower()
-        
-        # Keywords for different types of changes
-        breaking_keywords = ['breaking', 'removed', 'deprecated', 'incompatible', 'migration']
-        feature_keywords = ['added', 'new', 'feature', 'enhancement', 'improved']
-        fix_keywords = ['fixed', 'bug', 'issue', 'patch', 'security']
-        
-        lines = update.changelog.split('\n')
-        
-        for line in lines:
-            line_lower = line.lower()
-            
-            if any(keyword in line_lower for keyword in breaking_keywords):
-                update.breaking_changes.append(line.strip())
-            elif any(keyword in line_lower for keyword in feature_keywords):
-                update.new_features.append(line.strip())
-            elif any(keyword in line_lower for keyword in fix_keywords):
-                update.fixes.append(line.strip())
+        categories = classify_changelog(update.changelog)
+        update.breaking_changes.extend(categories['breaking_changes'])
+        update.new_features.extend(categories['new_features'])
+        update.fixes.extend(categories['fixes'])
     
     def _calculate_compatibility_score(self, update: UpdateInfo) -> float:
         """Calculate compatibility score using AI analysis"""
@@ -454,7 +673,7 @@ class AIUpdateEngine:
         
         # Version jump analysis
         try:
-            version_diff = semver.compare(update.version, self.current_version)
+            version_diff = self._compare_versions(update.version, self.current_version)
             if version_diff >= 2:  # Major version jump
                 score -= 0.2
         except Exception:
@@ -573,21 +792,25 @@ class AIUpdateEngine:
             'version': self.current_version,
             'created_date': datetime.now().isoformat(),
             'items': backup_items,
-            'system_profile': asdict(self.system_profile) if self.system_profile else {}
+            'system_profile': asdict(self._ai_assistant.system_profile) if self._ai_assistant else {}
         }
         
-        # Create backup archive
+        # Create backup archive with a member index for single-file access
         archive_path = backup_path / "backup.tar.gz"
         
-        with tarfile.open(archive_path, 'w:gz') as tar:
-            for item in backup_items:
-                source_path = Path(item['source'])
-                if source_path.exists():
-                    try:
-                        tar.add(source_path, arcname=item['target'])
-                        print(f"  ✓ Backed up: {item['source']}")
-                    except Exception as e:
-                        print(f"  ⚠ Could not backup {item['source']}: {e}")
+        sources = []
+        for item in backup_items:
+            source_path = Path(item['source'])
+            if source_path.exists():
+                sources.append((source_path, item['target']))
+                print(f"  ✓ Backed up: {item['source']}")
+        
+        from backup_index import write_indexed_archive
+        from backup_scrub import digest_file
+        
+        entries = write_indexed_archive(archive_path, sources)
+        self.backup_index.save(backup_id, archive_path, entries)
+        metadata['checksum'] = digest_file(archive_path)
         
         # Save metadata
         with open(backup_path / "metadata.json", 'w') as f:
@@ -635,38 +858,104 @@ class AIUpdateEngine:
         
         try:
             if update.download_url == 'local_git':
-                # Pull from git
-                result = subprocess.run(
-                    ['git', 'pull', 'origin', 'main'],
-                    cwd=self.project_root,
-                    capture_output=True,
-                    text=True
-                )
-                return result.returncode == 0
+                # Objects only; the worktree is patched when the update is applied
+                self.git_updater.fetch()
+                return True
             else:
-                # Download from URL
-                response = requests.get(update.download_url, stream=True)
-                if response.status_code == 200:
-                    archive_path = download_path / "update.zip"
-                    
-                    with open(archive_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    
-                    # Verify download
-                    if self._verify_download(archive_path, update):
-                        print(f"✅ Download completed: {update.version}")
-                        return True
-                    else:
-                        print("❌ Download verification failed")
-                        return False
+                # Prefer a patch chain from the installed version
+                if self._download_delta(update, download_path):
+                    return True
+                return self._download_archive(update, download_path)
                         
         except Exception as e:
             print(f"❌ Download failed: {e}")
             return False
+    
+    def _download_archive(self, update: UpdateInfo, download_path: Path) -> bool:
+        """Download the full release archive"""
+        response = self.session.get(update.download_url, stream=True, timeout=60)
+        if response.status_code == 200:
+            archive_path = download_path / "update.zip"
+            
+            with open(archive_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+            
+            # Verify download
+            if self._verify_download(archive_path, update):
+                print(f"✅ Download completed: {update.version}")
+                return True
+            else:
+                print("❌ Download verification failed")
+                return False
         
         return False
     
+    def _download_delta(self, update: UpdateInfo, download_path: Path) -> bool:
+        """Download the cheapest patch chain to ``update.version``, if any
+        
+        Patches are only used when their total size is below the full
+        archive. Nothing is applied here; see _apply_delta.
+        """
+        index_url = self.settings.get('delta_index_url')
+        if not self.settings.get('delta_updates', True) or not index_url:
+            return False
+        index_url = mirror_url(index_url, self.mirror)
+        
+        from delta_update import cheapest_chain
+        
+        try:
+            index = self._http_get_json(index_url)
+            if not index:
+                return False
+            chain = cheapest_chain(index, self.current_version, update.version, update.size or None)
+            if not chain:
+                return False
+            
+            delta_dir = download_path / "delta"
+            names = [index['versions'][self.current_version]['manifest']] + [link['file'] for link in chain]
+            transferred = 0
+            for name in names:
+                response = self.session.get(urljoin(index_url, name), timeout=60)
+                response.raise_for_status()
+                atomic_write(delta_dir / name, response.content)
+                transferred += len(response.content)
+            
+            self._delta_plans[update.version] = (index, chain, delta_dir)
+            print(f"✅ Downloaded {len(chain)} patch(es) for {update.version} ({transferred // 1024} KB)")
+            return True
+        except Exception as e:
+            print(f"Warning: Delta update unavailable, using full archive: {e}")
+            return False
+    
+    def _apply_delta(self, update: UpdateInfo) -> bool:
+        """Apply a downloaded patch chain to the project tree"""
+        plan = self._delta_plans.pop(update.version, None)
+        if not plan:
+            return False
+        
+        from delta_update import DeltaError, apply_chain
+        
+        index, chain, delta_dir = plan
+        try:
+            result = apply_chain(self.project_root, index, chain, lambda name: (delta_dir / name).read_bytes())
+            print(f"✅ Patched {result.files_written} files, removed {result.files_deleted} "
+                  f"({result.from_version} → {result.to_version})")
+            return True
+        except (DeltaError, OSError, KeyError) as e:
+            print(f"⚠ Delta update failed ({e}), falling back to the full archive")
+            return False
+    
+    def _update_from_archive(self, update: UpdateInfo, conservative: bool) -> bool:
+        """Apply a downloaded update, trying the patch chain first"""
+        if self._apply_delta(update):
+            return True
+        
+        archive_path = self.cache_dir / f"update_{update.version}" / "update.zip"
+        if not archive_path.exists() and not self._download_archive(update, archive_path.parent):
+            return False
+        return self._merge_update_files(update, conservative=conservative)
+    
     def apply_update(self, update: UpdateInfo, strategy: UpdateStrategy) -> bool:
         """Apply update using AI-guided strategy"""
         print(f"🚀 Applying update {update.version} using {strategy.approach} strategy...")
@@ -714,35 +1003,41 @@ class AIUpdateEngine:
         """Apply incremental update with minimal changes"""
         print("📈 Applying incremental update...")
         
-        # For git updates, this is just a pull
+        # For git updates, touch only the changed paths and merge local edits
         if update.download_url == 'local_git':
-            result = subprocess.run(
-                ['git', 'reset', '--hard', 'origin/main'],
-                cwd=self.project_root,
-                capture_output=True,
-                text=True
-            )
-            return result.returncode == 0
+            return self._apply_git_update(merge_local=True)
         
         # For downloaded updates, extract and merge selectively
-        return self._merge_update_files(update, conservative=True)
+        return self._update_from_archive(update, conservative=True)
+    
+    def _apply_git_update(self, merge_local: bool) -> bool:
+        """Move the worktree to the fetched branch tip, path by path"""
+        from git_update import GitUpdateError
+        
+        try:
+            result = self.git_updater.apply(merge_local=merge_local)
+        except (GitUpdateError, OSError) as e:
+            print(f"❌ Git update failed: {e}")
+            return False
+        
+        print(f"✅ {result.from_commit[:7]} → {result.to_commit[:7]}: {len(result.written)} written, "
+              f"{len(result.deleted)} removed, {len(result.merged)} merged")
+        for path in result.conflicts:
+            print(f"⚠ {path}: conflicting edits, local file kept, merge saved as {path}.update")
+        for path in result.kept:
+            print(f"⚠ {path}: local changes kept, incoming version saved as {path}.update")
+        return True
     
     def _apply_full_update(self, update: UpdateInfo, strategy: UpdateStrategy) -> bool:
         """Apply full update with complete replacement"""
         print("🔄 Applying full update...")
         
-        # For git updates
+        # For git updates, incoming changes win over local edits (a backup was taken)
         if update.download_url == 'local_git':
-            result = subprocess.run(
-                ['git', 'reset', '--hard', 'origin/main'],
-                cwd=self.project_root,
-                capture_output=True,
-                text=True
-            )
-            return result.returncode == 0
+            return self._apply_git_update(merge_local=False)
         
         # For downloaded updates, full replacement
-        return self._merge_update_files(update, conservative=False)
+        return self._update_from_archive(update, conservative=False)
     
     def _apply_custom_update(self, update: UpdateInfo, strategy: UpdateStrategy) -> bool:
         """Apply custom update with AI-guided conflict resolution"""
@@ -762,6 +1057,7 @@ class AIUpdateEngine:
     def _compare_versions(self, version1: str, version2: str) -> int:
         """Compare two semantic versions"""
         try:
+            import semver
             return semver.compare(version1, version2)
         except Exception:
             # Fallback to string comparison
@@ -841,10 +1137,20 @@ class AIUpdateEngine:
         except Exception as e:
             print(f"Warning: Could not update VERSION file: {e}")
     
-    def _rollback_update(self, backup_id: str) -> bool:
-        """Rollback to previous backup"""
+    def _rollback_update(self, backup_id: str, files: List[str] = None) -> bool:
+        """Rollback to previous backup, optionally only the given files"""
         print(f"🔄 Rolling back to backup {backup_id}...")
         
+        if files:
+            try:
+                for path in files:
+                    target = self.backup_index.restore_member(backup_id, path)
+                    print(f"  ✓ Restored: {target}")
+                return True
+            except Exception as e:
+                print(f"❌ Rollback failed: {e}")
+                return False
+        
         try:
             # Get backup info from database
             with sqlite3.connect(self.db_path) as conn:
@@ -861,9 +1167,13 @@ class AIUpdateEngine:
                 backup_path, metadata_json = row
                 metadata = json.loads(metadata_json)
             
-            # Restore from backup
-            archive_path = Path(backup_path) / "backup.tar.gz"
+            # Restore from backup (backup_path is the archive itself)
+            archive_path = Path(backup_path)
+            if archive_path.is_dir():
+                archive_path = archive_path / "backup.tar.gz"
             if archive_path.exists():
+                import tarfile
+                
                 with tarfile.open(archive_path, 'r:gz') as tar:
                     tar.extractall(Path.home())
                 
@@ -881,6 +1191,14 @@ class AIUpdateEngine:
             print(f"❌ Rollback failed: {e}")
             return False
     
+    def list_backup_files(self, backup_id: str) -> List[Dict]:
+        """List the files in a backup point from its index"""
+        return [asdict(entry) for entry in self.backup_index.members(backup_id)]
+    
+    def diff_backup(self, backup_id: str) -> Dict[str, List[str]]:
+        """Compare a backup point with the files currently on disk"""
+        return self.backup_index.diff(backup_id)
+    
     def list_available_updates(self) -> List[Dict]:
         """List all available updates"""
         with sqlite3.connect(self.db_path) as conn:
@@ -902,11 +1220,88 @@ class AIUpdateEngine:
             """)
             return [dict(row) for row in cursor.fetchall()]
 
+    # Retention store interface (see retention.py)
+    retention_name = 'updater'
+    
+    def retention_policy(self) -> RetentionPolicy:
+        """Retention policy from settings, honouring backup_retention days"""
+        policy = {'keep_within_days': self.settings.get('backup_retention', 30)}
+        policy.update(self.settings.get('retention', {}))
+        return RetentionPolicy.from_dict(policy)
+    
+    def retention_items(self) -> List[RetentionItem]:
+        """Backup points subject to retention"""
+        items = []
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("SELECT id, created_date, backup_type, backup_path FROM backup_points")
+            for backup_id, created_date, backup_type, backup_path in cursor.fetchall():
+                try:
+                    created_at = datetime.fromisoformat(created_date)
+                except (TypeError, ValueError):
+                    continue
+                archive = Path(backup_path) if backup_path else None
+                items.append(RetentionItem(
+                    id=backup_id,
+                    store=self.retention_name,
+                    created_at=created_at,
+                    size=archive.stat().st_size if archive and archive.is_file() else 0,
+                    label=backup_type or ''
+                ))
+        return items
+    
+    def delete_retention_item(self, item_id: str):
+        """Delete a pruned backup point"""
+        backup_path = self.backup_dir / item_id
+        if backup_path.is_dir():
+            shutil.rmtree(backup_path)
+        
+        self.backup_index.delete(item_id)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM backup_points WHERE id = ?", (item_id,))
+    
+    def retention_blob_stores(self) -> List[BlobStore]:
+        """Backup directories with their live references"""
+        with sqlite3.connect(self.db_path) as conn:
+            live = {row[0] for row in conn.execute("SELECT id FROM backup_points")}
+        # backup_YYYYMMDD_HHMMSS, distinct from the migrator's archives in the same directory
+        return [BlobStore(self.backup_dir, live, "backup_????????_??????")]
+
+    # Scrub store interface (see backup_scrub.py)
+    def scrub_targets(self) -> List['ScrubTarget']:
+        """Backup archives; older ones without a checksum are read end to end"""
+        from backup_scrub import ScrubTarget
+        
+        targets = []
+        with sqlite3.connect(self.db_path) as conn:
+            for backup_id, backup_path, metadata_json in conn.execute(
+                "SELECT id, backup_path, metadata FROM backup_points"
+            ):
+                try:
+                    checksum = json.loads(metadata_json or '{}').get('checksum')
+                except ValueError:
+                    checksum = None
+                path = Path(backup_path or '')
+                if path.is_dir():
+                    path = path / "backup.tar.gz"
+                targets.append(ScrubTarget(id=backup_id, store=self.retention_name,
+                                           path=path, checksum=checksum))
+        return targets
+    
+    def record_scrub_result(self, result: 'ScrubResult'):
+        """Store the outcome of a backup verification"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO backup_verifications (backup_id, verified_at, ok, error, duration, bytes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (result.id, result.verified_at, result.ok, result.error, result.duration, result.bytes))
+            conn.execute("UPDATE backup_points SET verified = ? WHERE id = ?", (result.ok, result.id))
+
 def main():
     """Main function for AI Update Engine"""
     import argparse
     
     parser = argparse.ArgumentParser(description="HyprSupreme AI Update Engine")
+    parser.add_argument('--mirror', help=f'Caching mirror URL (default: ${MIRROR_ENV} or the mirror_url setting)')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Check command
@@ -935,6 +1330,8 @@ def main():
         return
     
     updater = AIUpdateEngine()
+    if args.mirror:
+        updater.use_mirror(args.mirror)
     
     try:
         if args.command == 'check':
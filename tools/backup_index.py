@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Backup Index
+Seekable backup archives with a per-member index for single-file access
+"""
+
+import gzip
+import zlib
+import sqlite3
+import hashlib
+import tarfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+
+from config_merge import atomic_write
+
+# Name of the shared index database, kept beside migration.db
+INDEX_DB_NAME = "backup_index.db"
+
+READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class MemberEntry:
+    """Location of one regular file inside an indexed archive"""
+    path: str  # name inside the archive
+    source: str  # absolute path the file was backed up from
+    offset: int  # compressed offset of a full-flush point right before the member header
+    header_size: int  # tar header bytes (including long-name/pax records) before the data
+    size: int
+    sha256: str
+    mode: int
+    mtime: float
+
+
+class _HashingReader:
+    """File wrapper that hashes everything tarfile reads through it"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.hash.update(data)
+        return data
+
+
+def _padded(size: int) -> int:
+    """Size rounded up to whole tar blocks"""
+    return (size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+
+
+def write_indexed_archive(archive_path: Path, sources: Iterable[Tuple[Path, str]],
+                          compresslevel: int = 6) -> List[MemberEntry]:
+    """Write a .tar.gz whose members can be decompressed individually
+
+    The result is an ordinary gzip tarball, but the deflate stream is
+    fully flushed before each regular file so decompression can start at
+    that member. ``sources`` yields (path, arcname); directories are
+    added recursively. Returns the index of regular files.
+    """
+    entries = []
+    with open(archive_path, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=compresslevel) as gz:
+            with tarfile.open(fileobj=gz, mode='w', format=tarfile.PAX_FORMAT) as tar:
+                for source, arcname in sources:
+                    source = Path(source)
+                    paths = [source]
+                    if source.is_dir() and not source.is_symlink():
+                        paths += sorted(source.rglob('*'))
+
+                    for path in paths:
+                        name = arcname if path == source else f"{arcname}/{path.relative_to(source).as_posix()}"
+                        try:
+                            info = tar.gettarinfo(str(path), arcname=name)
+                        except OSError as e:
+                            print(f"  ⚠ Could not backup {path}: {e}")
+                            continue
+                        if info is None:
+                            continue  # sockets and other special files
+
+                        if not info.isreg():
+                            tar.addfile(info)
+                            continue
+
+                        gz.flush(zlib.Z_FULL_FLUSH)
+                        offset = raw.tell()
+                        header_start = tar.offset
+                        with open(path, 'rb') as f:
+                            reader = _HashingReader(f)
+                            tar.addfile(info, reader)
+
+                        entries.append(MemberEntry(
+                            path=name,
+                            source=str(path.absolute()),
+                            offset=offset,
+                            header_size=tar.offset - header_start - _padded(info.size),
+                            size=info.size,
+                            sha256=reader.hash.hexdigest(),
+                            mode=info.mode,
+                            mtime=info.mtime
+                        ))
+    return entries
+
+
+def read_member_at(archive_path: Path, entry: MemberEntry) -> bytes:
+    """Decompress a single member starting at its flush point"""
+    need = entry.header_size + entry.size
+    out = bytearray()
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    with open(archive_path, 'rb') as f:
+        f.seek(entry.offset)
+        while len(out) < need:
+            data = decompressor.unconsumed_tail or f.read(READ_CHUNK)
+            if not data:
+                break
+            out += decompressor.decompress(data, need - len(out))
+
+    content = bytes(out[entry.header_size:need])
+    if len(content) != entry.size or hashlib.sha256(content).hexdigest() != entry.sha256:
+        raise ValueError(f"Archive member {entry.path} is corrupt in {archive_path}")
+    return content
+
+
+def file_sha256(path: Path) -> str:
+    """SHA256 of a file on disk"""
+    sha256_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+
+class BackupIndex:
+    """Member index for backup archives, shared by the migrator and updater"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS indexed_backups (
+                    backup_id TEXT PRIMARY KEY,
+                    archive_path TEXT NOT NULL,
+                    indexed_at TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS backup_members (
+                    backup_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    source TEXT,
+                    offset INTEGER,
+                    header_size INTEGER,
+                    size INTEGER,
+                    sha256 TEXT,
+                    mode INTEGER,
+                    mtime REAL,
+                    PRIMARY KEY (backup_id, path)
+                );
+            """)
+
+    def save(self, backup_id: str, archive_path: Path, entries: List[MemberEntry]):
+        """Record the members of a freshly written archive"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM backup_members WHERE backup_id = ?", (backup_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_backups (backup_id, archive_path, indexed_at) VALUES (?, ?, ?)",
+                (backup_id, str(archive_path), datetime.now().isoformat())
+            )
+            conn.executemany("""
+                INSERT INTO backup_members
+                (backup_id, path, source, offset, header_size, size, sha256, mode, mtime)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (backup_id, e.path, e.source, e.offset, e.header_size, e.size, e.sha256, e.mode, e.mtime)
+                for e in entries
+            ])
+
+    def delete(self, backup_id: str):
+        """Forget a backup"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM backup_members WHERE backup_id = ?", (backup_id,))
+            conn.execute("DELETE FROM indexed_backups WHERE backup_id = ?", (backup_id,))
+
+    def has(self, backup_id: str) -> bool:
+        """Whether a backup was written with an index"""
+        return self.archive_path(backup_id) is not None
+
+    def archive_path(self, backup_id: str) -> Optional[Path]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT archive_path FROM indexed_backups WHERE backup_id = ?", (backup_id,)
+            ).fetchone()
+        return Path(row[0]) if row else None
+
+    def members(self, backup_id: str) -> List[MemberEntry]:
+        """All indexed members of a backup, without touching the archive"""
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute("""
+                SELECT path, source, offset, header_size, size, sha256, mode, mtime
+                FROM backup_members WHERE backup_id = ? ORDER BY path
+            """, (backup_id,)).fetchall()
+        return [MemberEntry(*row) for row in rows]
+
+    def find_member(self, backup_id: str, path: str) -> Optional[MemberEntry]:
+        """Look a member up by archive name, name suffix or source path"""
+        path = path.strip('/')
+        candidates = []
+        for entry in self.members(backup_id):
+            if entry.path == path or entry.source.strip('/') == path:
+                return entry
+            if entry.path.endswith('/' + path):
+                candidates.append(entry)
+        if len(candidates) > 1:
+            raise ValueError(f"'{path}' is ambiguous: " + ", ".join(e.path for e in candidates))
+        return candidates[0] if candidates else None
+
+    def read_member(self, backup_id: str, path: str) -> Tuple[MemberEntry, bytes]:
+        """Read one file from a backup by seeking straight to it"""
+        entry = self.find_member(backup_id, path)
+        if entry is None:
+            raise KeyError(f"{path} is not in backup {backup_id}")
+        return entry, read_member_at(self.archive_path(backup_id), entry)
+
+    def restore_member(self, backup_id: str, path: str) -> Path:
+        """Restore one file to where it was backed up from"""
+        entry, content = self.read_member(backup_id, path)
+        target = Path(entry.source)
+        atomic_write(target, content, entry.mode)
+        return target
+
+    def diff(self, backup_id: str) -> Dict[str, List[str]]:
+        """Compare a backup with the files currently on disk
+
+        Sizes are compared first so only same-size files are hashed.
+        """
+        result = {'modified': [], 'deleted': [], 'unchanged': []}
+        for entry in self.members(backup_id):
+            current = Path(entry.source)
+            if not current.is_file():
+                result['deleted'].append(entry.path)
+            elif current.stat().st_size != entry.size or file_sha256(current) != entry.sha256:
+                result['modified'].append(entry.path)
+            else:
+                result['unchanged'].append(entry.path)
+        return result
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Config Merge
+Block-level three-way merging and atomic writes for configuration files
+"""
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# File types that are line-oriented enough to merge block by block
+MERGEABLE_SUFFIXES = {'.conf', '.css', '.rasi', '.ini'}
+
+# Suffix for an incoming version saved beside a local file it could not be merged into
+INCOMING_SUFFIX = ".update"
+
+
+def is_mergeable(path: str) -> bool:
+    """Check whether a config file can be merged at block level"""
+    return Path(path).suffix.lower() in MERGEABLE_SUFFIXES
+
+
+def split_blocks(text: str) -> List[str]:
+    """Split config text into blocks.
+
+    A block is either a complete brace-delimited section such as
+    ``decoration { ... }`` (including nested sections) or a single
+    top-level line.
+    """
+    blocks = []
+    current = []
+    depth = 0
+
+    for line in text.splitlines(keepends=True):
+        code = line.split('#', 1)[0]
+        opens = code.count('{')
+        closes = code.count('}')
+
+        if depth == 0 and opens <= closes:
+            blocks.append(line)
+            continue
+
+        current.append(line)
+        depth += opens - closes
+        if depth <= 0:
+            blocks.append(''.join(current))
+            current = []
+            depth = 0
+
+    # Unterminated section, keep whatever we collected
+    if current:
+        blocks.append(''.join(current))
+
+    return blocks
+
+
+def _intersect(ra: Tuple[int, int], rb: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+    """Intersect two half-open ranges"""
+    start = max(ra[0], rb[0])
+    end = min(ra[1], rb[1])
+    return (start, end) if start < end else None
+
+
+def _sync_regions(base: List[str], ours: List[str], theirs: List[str]) -> List[Tuple[int, ...]]:
+    """Find regions where base, ours and theirs all agree"""
+    from difflib import SequenceMatcher
+
+    ours_matches = SequenceMatcher(None, base, ours, autojunk=False).get_matching_blocks()
+    theirs_matches = SequenceMatcher(None, base, theirs, autojunk=False).get_matching_blocks()
+
+    regions = []
+    io = it = 0
+    while io < len(ours_matches) and it < len(theirs_matches):
+        obase, omatch, olen = ours_matches[io]
+        tbase, tmatch, tlen = theirs_matches[it]
+
+        common = _intersect((obase, obase + olen), (tbase, tbase + tlen))
+        if common:
+            start, end = common
+            length = end - start
+            osub = omatch + (start - obase)
+            tsub = tmatch + (start - tbase)
+            regions.append((start, end, osub, osub + length, tsub, tsub + length))
+
+        if obase + olen < tbase + tlen:
+            io += 1
+        else:
+            it += 1
+
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+
+def merge3(base: List[str], ours: List[str], theirs: List[str]) -> Tuple[List[str], int]:
+    """Three-way merge of block lists.
+
+    Conflicting hunks resolve to ``theirs`` (the incoming side). Returns the
+    merged blocks and the number of conflicting hunks.
+    """
+    merged = []
+    conflicts = 0
+    ib = io = it = 0
+
+    for zmatch, zend, omatch, oend, tmatch, tend in _sync_regions(base, ours, theirs):
+        base_chunk = base[ib:zmatch]
+        ours_chunk = ours[io:omatch]
+        theirs_chunk = theirs[it:tmatch]
+
+        if ours_chunk == theirs_chunk:
+            merged.extend(ours_chunk)
+        elif ours_chunk == base_chunk:
+            merged.extend(theirs_chunk)
+        elif theirs_chunk == base_chunk:
+            merged.extend(ours_chunk)
+        else:
+            merged.extend(theirs_chunk)
+            conflicts += 1
+
+        merged.extend(base[zmatch:zend])
+        ib, io, it = zend, oend, tend
+
+    return merged, conflicts
+
+
+def merge_config_text(base: str, ours: str, theirs: str) -> Tuple[str, int]:
+    """Merge three versions of a config file at block level"""
+    merged, conflicts = merge3(split_blocks(base), split_blocks(ours), split_blocks(theirs))
+    return ''.join(merged), conflicts
+
+
+def atomic_write(path: Path, data: bytes, mode: Optional[int] = None):
+    """Write a file atomically: temp file in the same directory, fsync, rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_name, mode)
+        elif path.exists():
+            os.chmod(tmp_name, path.stat().st_mode & 0o7777)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@')
+
+
+def unified_diff(before: str, after: str, path: str, context: int = 3) -> str:
+    """Unified diff that only runs difflib over the changed middle
+
+    Common leading and trailing lines are trimmed first (keeping enough
+    for context), which makes typical migrations on large files cheap.
+    Hunk line numbers are shifted back to whole-file positions.
+    """
+    old_lines = before.splitlines(keepends=True)
+    new_lines = after.splitlines(keepends=True)
+
+    prefix = 0
+    limit = min(len(old_lines), len(new_lines))
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix and
+           old_lines[len(old_lines) - 1 - suffix] == new_lines[len(new_lines) - 1 - suffix]):
+        suffix += 1
+
+    start = max(0, prefix - context)
+    keep_suffix = max(0, suffix - context)
+    old_mid = old_lines[start:len(old_lines) - keep_suffix]
+    new_mid = new_lines[start:len(new_lines) - keep_suffix]
+
+    def shift(match):
+        old_start = int(match.group(1)) + start
+        new_start = int(match.group(3)) + start
+        return f"@@ -{old_start}{match.group(2) or ''} +{new_start}{match.group(4) or ''} @@"
+
+    from difflib import unified_diff as unified_diff_lines
+
+    lines = []
+    for line in unified_diff_lines(old_mid, new_mid, f"a/{path}", f"b/{path}", n=context):
+        if line.startswith('@@'):
+            line = _HUNK_HEADER.sub(shift, line, count=1)
+        lines.append(line if line.endswith('\n') else line + '\n')
+    return ''.join(lines)
+
+
+def unified_diff_job(job: Tuple[str, str, str]) -> str:
+    """Process-pool entry point for unified_diff"""
+    before, after, path = job
+    return unified_diff(before, after, path)
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Delta Updates
+Per-version file manifests and patch packages between releases
+"""
+
+import io
+import os
+import sys
+import json
+import heapq
+import struct
+import hashlib
+import tarfile
+from pathlib import Path
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+
+from config_merge import atomic_write
+from backup_scrub import digest_file
+
+DELTA_FORMAT = 1
+DELTA_MAGIC = b"HSD1"
+
+# Files above this size, or without line structure, are shipped whole
+MAX_DELTA_INPUT = 4 * 1024 * 1024
+
+# Directories never included in a release tree
+EXCLUDED_DIRS = {".git", "__pycache__", "node_modules"}
+
+_COPY = struct.Struct(">cQI")
+_INSERT = struct.Struct(">cI")
+
+
+class DeltaError(Exception):
+    """A patch chain that cannot be planned, fetched or verified"""
+
+
+@dataclass
+class DeltaResult:
+    """Outcome of applying a patch chain"""
+    from_version: str
+    to_version: str
+    patches: int
+    bytes_transferred: int
+    files_written: int
+    files_deleted: int
+
+
+def tree_hash(files: Dict[str, Dict]) -> str:
+    """Hash of a whole tree from its per-file entries"""
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        entry = files[path]
+        digest.update(f"{path}\0{entry['sha256']}\0{entry['mode'] & 0o777:o}\n".encode())
+    return digest.hexdigest()
+
+
+def build_manifest(root: Path, version: str) -> Dict:
+    """Manifest of every regular file below ``root``"""
+    root = Path(root)
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        for name in filenames:
+            path = Path(dirpath) / name
+            if path.is_symlink() or not path.is_file():
+                continue
+            stat = path.stat()
+            files[path.relative_to(root).as_posix()] = {
+                'sha256': digest_file(path),
+                'size': stat.st_size,
+                'mode': stat.st_mode & 0o777
+            }
+    return {'format': DELTA_FORMAT, 'version': version, 'tree_hash': tree_hash(files), 'files': files}
+
+
+def encode_delta(old: bytes, new: bytes) -> bytes:
+    """Copy/insert delta from ``old`` to ``new``, matched line by line"""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_offsets = [0]
+    for line in old_lines:
+        old_offsets.append(old_offsets[-1] + len(line))
+
+    out = bytearray(DELTA_MAGIC)
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            out += _COPY.pack(b'C', old_offsets[i1], old_offsets[i2] - old_offsets[i1])
+        elif j2 > j1:
+            data = b"".join(new_lines[j1:j2])
+            out += _INSERT.pack(b'I', len(data)) + data
+    return bytes(out)
+
+
+def apply_delta(old: bytes, delta: bytes) -> bytes:
+    """Rebuild a file from its previous content and a delta"""
+    if delta[:4] != DELTA_MAGIC:
+        raise DeltaError("not a delta payload")
+    out = bytearray()
+    view = memoryview(delta)
+    pos = 4
+    while pos < len(delta):
+        op = delta[pos:pos + 1]
+        if op == b'C':
+            _, offset, length = _COPY.unpack_from(view, pos)
+            if offset + length > len(old):
+                raise DeltaError("delta copies past the end of its base")
+            out += old[offset:offset + length]
+            pos += _COPY.size
+        elif op == b'I':
+            _, length = _INSERT.unpack_from(view, pos)
+            pos += _INSERT.size
+            out += view[pos:pos + length]
+            pos += length
+        else:
+            raise DeltaError(f"unknown delta op {op!r}")
+    return bytes(out)
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+
+
+def build_patch(old_root: Path, old_manifest: Dict, new_root: Path, new_manifest: Dict,
+                out_path: Path) -> int:
+    """Write the patch package between two trees and return its size
+
+    Changed text files are stored as deltas when that is smaller than the
+    file itself; everything else is stored whole. The package is a gzip
+    tarball of ``patch.json`` plus one payload per changed file.
+    """
+    old_files, new_files = old_manifest['files'], new_manifest['files']
+    entries = {}
+    payloads = []
+
+    for path, entry in sorted(new_files.items()):
+        base = old_files.get(path)
+        if base and base['sha256'] == entry['sha256']:
+            if base['mode'] != entry['mode']:
+                entries[path] = {'op': 'chmod', 'base_sha256': base['sha256'], 'sha256': entry['sha256'],
+                                 'mode': entry['mode']}
+            continue
+
+        new_data = (Path(new_root) / path).read_bytes()
+        op, payload = 'full', new_data
+        if base and base['size'] <= MAX_DELTA_INPUT and entry['size'] <= MAX_DELTA_INPUT:
+            old_data = (Path(old_root) / path).read_bytes()
+            if b'\n' in old_data:
+                delta = encode_delta(old_data, new_data)
+                if len(delta) < len(new_data):
+                    op, payload = 'delta', delta
+
+        entries[path] = {'op': op, 'sha256': entry['sha256'], 'mode': entry['mode']}
+        if base:
+            entries[path]['base_sha256'] = base['sha256']
+        payloads.append((f"files/{path}", payload))
+
+    for path in sorted(set(old_files) - set(new_files)):
+        entries[path] = {'op': 'delete', 'base_sha256': old_files[path]['sha256']}
+
+    patch = {
+        'format': DELTA_FORMAT,
+        'from': old_manifest['version'],
+        'to': new_manifest['version'],
+        'from_tree_hash': old_manifest['tree_hash'],
+        'to_tree_hash': new_manifest['tree_hash'],
+        'files': entries
+    }
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz', compresslevel=9) as tar:
+        _add_bytes(tar, "patch.json", json.dumps(patch, sort_keys=True).encode())
+        for name, data in payloads:
+            _add_bytes(tar, name, data)
+    atomic_write(Path(out_path), buffer.getvalue())
+    return len(buffer.getvalue())
+
+
+def publish_deltas(trees: List[Tuple[str, Path]], out_dir: Path,
+                   archive_sizes: Dict[str, int] = None) -> Dict:
+    """Build manifests, consecutive patches and ``index.json`` for releases
+
+    ``trees`` lists (version, directory) oldest first.
+    """
+    out_dir = Path(out_dir)
+    (out_dir / "manifests").mkdir(parents=True, exist_ok=True)
+    (out_dir / "patches").mkdir(exist_ok=True)
+
+    index = {'format': DELTA_FORMAT, 'versions': {}, 'patches': []}
+    previous = None
+    for version, root in trees:
+        manifest = build_manifest(root, version)
+        manifest_name = f"manifests/{version}.json"
+        atomic_write(out_dir / manifest_name, json.dumps(manifest, sort_keys=True).encode())
+        index['versions'][version] = {
+            'tree_hash': manifest['tree_hash'],
+            'manifest': manifest_name,
+            'archive_size': (archive_sizes or {}).get(version)
+        }
+
+        if previous:
+            prev_version, prev_root, prev_manifest = previous
+            patch_name = f"patches/{prev_version}_{version}.tar.gz"
+            size = build_patch(prev_root, prev_manifest, root, manifest, out_dir / patch_name)
+            index['patches'].append({
+                'from': prev_version,
+                'to': version,
+                'file': patch_name,
+                'size': size,
+                'sha256': digest_file(out_dir / patch_name)
+            })
+        previous = (version, root, manifest)
+
+    atomic_write(out_dir / "index.json", json.dumps(index, indent=2, sort_keys=True).encode())
+    return index
+
+
+def cheapest_chain(index: Dict, installed: str, target: str,
+                   full_size: Optional[int] = None) -> Optional[List[Dict]]:
+    """Patches leading from ``installed`` to ``target`` with the fewest bytes
+
+    Returns None when no chain exists or when it would transfer at least as
+    much as the full archive.
+    """
+    edges: Dict[str, List[Dict]] = {}
+    for patch in index.get('patches', []):
+        edges.setdefault(patch['from'], []).append(patch)
+
+    best = {installed: 0}
+    previous: Dict[str, Dict] = {}
+    queue = [(0, installed)]
+    while queue:
+        cost, version = heapq.heappop(queue)
+        if version == target:
+            break
+        if cost > best.get(version, float('inf')):
+            continue
+        for patch in edges.get(version, []):
+            new_cost = cost + patch['size']
+            if new_cost < best.get(patch['to'], float('inf')):
+                best[patch['to']] = new_cost
+                previous[patch['to']] = patch
+                heapq.heappush(queue, (new_cost, patch['to']))
+
+    if target not in previous:
+        return None
+    if full_size is None:
+        full_size = index.get('versions', {}).get(target, {}).get('archive_size')
+    if full_size and best[target] >= full_size:
+        return None
+
+    chain = []
+    version = target
+    while version != installed:
+        patch = previous[version]
+        chain.append(patch)
+        version = patch['from']
+    return list(reversed(chain))
+
+
+def _read_patch(data: bytes) -> Tuple[Dict, Dict[str, bytes]]:
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+        members = {m.name: tar.extractfile(m).read() for m in tar if m.isreg()}
+    patch = json.loads(members.pop("patch.json"))
+    if patch.get('format') != DELTA_FORMAT:
+        raise DeltaError(f"unsupported patch format {patch.get('format')}")
+    return patch, members
+
+
+def apply_chain(root: Path, index: Dict, chain: List[Dict], fetch: Callable[[str], bytes]) -> DeltaResult:
+    """Apply a patch chain to the tree at ``root``
+
+    Every file the chain reads is checked against the installed manifest
+    and the reconstructed tree is checked against the target tree hash
+    before anything is written, so a failed chain leaves ``root`` untouched.
+    """
+    root = Path(root)
+    from_version, to_version = chain[0]['from'], chain[-1]['to']
+    current = json.loads(fetch(index['versions'][from_version]['manifest']))['files']
+    files = {path: dict(entry) for path, entry in current.items()}
+
+    # Verify the installed tree before trusting it as a base
+    for path, entry in files.items():
+        local = root / path
+        if not local.is_file() or digest_file(local) != entry['sha256']:
+            raise DeltaError(f"{path} does not match release {from_version}")
+
+    overlay: Dict[str, Optional[bytes]] = {}
+    transferred = 0
+    for link in chain:
+        data = fetch(link['file'])
+        transferred += len(data)
+        if hashlib.sha256(data).hexdigest() != link['sha256']:
+            raise DeltaError(f"patch {link['file']} is corrupt")
+        patch, payloads = _read_patch(data)
+
+        for path, change in patch['files'].items():
+            base = files.get(path)
+            if 'base_sha256' in change and (base is None or base['sha256'] != change['base_sha256']):
+                raise DeltaError(f"{path} does not match the base of {link['file']}")
+
+            if change['op'] == 'delete':
+                files.pop(path, None)
+                overlay[path] = None
+                continue
+            if change['op'] == 'chmod':
+                files[path]['mode'] = change['mode']
+                if path not in overlay:
+                    overlay[path] = (root / path).read_bytes()
+                continue
+
+            payload = payloads[f"files/{path}"]
+            if change['op'] == 'delta':
+                old = overlay.get(path)
+                if old is None:
+                    old = (root / path).read_bytes()
+                content = apply_delta(old, payload)
+            else:
+                content = payload
+            if hashlib.sha256(content).hexdigest() != change['sha256']:
+                raise DeltaError(f"{path} reconstructed incorrectly by {link['file']}")
+            overlay[path] = content
+            files[path] = {'sha256': change['sha256'], 'size': len(content), 'mode': change['mode']}
+
+    expected = index['versions'][to_version]['tree_hash']
+    if tree_hash(files) != expected:
+        raise DeltaError(f"reconstructed tree does not match release {to_version}")
+
+    written = deleted = 0
+    for path, content in overlay.items():
+        target = root / path
+        if content is None:
+            if target.exists():
+                target.unlink()
+                deleted += 1
+        else:
+            atomic_write(target, content, files[path]['mode'])
+            written += 1
+
+    return DeltaResult(from_version, to_version, len(chain), transferred, written, deleted)
+
+
+def main():
+    """Command line interface for publishing delta updates"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HyprSupreme Delta Updates")
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    publish_parser = subparsers.add_parser('publish', help='Build manifests and patches for release trees')
+    publish_parser.add_argument('out_dir', help='Output directory for index.json, manifests and patches')
+    publish_parser.add_argument('trees', nargs='+', metavar='VERSION=DIR', help='Release trees, oldest first')
+
+    manifest_parser = subparsers.add_parser('manifest', help='Print the manifest of a tree')
+    manifest_parser.add_argument('version', help='Release version')
+    manifest_parser.add_argument('root', help='Tree directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        trees = []
+        for spec in args.trees:
+            version, _, root = spec.partition('=')
+            if not root:
+                parser.error(f"expected VERSION=DIR, got {spec}")
+            trees.append((version, Path(root)))
+        index = publish_deltas(trees, Path(args.out_dir))
+        for patch in index['patches']:
+            print(f"{patch['from']} -> {patch['to']}: {patch['size']} bytes")
+    elif args.command == 'manifest':
+        print(json.dumps(build_manifest(Path(args.root), args.version), indent=2))
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Git Updates
+Incremental worktree updates from a git remote that only touch changed paths
+"""
+
+import os
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+import git
+
+from config_merge import INCOMING_SUFFIX, atomic_write, is_mergeable, merge_config_text
+
+_SYMLINK_MODE = 0o120000
+_SUBMODULE_MODE = 0o160000
+
+
+class GitUpdateError(Exception):
+    """Repository state that prevents an in-place update"""
+
+
+@dataclass
+class GitUpdateResult:
+    """Outcome of moving the worktree from one commit to another"""
+    from_commit: str
+    to_commit: str
+    written: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    merged: List[str] = field(default_factory=list)  # local edits merged with the incoming change
+    conflicts: List[str] = field(default_factory=list)  # overlapping edits; local kept, merge saved beside it
+    kept: List[str] = field(default_factory=list)  # local edits left alone; incoming copy saved beside them
+
+
+@dataclass
+class FileChange:
+    path: str
+    base: Optional[git.Blob]  # blob at HEAD, None if the path is new
+    target: Optional[git.Blob]  # blob at the target, None if deleted
+
+
+def blob_sha(data: bytes) -> str:
+    """Git object id of a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class GitUpdater:
+    """Fetch once, diff HEAD against the remote branch and patch the worktree"""
+
+    def __init__(self, repo_path: Path, remote: str = 'origin', branch: str = 'main'):
+        try:
+            self.repo = git.Repo(repo_path)
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError) as e:
+            raise GitUpdateError(f"{repo_path} is not a git repository") from e
+        self.root = Path(self.repo.working_tree_dir)
+        self.remote = remote
+        self.branch = branch
+        self._target: Optional[git.Commit] = None
+
+    def fetch(self, refresh: bool = False) -> git.Commit:
+        """Fetch the remote branch (once per updater) and return its tip"""
+        if self._target is None or refresh:
+            self.repo.remote(self.remote).fetch(self.branch)
+            self._target = self.repo.commit(f"{self.remote}/{self.branch}")
+        return self._target
+
+    def pending(self, limit: int = 10) -> Tuple[int, List[str]]:
+        """Number of commits HEAD is behind the target, and the newest as one-liners"""
+        target = self.fetch()
+        count = 0
+        lines = []
+        for commit in self.repo.iter_commits(f"HEAD..{target.hexsha}"):
+            count += 1
+            if len(lines) < limit:
+                lines.append(f"{commit.hexsha[:7]} {commit.summary}")
+        return count, lines
+
+    def changed_files(self, target: Optional[git.Commit] = None) -> List[FileChange]:
+        """Paths that differ between HEAD and target; renames become delete + add"""
+        target = target or self.fetch()
+        changes: Dict[str, FileChange] = {}
+        for diff in self.repo.head.commit.diff(target):
+            if diff.a_path and (diff.deleted_file or diff.renamed_file):
+                changes[diff.a_path] = FileChange(diff.a_path, diff.a_blob, None)
+            if diff.b_path and not diff.deleted_file:
+                base = None if diff.new_file or diff.renamed_file else diff.a_blob
+                changes[diff.b_path] = FileChange(diff.b_path, base, diff.b_blob)
+        return [changes[path] for path in sorted(changes)]
+
+    def is_locally_modified(self, change: FileChange) -> bool:
+        """Whether the worktree copy differs from HEAD, hashing only this file"""
+        path = self.root / change.path
+        if change.base is None:
+            # A new path is only in the way if something different already sits there
+            if not (path.exists() or path.is_symlink()):
+                return False
+            return not (path.is_file() and blob_sha(path.read_bytes()) == change.target.hexsha)
+        if change.base.mode == _SUBMODULE_MODE:
+            return False
+        try:
+            if change.base.mode == _SYMLINK_MODE:
+                data = os.readlink(path).encode()
+            else:
+                data = path.read_bytes()
+        except OSError:
+            return True
+        return blob_sha(data) != change.base.hexsha
+
+    def apply(self, merge_local: bool = True) -> GitUpdateResult:
+        """Bring the worktree to the fetched target and move HEAD there
+
+        Unmodified paths are replaced outright. Locally modified paths are
+        merged block by block when the file type allows it (see
+        config_merge). When hunks overlap, or the file cannot be merged (type,
+        symlink or undecodable text), the local copy is kept and the merged or
+        incoming version is written beside it as <path>.update. With
+        merge_local=False, incoming always wins.
+        """
+        target = self.fetch()
+        head = self.repo.head.commit
+        result = GitUpdateResult(head.hexsha, target.hexsha)
+        if head == target:
+            return result
+        if not self.repo.is_ancestor(head, target):
+            raise GitUpdateError(f"HEAD has commits that are not on {self.remote}/{self.branch}; merge manually")
+
+        # Read every incoming blob before the first write
+        changes = [(change, change.target.data_stream.read() if change.target is not None else None)
+                   for change in self.changed_files(target)
+                   if (change.target if change.target is not None else change.base).mode != _SUBMODULE_MODE]
+
+        for change, data in changes:
+            path = self.root / change.path
+            modified = merge_local and self.is_locally_modified(change)
+
+            if data is None:
+                if modified:
+                    result.kept.append(change.path)
+                else:
+                    if path.exists() or path.is_symlink():
+                        path.unlink()
+                    result.deleted.append(change.path)
+                continue
+
+            if not modified:
+                self._write(path, change.target, data)
+                result.written.append(change.path)
+            else:
+                merged = self._merge(change, path, data)
+                incoming = path.with_name(path.name + INCOMING_SUFFIX)
+                if merged is None:
+                    self._write(incoming, change.target, data)
+                    result.kept.append(change.path)
+                elif merged[1]:
+                    atomic_write(incoming, merged[0].encode())
+                    result.conflicts.append(change.path)
+                else:
+                    atomic_write(path, merged[0].encode())
+                    result.merged.append(change.path)
+
+        # Point the branch and index at the target; the worktree is already there
+        self.repo.head.reset(target, index=True, working_tree=False)
+        return result
+
+    def _merge(self, change: FileChange, path: Path, data: bytes) -> Optional[Tuple[str, int]]:
+        """Three-way merge of a local edit, or None if the file cannot be merged as UTF-8 text"""
+        if (change.base is None or not path.is_file() or path.is_symlink()
+                or change.target.mode == _SYMLINK_MODE or not is_mergeable(change.path)):
+            return None
+        try:
+            return merge_config_text(change.base.data_stream.read().decode('utf-8'),
+                                     path.read_bytes().decode('utf-8'),
+                                     data.decode('utf-8'))
+        except UnicodeDecodeError:
+            return None
+
+    @staticmethod
+    def _write(path: Path, blob: git.Blob, data: bytes):
+        if blob.mode == _SYMLINK_MODE:
+            if path.exists() or path.is_symlink():
+                path.unlink()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.symlink(data.decode(), path)
+        else:
+            if path.is_symlink():
+                path.unlink()
+            atomic_write(path, data, mode=0o755 if blob.mode & 0o111 else 0o644)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental git update of a worktree")
+    parser.add_argument('repo', nargs='?', default=str(Path(__file__).parent.parent), help="Repository path")
+    parser.add_argument('--remote', default='origin')
+    parser.add_argument('--branch', default='main')
+    parser.add_argument('--apply', action='store_true', help="Update the worktree")
+    args = parser.parse_args()
+
+    updater = GitUpdater(Path(args.repo), args.remote, args.branch)
+    count, lines = updater.pending()
+    print(f"{count} commit(s) behind {args.remote}/{args.branch}")
+    for line in lines:
+        print(f"  {line}")
+    if args.apply and count:
+        result = updater.apply()
+        print(f"wrote {len(result.written)}, deleted {len(result.deleted)}, merged {len(result.merged)} "
+              f"({len(result.conflicts)} with conflicts), kept {len(result.kept)}")
+
+
+if __name__ == '__main__':
+    main()
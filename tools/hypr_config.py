@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Hyprland Config Parser
+Parses hyprland.conf into an AST, follows source includes and answers queries
+"""
+
+import os
+import re
+import glob
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, field
+
+TRUE_VALUES = {'true', 'yes', 'on', '1'}
+FALSE_VALUES = {'false', 'no', 'off', '0'}
+
+_VARIABLE = re.compile(r'\$([A-Za-z0-9_]+)')
+
+
+@dataclass
+class Assignment:
+    """``key = value`` inside the given section path"""
+    key: str
+    value: str
+    line: int
+
+
+@dataclass
+class Variable:
+    """``$name = value``"""
+    name: str
+    value: str
+    line: int
+
+
+@dataclass
+class Source:
+    """``source = path``; the path is resolved against the sourcing file"""
+    path: str
+    line: int
+
+
+@dataclass
+class Section:
+    """``name { ... }`` block, possibly nested"""
+    name: str
+    line: int
+    body: List['Node'] = field(default_factory=list)
+
+
+Node = Union[Assignment, Variable, Source, Section]
+
+
+@dataclass
+class ConfigFile:
+    """Parsed form of one file; does not depend on any other file"""
+    path: Path
+    body: List[Node]
+    errors: List[Tuple[int, str]]
+
+
+@dataclass
+class Entry:
+    """One resolved keyword: full ``section:key`` name and expanded value"""
+    key: str
+    value: str
+    file: Path
+    line: int
+
+
+def _strip_comment(line: str) -> str:
+    """Drop a trailing comment; '##' is Hyprland's escape for a literal '#'"""
+    out = []
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char == '#':
+            if line[i + 1:i + 2] == '#':
+                out.append('#')
+                i += 2
+                continue
+            break
+        out.append(char)
+        i += 1
+    return ''.join(out).strip()
+
+
+def parse_config(text: str, path: Path = Path("<config>")) -> ConfigFile:
+    """Parse Hyprland config text into a ConfigFile without resolving anything"""
+    root: List[Node] = []
+    stack: List[Section] = []
+    errors: List[Tuple[int, str]] = []
+
+    for number, raw_line in enumerate(text.splitlines(), 1):
+        line = _strip_comment(raw_line)
+        while line:
+            body = stack[-1].body if stack else root
+            if line.startswith('}'):
+                if stack:
+                    stack.pop()
+                else:
+                    errors.append((number, "unmatched '}'"))
+                line = line[1:].strip()
+                continue
+            brace, equals = line.find('{'), line.find('=')
+            if brace != -1 and (equals == -1 or brace < equals):
+                section = Section(line[:brace].strip(), number)
+                if not section.name:
+                    errors.append((number, "section without a name"))
+                body.append(section)
+                stack.append(section)
+                line = line[brace + 1:].strip()
+                continue
+            if '=' not in line:
+                errors.append((number, f"expected 'key = value', got '{line}'"))
+                break
+
+            key, value = (part.strip() for part in line.split('=', 1))
+            # One-line sections such as 'blur { enabled = true }' close on the same line
+            trailing = ''
+            if value.endswith('}') and stack and '{' not in value:
+                value, trailing = value[:-1].strip(), '}'
+            if key.startswith('$'):
+                body.append(Variable(key[1:], value, number))
+            elif key == 'source':
+                body.append(Source(value, number))
+            elif key:
+                body.append(Assignment(key, value, number))
+            else:
+                errors.append((number, "missing keyword before '='"))
+            line = trailing
+
+    for section in stack:
+        errors.append((section.line, f"section '{section.name}' is never closed"))
+    return ConfigFile(path, root, errors)
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class HyprConfig:
+    """Resolved configuration: every file sourced from the root, variables expanded"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.entries: List[Entry] = []
+        self.variables: Dict[str, str] = {}
+        self.files: List[Path] = []
+        self.errors: List[str] = []
+        self._index: Dict[str, List[Entry]] = {}
+
+    def _add(self, entry: Entry):
+        self.entries.append(entry)
+        self._index.setdefault(entry.key, []).append(entry)
+
+    def expand(self, value: str) -> str:
+        """Substitute $variables known so far; unknown ones are left as-is"""
+        if '$' not in value:
+            return value
+        return _VARIABLE.sub(lambda m: self.variables.get(m.group(1), m.group(0)), value)
+
+    def has(self, key: str) -> bool:
+        return key in self._index
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Effective value of a keyword (the last assignment wins)"""
+        entries = self._index.get(key)
+        return entries[-1].value if entries else default
+
+    def get_all(self, key: str) -> List[str]:
+        """Every value of a repeatable keyword such as 'bind', 'env' or 'exec-once'"""
+        return [entry.value for entry in self._index.get(key, [])]
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key)
+        if value is None:
+            return default
+        value = value.lower()
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        return default
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        try:
+            return float(self.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    def keys(self, prefix: str = '') -> List[str]:
+        """Keywords set under a section, e.g. keys('decoration:blur')"""
+        if not prefix:
+            return list(self._index)
+        prefix = prefix.rstrip(':') + ':'
+        return [key for key in self._index if key.startswith(prefix)]
+
+    def section(self, prefix: str) -> Dict[str, str]:
+        """Effective values under a section, keyed relative to it"""
+        offset = len(prefix.rstrip(':')) + 1
+        return {key[offset:]: self.get(key) for key in self.keys(prefix)}
+
+    def env(self) -> Dict[str, str]:
+        """Environment from 'env = NAME,value' lines"""
+        result = {}
+        for value in self.get_all('env'):
+            name, _, env_value = value.partition(',')
+            result[name.strip()] = env_value.strip()
+        return result
+
+
+class HyprConfigParser:
+    """Loads configs with a per-file AST cache keyed on mtime and size.
+
+    Resolved configs are cached too and reused while none of the files
+    they were built from (including missing source targets) change.
+
+    With ``read``, every file's text comes from that callable instead
+    (None for unreadable files) and nothing is cached or stat()ed; the
+    caller owns the text cache and decides how long it stays valid.
+    """
+
+    def __init__(self, read: Optional[Callable[[Path], Optional[str]]] = None):
+        self._read = read
+        self._files: Dict[Path, Tuple[Tuple[int, int], ConfigFile]] = {}
+        self._resolved: Dict[Path, Tuple[Dict[Path, Optional[Tuple[int, int]]], HyprConfig]] = {}
+        self._lock = threading.Lock()
+
+    def parse_file(self, path: Path) -> Optional[ConfigFile]:
+        """Cached AST for one file, or None if it cannot be read"""
+        path = Path(path)
+        if self._read is not None:
+            text = self._read(path)
+            return None if text is None else parse_config(text, path)
+        key = _stat_key(path)
+        if key is None:
+            return None
+        cached = self._files.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        try:
+            text = path.read_text(errors='replace')
+        except OSError:
+            return None
+        parsed = parse_config(text, path)
+        with self._lock:
+            self._files[path] = (key, parsed)
+        return parsed
+
+    def load(self, path: Path) -> HyprConfig:
+        """Resolved config rooted at path, following 'source' includes"""
+        path = Path(path).expanduser()
+        cached = self._resolved.get(path)
+        if cached and self._read is None and all(_stat_key(p) == key for p, key in cached[0].items()):
+            return cached[1]
+
+        config = HyprConfig(path)
+        deps: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._resolve(path, config, deps, [])
+        if self._read is None:
+            with self._lock:
+                self._resolved[path] = (deps, config)
+        return config
+
+    def _dep_key(self, path: Path) -> Optional[Tuple[int, int]]:
+        return None if self._read is not None else _stat_key(path)
+
+    def _resolve(self, path: Path, config: HyprConfig, deps: Dict, stack: List[Path]):
+        deps[path] = self._dep_key(path)
+        parsed = self.parse_file(path)
+        if parsed is None:
+            config.errors.append(f"{path}: cannot be read")
+            return
+        config.files.append(path)
+        config.errors.extend(f"{path}:{line}: {message}" for line, message in parsed.errors)
+        self._walk(parsed.body, [], path, config, deps, stack + [path])
+
+    def _walk(self, body: List[Node], sections: List[str], path: Path,
+              config: HyprConfig, deps: Dict, stack: List[Path]):
+        for node in body:
+            if isinstance(node, Section):
+                self._walk(node.body, sections + [node.name], path, config, deps, stack)
+            elif isinstance(node, Variable):
+                config.variables[node.name] = config.expand(node.value)
+            elif isinstance(node, Assignment):
+                key = ':'.join(sections + [node.key])
+                config._add(Entry(key, config.expand(node.value), path, node.line))
+            elif isinstance(node, Source):
+                for target in self._source_targets(config.expand(node.path), path, deps):
+                    if target in stack:
+                        config.errors.append(f"{path}:{node.line}: source cycle through {target}")
+                    else:
+                        self._resolve(target, config, deps, stack)
+
+    def _source_targets(self, value: str, path: Path, deps: Dict) -> List[Path]:
+        pattern = os.path.expandvars(os.path.expanduser(value))
+        if not os.path.isabs(pattern):
+            pattern = str(path.parent / pattern)
+        if glob.has_magic(pattern):
+            # A new match must invalidate the resolved config, so watch the directory
+            directory = Path(pattern).parent
+            deps[directory] = self._dep_key(directory)
+            return [Path(p) for p in sorted(glob.glob(pattern))]
+        return [Path(pattern)]
+
+
+_default_parser = HyprConfigParser()
+
+
+def load_config(path: Path) -> HyprConfig:
+    """Resolved config from the shared, process-wide cache"""
+    return _default_parser.load(path)
+
+
+def main():
+    import sys
+    import json
+
+    if len(sys.argv) < 2:
+        print("Usage: hypr_config.py <hyprland.conf> [key]")
+        sys.exit(1)
+
+    config = load_config(Path(sys.argv[1]))
+    if len(sys.argv) > 2:
+        print(json.dumps(config.get_all(sys.argv[2])))
+    else:
+        for entry in config.entries:
+            print(f"{entry.key} = {entry.value}")
+    for error in config.errors:
+        print(f"error: {error}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,20 +5,26 @@ Synchronize configurations across devices using cloud storage
 """
 
 import os
+import io
+import re
 import sys
 import json
 import hashlib
 import sqlite3
-import requests
 import tarfile
 import tempfile
 import uuid
 import time
 import hmac
+import atexit
+import threading
+import weakref
+import shutil
+import subprocess
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 # Optional cryptography imports - graceful fallback
 try:
     from cryptography.fernet import Fernet
@@ -41,6 +47,17 @@ except ImportError:
     
     AESGCM = MockAESGCM
 
+# Bump when the search catalogue layout changes to force a rebuild
+PROFILE_CATALOGUE_VERSION = "1"
+
+# Bump whenever init_database changes so existing databases get migrated
+CLOUD_SCHEMA_VERSION = 2
+
+# Shared merge helpers live next to this script
+sys.path.append(str(Path(__file__).parent))
+from config_merge import INCOMING_SUFFIX, is_mergeable, merge_config_text, atomic_write
+# retention, preset_compiler and hypr_config are imported where used, keeping CLI start-up light
+
 @dataclass
 class ConfigProfile:
     """Configuration profile data structure"""
@@ -61,6 +78,131 @@ class ConfigProfile:
     rating: float = 0.0
     public: bool = False
 
+@dataclass
+class ProfileApplyResult:
+    """Per-file outcome of applying a profile"""
+    written: List[str] = field(default_factory=list)
+    merged: List[str] = field(default_factory=list)  # local and profile edits combined
+    conflicts: List[str] = field(default_factory=list)  # local kept; profile version saved beside it
+    kept: List[str] = field(default_factory=list)  # only changed locally
+    unchanged: List[str] = field(default_factory=list)
+
+class KeyringCache:
+    """Short-lived cache for derived keys in the kernel user keyring
+    
+    Uses keyutils' keyctl so the key survives across CLI invocations
+    without touching disk, and expires on its own after the TTL. When
+    keyctl is unavailable the cache is a no-op.
+    """
+    
+    def __init__(self, ttl: int = 900):
+        self.ttl = ttl
+        self.keyctl = shutil.which('keyctl') if ttl > 0 else None
+        
+    @property
+    def available(self) -> bool:
+        return self.keyctl is not None
+        
+    def get(self, name: str) -> Optional[bytes]:
+        """Look up a cached key, None if missing or expired"""
+        if not self.available:
+            return None
+            
+        try:
+            result = subprocess.run(
+                [self.keyctl, 'search', '@u', 'user', name],
+                capture_output=True, text=True, timeout=2
+            )
+            if result.returncode != 0:
+                return None
+                
+            result = subprocess.run(
+                [self.keyctl, 'pipe', result.stdout.strip()],
+                capture_output=True, timeout=2
+            )
+            return result.stdout if result.returncode == 0 and result.stdout else None
+        except Exception:
+            return None
+            
+    def put(self, name: str, key: bytes):
+        """Store a key with the configured TTL"""
+        if not self.available:
+            return
+            
+        try:
+            result = subprocess.run(
+                [self.keyctl, 'padd', 'user', name, '@u'],
+                input=key, capture_output=True, timeout=2
+            )
+            if result.returncode == 0:
+                key_serial = result.stdout.decode().strip()
+                subprocess.run(
+                    [self.keyctl, 'timeout', key_serial, str(self.ttl)],
+                    capture_output=True, timeout=2
+                )
+        except Exception:
+            pass
+
+class SyncHistoryWriter:
+    """Buffers sync history events and profile sync timestamps
+    
+    Events are written in a single transaction once ``batch_size`` is
+    reached, on explicit flush() and at interpreter exit.
+    """
+    
+    _instances = weakref.WeakSet()
+    
+    def __init__(self, db_path: Path, batch_size: int = 50):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.events = []
+        self.synced_at = {}
+        self.lock = threading.Lock()
+        SyncHistoryWriter._instances.add(self)
+        
+    def log(self, profile_id: str, action: str, success: bool, error_message: str = None):
+        """Queue a history event"""
+        with self.lock:
+            self.events.append((profile_id, action, datetime.now().isoformat(), success, error_message))
+            full = len(self.events) >= self.batch_size
+        if full:
+            self.flush()
+            
+    def touch(self, profile_id: str):
+        """Queue a synced_at update for a profile"""
+        with self.lock:
+            self.synced_at[profile_id] = datetime.now().isoformat()
+            
+    def flush(self):
+        """Write all queued events and timestamps in one transaction"""
+        with self.lock:
+            events, self.events = self.events, []
+            synced_at, self.synced_at = self.synced_at, {}
+            
+        if not events and not synced_at:
+            return
+            
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany(
+                    "INSERT INTO sync_history (profile_id, action, timestamp, success, error_message) VALUES (?, ?, ?, ?, ?)",
+                    events
+                )
+                conn.executemany(
+                    "UPDATE profiles SET synced_at = ? WHERE id = ?",
+                    [(timestamp, profile_id) for profile_id, timestamp in synced_at.items()]
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write sync history: {e}")
+            
+    @classmethod
+    def flush_all(cls):
+        """Flush every live writer"""
+        for writer in list(cls._instances):
+            writer.flush()
+
+atexit.register(SyncHistoryWriter.flush_all)
+
 class HyprSupremeCloud:
     """Cloud sync manager for HyprSupreme configurations with advanced encryption"""
     
@@ -73,9 +215,11 @@ class HyprSupremeCloud:
         self.cache_dir = self.config_dir / "cache"
         self.encrypted_cache_dir = self.config_dir / "encrypted_cache"
         self.keys_dir = self.config_dir / "keys"
+        self.applied_base_dir = self.config_dir / "applied_base"
+        self._presets = None
         
         # Create directories with secure permissions
-        for directory in [self.cache_dir, self.encrypted_cache_dir, self.keys_dir]:
+        for directory in [self.cache_dir, self.encrypted_cache_dir, self.keys_dir, self.applied_base_dir]:
             directory.mkdir(exist_ok=True, mode=0o700)
         
         # Cloud endpoints (would be actual API endpoints)
@@ -92,17 +236,49 @@ class HyprSupremeCloud:
         self.device_id = self.get_or_create_device_id()
         self.device_name = self.settings.get('device_name', self.get_default_device_name())
         
-        # Encryption components
-        self.master_key = self.get_or_create_master_key()
-        self.device_keypair = self.get_or_create_device_keypair()
-        if ENCRYPTION_AVAILABLE:
-            self.aes_gcm = AESGCM(self.master_key)
-        else:
-            self.aes_gcm = MockAESGCM(self.master_key)
+        # Sync history is buffered and written in batches
+        self.history = SyncHistoryWriter(self.db_path, self.settings.get('history_batch_size', 50))
+        
+        # Encryption components are loaded on first use, see properties below
+        self.key_cache = KeyringCache(self.settings.get('key_cache_ttl', 900))
+        self._master_key = None
+        self._device_keypair = None
+        self._aes_gcm = None
+        
+    @property
+    def master_key(self) -> bytes:
+        """Master encryption key, derived on first use"""
+        if self._master_key is None:
+            self._master_key = self.get_or_create_master_key()
+        return self._master_key
+        
+    @property
+    def device_keypair(self) -> Tuple[bytes, bytes]:
+        """Device RSA keypair, loaded or generated on first use"""
+        if self._device_keypair is None:
+            self._device_keypair = self.get_or_create_device_keypair()
+        return self._device_keypair
+        
+    @property
+    def aes_gcm(self):
+        """AES-GCM cipher bound to the master key"""
+        if self._aes_gcm is None:
+            if ENCRYPTION_AVAILABLE:
+                self._aes_gcm = AESGCM(self.master_key)
+            else:
+                self._aes_gcm = MockAESGCM(self.master_key)
+        return self._aes_gcm
         
     def init_database(self):
         """Initialize local database for caching and tracking"""
         with sqlite3.connect(self.db_path) as conn:
+            # Schema is current, skip the DDL on the startup path
+            if conn.execute("PRAGMA user_version").fetchone()[0] == CLOUD_SCHEMA_VERSION:
+                self.fts_available = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'profiles_fts'"
+                ).fetchone() is not None
+                return
+                
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS profiles (
                     id TEXT PRIMARY KEY,
@@ -140,11 +316,124 @@ class HyprSupremeCloud:
                     value TEXT
                 );
                 
+                CREATE TABLE IF NOT EXISTS profile_files (
+                    profile_id TEXT,
+                    path TEXT,  -- archive member name
+                    checksum TEXT,  -- SHA256 of file content
+                    size INTEGER,
+                    PRIMARY KEY (profile_id, path),
+                    FOREIGN KEY (profile_id) REFERENCES profiles (id)
+                );
+                
+                CREATE TABLE IF NOT EXISTS applied_files (
+                    path TEXT PRIMARY KEY,  -- archive member name
+                    checksum TEXT,  -- content as last applied (merge base)
+                    profile_id TEXT,
+                    applied_at TEXT
+                );
+                
+                CREATE TABLE IF NOT EXISTS profile_tags (
+                    profile_id TEXT,
+                    tag TEXT,  -- normalized (lowercase, trimmed)
+                    PRIMARY KEY (profile_id, tag),
+                    FOREIGN KEY (profile_id) REFERENCES profiles (id)
+                );
+                
+                CREATE TABLE IF NOT EXISTS profile_facets (
+                    profile_id TEXT,
+                    facet TEXT,  -- component, feature
+                    value TEXT,
+                    PRIMARY KEY (profile_id, facet, value),
+                    FOREIGN KEY (profile_id) REFERENCES profiles (id)
+                );
+                
+                -- JSON string column, never usable for tag lookups
+                DROP INDEX IF EXISTS idx_profiles_tags;
+                
                 CREATE INDEX IF NOT EXISTS idx_profiles_author ON profiles(author);
-                CREATE INDEX IF NOT EXISTS idx_profiles_tags ON profiles(tags);
-                CREATE INDEX IF NOT EXISTS idx_sync_history_profile ON sync_history(profile_id);
+                CREATE INDEX IF NOT EXISTS idx_profile_tags_tag ON profile_tags(tag);
+                CREATE INDEX IF NOT EXISTS idx_profile_facets_value ON profile_facets(facet, value);
+                CREATE TABLE IF NOT EXISTS sync_history_daily (
+                    day TEXT,  -- YYYY-MM-DD
+                    profile_id TEXT,
+                    action TEXT,
+                    success_count INTEGER DEFAULT 0,
+                    failure_count INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    PRIMARY KEY (day, profile_id, action)
+                );
+                
+                -- Superseded by the composite index below
+                DROP INDEX IF EXISTS idx_sync_history_profile;
+                CREATE INDEX IF NOT EXISTS idx_sync_history_profile_time ON sync_history(profile_id, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_sync_history_time ON sync_history(timestamp);
             """)
             
+            # Full-text catalogue, falls back to LIKE search without FTS5
+            try:
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS profiles_fts USING fts5(
+                        profile_id UNINDEXED, name, description, tags,
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                """)
+                self.fts_available = True
+            except sqlite3.OperationalError:
+                self.fts_available = False
+                
+            # Backfill catalogue for profiles saved before it existed
+            row = conn.execute(
+                "SELECT value FROM user_settings WHERE key = 'profile_catalogue_version'"
+            ).fetchone()
+            if not row or row[0] != PROFILE_CATALOGUE_VERSION:
+                self._rebuild_profile_catalogue(conn)
+                conn.execute(
+                    "INSERT OR REPLACE INTO user_settings (key, value) VALUES ('profile_catalogue_version', ?)",
+                    (PROFILE_CATALOGUE_VERSION,)
+                )
+                
+            conn.execute(f"PRAGMA user_version = {CLOUD_SCHEMA_VERSION}")
+                
+    def _rebuild_profile_catalogue(self, conn: sqlite3.Connection):
+        """Rebuild tag, facet and full-text tables from the profiles table"""
+        conn.execute("DELETE FROM profile_tags")
+        conn.execute("DELETE FROM profile_facets")
+        if self.fts_available:
+            conn.execute("DELETE FROM profiles_fts")
+            
+        cursor = conn.execute("SELECT id, name, description, tags, components, features FROM profiles")
+        for profile_id, name, description, tags, components, features in cursor.fetchall():
+            self._index_profile(
+                conn, profile_id, name, description,
+                json.loads(tags or '[]'), json.loads(components or '[]'), json.loads(features or '[]')
+            )
+            
+    def _index_profile(self, conn: sqlite3.Connection, profile_id: str, name: str, description: str,
+                       tags: List[str], components: List[str], features: List[str]):
+        """Write one profile into the search catalogue"""
+        normalized_tags = sorted({tag.strip().lower() for tag in tags if tag and tag.strip()})
+        
+        conn.execute("DELETE FROM profile_tags WHERE profile_id = ?", (profile_id,))
+        conn.execute("DELETE FROM profile_facets WHERE profile_id = ?", (profile_id,))
+        
+        conn.executemany(
+            "INSERT INTO profile_tags (profile_id, tag) VALUES (?, ?)",
+            [(profile_id, tag) for tag in normalized_tags]
+        )
+        facets = {('component', value) for value in components}
+        facets.update(('feature', value) for value in features)
+        conn.executemany(
+            "INSERT INTO profile_facets (profile_id, facet, value) VALUES (?, ?, ?)",
+            [(profile_id, facet, value) for facet, value in facets]
+        )
+        
+        if self.fts_available:
+            conn.execute("DELETE FROM profiles_fts WHERE profile_id = ?", (profile_id,))
+            conn.execute(
+                "INSERT INTO profiles_fts (profile_id, name, description, tags) VALUES (?, ?, ?, ?)",
+                (profile_id, name, description or '', ' '.join(normalized_tags))
+            )
+            
     def load_settings(self) -> Dict:
         """Load cloud sync settings"""
         default_settings = {
@@ -156,7 +445,17 @@ class HyprSupremeCloud:
             'api_endpoint': self.api_base,
             'username': '',
             'api_key': '',
-            'last_sync': None
+            'last_sync': None,
+            'key_cache_ttl': 900,  # seconds, 0 disables the keyring cache
+            'history_batch_size': 50,
+            'history_retention_days': 30,  # older events are compacted to daily totals
+            'retention': {
+                'keep_last': 5,
+                'keep_daily': 7,
+                'keep_weekly': 4,
+                'max_total_mb': 0,
+                'include_named_profiles': False
+            }
         }
         
         try:
@@ -223,17 +522,7 @@ class HyprSupremeCloud:
                 with open(salt_file, 'rb') as f:
                     salt = f.read()
                 
-                # In real implementation, would prompt for passphrase
-                # For demo, using device-specific data as passphrase source
-                passphrase = f"{self.device_id}:{os.getlogin()}".encode()
-                
-                kdf = PBKDF2HMAC(
-                    algorithm=hashes.SHA256(),
-                    length=32,
-                    salt=salt,
-                    iterations=100000,
-                )
-                key = kdf.derive(passphrase)
+                key = self._derive_key_encryption_key(salt)
                 
                 # Decrypt and return master key
                 f = Fernet(base64.urlsafe_b64encode(key))
@@ -247,14 +536,7 @@ class HyprSupremeCloud:
         
         try:
             # Derive encryption key from passphrase
-            passphrase = f"{self.device_id}:{os.getlogin()}".encode()
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-            )
-            derived_key = kdf.derive(passphrase)
+            derived_key = self._derive_key_encryption_key(salt)
             
             # Encrypt master key
             f = Fernet(base64.urlsafe_b64encode(derived_key))
@@ -273,6 +555,29 @@ class HyprSupremeCloud:
         
         return master_key
     
+    def _derive_key_encryption_key(self, salt: bytes) -> bytes:
+        """Derive the key that wraps the master key, cached in the keyring"""
+        cache_name = f"hyprsupreme:{self.device_id}:{hashlib.sha256(salt).hexdigest()[:16]}"
+        
+        cached = self.key_cache.get(cache_name)
+        if cached and len(cached) == 32:
+            return cached
+            
+        # In real implementation, would prompt for passphrase
+        # For demo, using device-specific data as passphrase source
+        passphrase = f"{self.device_id}:{os.getlogin()}".encode()
+        
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=100000,
+        )
+        key = kdf.derive(passphrase)
+        
+        self.key_cache.put(cache_name, key)
+        return key
+        
     def get_or_create_device_keypair(self) -> Tuple[bytes, bytes]:
         """Get or create RSA keypair for device authentication"""
         if not ENCRYPTION_AVAILABLE:
@@ -487,10 +792,11 @@ class HyprSupremeCloud:
         
         # Create archive
         archive_path = self.cache_dir / f"{profile_id}.tar.gz"
-        self.create_config_archive(config_files, archive_path)
+        file_index = self.create_config_archive(config_files, archive_path)
         
         # Calculate checksum
         checksum = self.calculate_checksum(archive_path)
+        features = self.detect_features()
         
         # Create profile
         profile = ConfigProfile(
@@ -503,8 +809,8 @@ class HyprSupremeCloud:
             updated_at=datetime.now().isoformat(),
             tags=tags or [],
             components=self.detect_components(),
-            features=self.detect_features(),
-            preset="custom",
+            features=features,
+            preset=self.detect_preset(features),
             checksum=checksum,
             size=archive_path.stat().st_size,
             public=public
@@ -512,6 +818,7 @@ class HyprSupremeCloud:
         
         # Save to database
         self.save_profile_to_db(profile, str(archive_path))
+        self.save_profile_file_index(profile_id, file_index)
         
         return profile_id
         
@@ -560,14 +867,27 @@ class HyprSupremeCloud:
                             
         return files_to_sync
         
-    def create_config_archive(self, files: List[Tuple[str, str]], output_path: Path):
-        """Create compressed archive of configuration files"""
+    def create_config_archive(self, files: List[Tuple[str, str]], output_path: Path) -> Dict[str, Tuple[str, int]]:
+        """Create compressed archive of configuration files
+        
+        Returns the archive's hash index: member name -> (sha256, size).
+        """
+        file_index = {}
         with tarfile.open(output_path, 'w:gz', compresslevel=self.settings['compression_level']) as tar:
             for rel_path, abs_path in files:
                 try:
-                    tar.add(abs_path, arcname=rel_path)
+                    info = tar.gettarinfo(abs_path, arcname=rel_path)
+                    if info.isfile():
+                        # Read once, hash and archive the same bytes
+                        data = Path(abs_path).read_bytes()
+                        info.size = len(data)
+                        tar.addfile(info, io.BytesIO(data))
+                        file_index[rel_path] = (hashlib.sha256(data).hexdigest(), len(data))
+                    else:
+                        tar.addfile(info)
                 except Exception as e:
                     print(f"Warning: Could not add {abs_path}: {e}")
+        return file_index
                     
     def calculate_checksum(self, file_path: Path) -> str:
         """Calculate SHA256 checksum of file"""
@@ -603,26 +923,52 @@ class HyprSupremeCloud:
         # Check Hyprland config for features
         hypr_config = Path.home() / ".config/hypr/hyprland.conf"
         if hypr_config.exists():
+            from hypr_config import load_config
+            
             try:
-                content = hypr_config.read_text()
+                config = load_config(hypr_config)
                 
-                # Simple feature detection
-                if "animation" in content:
+                # A feature counts when the config sets it up and does not turn it off
+                if config.keys('animations') and config.get_bool('animations:enabled', True):
                     features.append("animations")
-                if "blur" in content:
+                if ((config.has('decoration:blur') or config.keys('decoration:blur')) and
+                        config.get_bool('decoration:blur:enabled', config.get_bool('decoration:blur', True))):
                     features.append("blur")
-                if "shadow" in content:
+                if ((config.keys('decoration:shadow') and config.get_bool('decoration:shadow:enabled', True)) or
+                        config.get_bool('decoration:drop_shadow')):
                     features.append("shadows")
-                if "rounding" in content:
+                if config.get_float('decoration:rounding') > 0:
                     features.append("rounded")
-                if "opacity" in content:
+                if any(config.get_float(f'decoration:{key}', 1.0) < 1.0
+                       for key in ('active_opacity', 'inactive_opacity', 'fullscreen_opacity')):
                     features.append("transparency")
                     
             except Exception as e:
                 print(f"Warning: Could not read Hyprland config: {e}")
                 
+        # Order like the presets declare them, so profiles match preset feature lists
+        vocabulary = []
+        for preset in self.load_presets().values():
+            vocabulary.extend(f for f in preset['features'] if f not in vocabulary)
+        features.sort(key=lambda f: vocabulary.index(f) if f in vocabulary else len(vocabulary))
+        
         return features
         
+    def load_presets(self) -> Dict[str, Dict]:
+        """Compiled presets, flattened and cached by the preset compiler"""
+        if self._presets is None:
+            from preset_compiler import PresetCompiler
+            
+            self._presets = PresetCompiler(cache_dir=self.cache_dir / "presets").load_all()
+        return self._presets
+        
+    def detect_preset(self, features: List[str]) -> str:
+        """Name of the preset whose feature set matches exactly, else 'custom'"""
+        for name, preset in self.load_presets().items():
+            if set(preset['features']) == set(features):
+                return name
+        return "custom"
+        
     def save_profile_to_db(self, profile: ConfigProfile, local_path: str):
         """Save profile to local database"""
         with sqlite3.connect(self.db_path) as conn:
@@ -640,7 +986,40 @@ class HyprSupremeCloud:
                 profile.size, profile.downloads, profile.rating, profile.public,
                 local_path, None
             ))
+            self._index_profile(
+                conn, profile.id, profile.name, profile.description,
+                profile.tags, profile.components, profile.features
+            )
+            
+    def save_profile_file_index(self, profile_id: str, file_index: Dict[str, Tuple[str, int]]):
+        """Save the per-file hash index of a profile archive"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM profile_files WHERE profile_id = ?", (profile_id,))
+            conn.executemany(
+                "INSERT INTO profile_files (profile_id, path, checksum, size) VALUES (?, ?, ?, ?)",
+                [(profile_id, path, checksum, size) for path, (checksum, size) in file_index.items()]
+            )
+            
+    def get_profile_file_index(self, profile_id: str) -> Dict[str, str]:
+        """Get the per-file hash index of a profile archive"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                "SELECT path, checksum FROM profile_files WHERE profile_id = ?", (profile_id,)
+            )
+            return dict(cursor.fetchall())
             
+    def build_profile_file_index(self, profile_id: str, archive_path: Path) -> Dict[str, str]:
+        """Build and store the hash index for an archive that has none"""
+        file_index = {}
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            for member in tar:
+                if member.isfile():
+                    data = tar.extractfile(member).read()
+                    file_index[member.name] = (hashlib.sha256(data).hexdigest(), len(data))
+                    
+        self.save_profile_file_index(profile_id, file_index)
+        return {path: checksum for path, (checksum, _) in file_index.items()}
+        
     def upload_profile(self, profile_id: str) -> bool:
         """Upload profile to cloud"""
         try:
@@ -698,41 +1077,214 @@ class HyprSupremeCloud:
             self.log_sync_action(profile_id, "download", False, str(e))
             return False
             
-    def apply_profile(self, profile_id: str) -> bool:
-        """Apply downloaded profile configuration"""
+    def apply_profile(self, profile_id: str, overwrite_local: bool = False) -> bool:
+        """Apply downloaded profile configuration
+        
+        Local edits are never replaced unless overwrite_local is set; see
+        merge_profile for how each file is handled. Returns False if any
+        file could not be applied because of conflicting local edits.
+        """
         try:
-            profile = self.get_profile_from_db(profile_id)
-            if not profile:
-                raise ValueError(f"Profile {profile_id} not found")
+            result = self.merge_profile(profile_id, overwrite_local)
+        except Exception as e:
+            print(f"Apply failed: {e}")
+            return False
+            
+        print(f"  Written: {len(result.written)}, Merged: {len(result.merged)}, "
+              f"Conflicts: {len(result.conflicts)}, Kept local: {len(result.kept)}, "
+              f"Unchanged: {len(result.unchanged)}")
+        for path in result.conflicts:
+            print(f"  ⚠ {path}: local edits kept, profile version saved as {path}{INCOMING_SUFFIX}")
+        if result.conflicts:
+            print(f"Profile {profile_id} only partly applied; resolve the {INCOMING_SUFFIX} files "
+                  f"or re-apply with --overwrite")
+            return False
+        return True
+        
+    def merge_profile(self, profile_id: str, overwrite_local: bool = False) -> ProfileApplyResult:
+        """Three-way apply of a profile onto the files on disk
+        
+        Uses the last applied state (base), the files on disk (local) and
+        the profile (incoming). Only files that differ are written, and
+        only those are backed up. Files edited on both sides are merged
+        block by block; when the edits overlap, or there is no base to
+        merge against (such as on the first apply), the local file is kept
+        and the merged or incoming version is written beside it with the
+        INCOMING_SUFFIX. With overwrite_local, the profile always wins.
+        """
+        profile = self.get_profile_from_db(profile_id)
+        if not profile:
+            raise ValueError(f"Profile {profile_id} not found")
+            
+        print(f"Applying profile: {profile['name']}")
+        archive_path = Path(profile['local_path'])
+        
+        incoming = self.get_profile_file_index(profile_id)
+        if not incoming:
+            incoming = self.build_profile_file_index(profile_id, archive_path)
+        base = self.get_applied_file_index()
+        
+        plan = self.plan_profile_apply(incoming, base)
+        changes = {path: action for path, action in plan.items() if action in ('write', 'merge')}
+        
+        # Backup only the files that may be overwritten
+        if changes and self.settings['backup_before_sync']:
+            overwritten = [
+                (path, str(self.resolve_profile_path(path)))
+                for path in changes
+                if self.resolve_profile_path(path).exists()
+            ]
+            if overwritten:
+                backup_id = self.create_partial_backup(overwritten)
+                print(f"Created backup: {backup_id} ({len(overwritten)} files)")
                 
-            archive_path = Path(profile['local_path'])
+        result = ProfileApplyResult(
+            kept=[path for path, action in plan.items() if action == 'keep'],
+            unchanged=[path for path, action in plan.items() if action == 'unchanged']
+        )
+        
+        if changes:
+            with tarfile.open(archive_path, 'r:gz') as tar:
+                for member in tar:
+                    if not member.isfile() or member.name not in changes:
+                        continue
+                    target = self.resolve_profile_path(member.name)
+                    data = tar.extractfile(member).read()
+                    mode = member.mode & 0o7777
+                    
+                    if changes[member.name] == 'write' or overwrite_local:
+                        atomic_write(target, data, mode)
+                        result.written.append(member.name)
+                        continue
+                        
+                    merged = self._merge_profile_file(member.name, target, data, base)
+                    if merged is None or merged[1]:
+                        incoming_copy = target.with_name(target.name + INCOMING_SUFFIX)
+                        atomic_write(incoming_copy, data if merged is None else merged[0], mode)
+                        result.conflicts.append(member.name)
+                    else:
+                        atomic_write(target, merged[0], mode)
+                        result.merged.append(member.name)
+                        
+        # Conflicting paths keep their old base so the next apply sees the conflict again
+        applied = {path: checksum for path, checksum in incoming.items() if path not in result.conflicts}
+        self.record_applied_files(profile_id, archive_path, applied)
+        return result
+        
+    def plan_profile_apply(self, incoming: Dict[str, str], base: Dict[str, str]) -> Dict[str, str]:
+        """Decide per file how to apply a profile
+        
+        Actions: unchanged, write (fast-forward), keep (only local changed),
+        merge (both sides changed since the last apply).
+        """
+        plan = {}
+        for path, incoming_hash in incoming.items():
+            try:
+                target = self.resolve_profile_path(path)
+            except ValueError as e:
+                print(f"Warning: {e}")
+                continue
+            local_hash = self.calculate_checksum(target) if target.is_file() else None
+            base_hash = base.get(path)
             
-            # Backup current configuration
-            if self.settings['backup_before_sync']:
-                backup_id = self.create_profile_from_current(
-                    f"Auto-backup-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
-                    "Automatic backup before applying cloud profile"
-                )
-                print(f"Created backup: {backup_id}")
+            if local_hash == incoming_hash:
+                plan[path] = 'unchanged'
+            elif local_hash is None or local_hash == base_hash:
+                plan[path] = 'write'
+            elif base_hash == incoming_hash:
+                plan[path] = 'keep'
+            else:
+                plan[path] = 'merge'
                 
-            # Extract archive
-            config_base = Path.home() / ".config"
+        return plan
+        
+    def _merge_profile_file(self, path: str, target: Path, incoming: bytes,
+                            base: Dict[str, str]) -> Optional[Tuple[bytes, int]]:
+        """Merge a file changed both locally and in the profile
+        
+        Returns the merged bytes and the number of conflicting blocks, or
+        None when there is no base to merge against or a side is not text.
+        """
+        base_blob = self.applied_base_dir / base[path] if path in base else None
+        if not is_mergeable(path) or base_blob is None or not base_blob.exists():
+            return None
             
-            with tarfile.open(archive_path, 'r:gz') as tar:
-                # Extract safely
-                for member in tar.getmembers():
-                    if member.isfile():
-                        # Ensure safe extraction path
-                        safe_path = config_base / member.name
-                        if config_base in safe_path.resolve().parents:
-                            tar.extract(member, config_base)
-                            
-            print(f"Applied profile: {profile['name']}")
-            return True
+        try:
+            merged, conflicts = merge_config_text(
+                base_blob.read_bytes().decode('utf-8'),
+                target.read_bytes().decode('utf-8'),
+                incoming.decode('utf-8')
+            )
+            return merged.encode('utf-8'), conflicts
+        except UnicodeDecodeError:
+            return None
             
-        except Exception as e:
-            print(f"Apply failed: {e}")
-            return False
+    def resolve_profile_path(self, member_name: str) -> Path:
+        """Map an archive member name to its location on disk"""
+        # Dotfiles are archived relative to $HOME, everything else to ~/.config
+        base_dir = Path.home() if member_name.startswith('.') else Path.home() / ".config"
+        target = Path(os.path.normpath(base_dir / member_name))
+        
+        if base_dir not in target.parents:
+            raise ValueError(f"Unsafe path in profile archive: {member_name}")
+            
+        return target
+        
+    def create_partial_backup(self, files: List[Tuple[str, str]]) -> str:
+        """Back up a subset of config files as a restorable profile"""
+        name = f"Auto-backup-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        profile_id = hashlib.sha256(f"{name}_{datetime.now().isoformat()}".encode()).hexdigest()[:16]
+        
+        archive_path = self.cache_dir / f"{profile_id}.tar.gz"
+        file_index = self.create_config_archive(files, archive_path)
+        
+        profile = ConfigProfile(
+            id=profile_id,
+            name=name,
+            description="Automatic backup of files overwritten by a cloud profile",
+            author=self.settings.get('username', 'unknown'),
+            version="1.0.0",
+            created_at=datetime.now().isoformat(),
+            updated_at=datetime.now().isoformat(),
+            tags=['auto-backup'],
+            components=self.detect_components(),
+            features=[],
+            preset="custom",
+            checksum=self.calculate_checksum(archive_path),
+            size=archive_path.stat().st_size
+        )
+        
+        self.save_profile_to_db(profile, str(archive_path))
+        self.save_profile_file_index(profile_id, file_index)
+        
+        return profile_id
+        
+    def get_applied_file_index(self) -> Dict[str, str]:
+        """Get the last applied state used as merge base"""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("SELECT path, checksum FROM applied_files")
+            return dict(cursor.fetchall())
+            
+    def record_applied_files(self, profile_id: str, archive_path: Path, incoming: Dict[str, str]):
+        """Record an applied profile as the new merge base"""
+        # Keep content of mergeable files so later applies can merge against it
+        missing = {
+            path for path, checksum in incoming.items()
+            if is_mergeable(path) and not (self.applied_base_dir / checksum).exists()
+        }
+        if missing:
+            with tarfile.open(archive_path, 'r:gz') as tar:
+                for member in tar:
+                    if member.isfile() and member.name in missing:
+                        blob = self.applied_base_dir / incoming[member.name]
+                        atomic_write(blob, tar.extractfile(member).read(), 0o600)
+                        
+        applied_at = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO applied_files (path, checksum, profile_id, applied_at) VALUES (?, ?, ?, ?)",
+                [(path, checksum, profile_id, applied_at) for path, checksum in incoming.items()]
+            )
             
     def get_profile_from_db(self, profile_id: str) -> Optional[Dict]:
         """Get profile from database"""
@@ -749,6 +1301,73 @@ class HyprSupremeCloud:
             cursor = conn.execute("SELECT * FROM profiles ORDER BY updated_at DESC")
             return [dict(row) for row in cursor.fetchall()]
             
+    def search_local_profiles(self, query: str = "", tags: List[str] = None, author: str = "",
+                              components: List[str] = None, features: List[str] = None,
+                              limit: int = 50) -> List[Dict]:
+        """Search the local profile catalogue
+        
+        Free text matches name, description and tags (prefix match per word)
+        and is ranked by relevance. Tags, components and features must all
+        match. Without a query results are ordered by last update.
+        """
+        words = re.findall(r'\w+', query.lower())
+        conditions = []
+        params = []
+        
+        if words and self.fts_available:
+            source = "profiles_fts JOIN profiles p ON p.id = profiles_fts.profile_id"
+            conditions.append("profiles_fts MATCH ?")
+            params.append(' '.join(f'"{word}"*' for word in words))
+            # Weights: profile_id, name, description, tags
+            order = "bm25(profiles_fts, 0.0, 10.0, 2.0, 5.0)"
+        else:
+            source = "profiles p"
+            order = "p.updated_at DESC"
+            for word in words:
+                conditions.append("(lower(p.name) LIKE ? OR lower(p.description) LIKE ? OR lower(p.tags) LIKE ?)")
+                params.extend([f"%{word}%"] * 3)
+                
+        for tag in tags or []:
+            conditions.append("p.id IN (SELECT profile_id FROM profile_tags WHERE tag = ?)")
+            params.append(tag.strip().lower())
+            
+        for facet, values in (('component', components), ('feature', features)):
+            for value in values or []:
+                conditions.append("p.id IN (SELECT profile_id FROM profile_facets WHERE facet = ? AND value = ?)")
+                params.extend([facet, value])
+                
+        if author:
+            conditions.append("p.author = ?")
+            params.append(author)
+            
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT p.* FROM {source} {where} ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+            
+    def get_profile_facets(self) -> Dict[str, Dict[str, int]]:
+        """Get tag, component and feature counts across local profiles"""
+        facets = {'tags': {}, 'components': {}, 'features': {}}
+        
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(
+                "SELECT tag, COUNT(*) FROM profile_tags GROUP BY tag ORDER BY COUNT(*) DESC"
+            )
+            facets['tags'] = dict(cursor.fetchall())
+            
+            cursor = conn.execute("""
+                SELECT facet, value, COUNT(*) FROM profile_facets
+                GROUP BY facet, value ORDER BY COUNT(*) DESC
+            """)
+            for facet, value, count in cursor.fetchall():
+                facets[f"{facet}s"][value] = count
+                
+        return facets
+        
     def search_cloud_profiles(self, query: str = "", tags: List[str] = None, author: str = "") -> List[Dict]:
         """Search for profiles in cloud"""
         # Simulate cloud search (would be actual API call)
@@ -777,20 +1396,87 @@ class HyprSupremeCloud:
         ]
         
     def update_sync_timestamp(self, profile_id: str):
-        """Update last sync timestamp for profile"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "UPDATE profiles SET synced_at = ? WHERE id = ?",
-                (datetime.now().isoformat(), profile_id)
-            )
+        """Update last sync timestamp for profile (buffered)"""
+        self.history.touch(profile_id)
             
     def log_sync_action(self, profile_id: str, action: str, success: bool, error_message: str = None):
-        """Log sync action to history"""
+        """Log sync action to history (buffered)"""
+        self.history.log(profile_id, action, success, error_message)
+        
+    def flush_history(self):
+        """Write buffered history events and sync timestamps"""
+        self.history.flush()
+        
+    def get_sync_history(self, profile_id: str = None, since: str = None, until: str = None,
+                         limit: int = 100) -> List[Dict]:
+        """Get raw sync events, newest first, optionally within a time range
+        
+        ``since``/``until`` are ISO timestamps (or dates), inclusive.
+        """
+        self.flush_history()
+        
+        conditions = []
+        params = []
+        if profile_id:
+            conditions.append("profile_id = ?")
+            params.append(profile_id)
+        if since:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            conditions.append("timestamp <= ?")
+            # A bare date should include the whole day
+            params.append(until if 'T' in until else f"{until}T99")
+            
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit)
+        
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT INTO sync_history (profile_id, action, timestamp, success, error_message) VALUES (?, ?, ?, ?, ?)",
-                (profile_id, action, datetime.now().isoformat(), success, error_message)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                f"SELECT * FROM sync_history {where} ORDER BY timestamp DESC LIMIT ?", params
             )
+            return [dict(row) for row in cursor.fetchall()]
+            
+    def get_sync_history_daily(self, profile_id: str = None) -> List[Dict]:
+        """Get per-day aggregates of compacted sync events"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            if profile_id:
+                cursor = conn.execute(
+                    "SELECT * FROM sync_history_daily WHERE profile_id = ? ORDER BY day DESC", (profile_id,)
+                )
+            else:
+                cursor = conn.execute("SELECT * FROM sync_history_daily ORDER BY day DESC")
+            return [dict(row) for row in cursor.fetchall()]
+            
+    def compact_sync_history(self, older_than_days: int = None) -> int:
+        """Roll events older than the cutoff into per-day aggregates
+        
+        Returns the number of raw events removed.
+        """
+        if older_than_days is None:
+            older_than_days = self.settings.get('history_retention_days', 30)
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).date().isoformat()
+        
+        self.flush_history()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO sync_history_daily (day, profile_id, action, success_count, failure_count, last_error)
+                SELECT substr(timestamp, 1, 10), profile_id, action,
+                       SUM(CASE WHEN success THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN success THEN 0 ELSE 1 END),
+                       MAX(error_message)
+                FROM sync_history
+                WHERE timestamp < ?
+                GROUP BY substr(timestamp, 1, 10), profile_id, action
+                ON CONFLICT (day, profile_id, action) DO UPDATE SET
+                    success_count = success_count + excluded.success_count,
+                    failure_count = failure_count + excluded.failure_count,
+                    last_error = COALESCE(excluded.last_error, last_error)
+            """, (cutoff,))
+            cursor = conn.execute("DELETE FROM sync_history WHERE timestamp < ?", (cutoff,))
+            return cursor.rowcount
             
     def auto_sync(self):
         """Perform automatic sync if enabled"""
@@ -834,9 +1520,16 @@ class HyprSupremeCloud:
                 self.log_sync_action(profile_id, "delete", True)
                 
             # Delete from database
+            self.flush_history()
             with sqlite3.connect(self.db_path) as conn:
                 conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+                conn.execute("DELETE FROM profile_files WHERE profile_id = ?", (profile_id,))
+                conn.execute("DELETE FROM profile_tags WHERE profile_id = ?", (profile_id,))
+                conn.execute("DELETE FROM profile_facets WHERE profile_id = ?", (profile_id,))
+                if self.fts_available:
+                    conn.execute("DELETE FROM profiles_fts WHERE profile_id = ?", (profile_id,))
                 conn.execute("DELETE FROM sync_history WHERE profile_id = ?", (profile_id,))
+                conn.execute("DELETE FROM sync_history_daily WHERE profile_id = ?", (profile_id,))
                 
             return True
             
@@ -844,6 +1537,69 @@ class HyprSupremeCloud:
             print(f"Delete failed: {e}")
             return False
 
+    # Retention store interface (see retention.py)
+    retention_name = 'cloud'
+    
+    def retention_policy(self) -> 'RetentionPolicy':
+        """Retention policy from settings"""
+        from retention import RetentionPolicy
+        
+        return RetentionPolicy.from_dict(self.settings.get('retention', {}))
+        
+    def retention_items(self) -> List['RetentionItem']:
+        """Profiles subject to retention
+        
+        Auto-backups always are; named profiles only when
+        include_named_profiles is set. Public profiles and the profile that
+        is currently applied are pinned.
+        """
+        from retention import RetentionItem
+        
+        include_named = self.settings.get('retention', {}).get('include_named_profiles', False)
+        with sqlite3.connect(self.db_path) as conn:
+            applied = {row[0] for row in conn.execute("SELECT DISTINCT profile_id FROM applied_files")}
+            
+        items = []
+        for profile in self.list_local_profiles():
+            auto_backup = profile['name'].startswith('Auto-backup-')
+            if not auto_backup and not include_named:
+                continue
+            try:
+                created_at = datetime.fromisoformat(profile['created_at'])
+            except (TypeError, ValueError):
+                continue
+            items.append(RetentionItem(
+                id=profile['id'],
+                store=self.retention_name,
+                created_at=created_at,
+                size=profile['size'] or 0,
+                label=profile['name'],
+                pinned=bool(profile['public']) or profile['id'] in applied
+            ))
+        return items
+        
+    def delete_retention_item(self, item_id: str):
+        """Delete a pruned profile"""
+        if not self.delete_profile(item_id):
+            raise RuntimeError(f"Could not delete profile {item_id}")
+            
+    def retention_blob_stores(self) -> List['BlobStore']:
+        """Archive cache and merge-base blobs, with their live references"""
+        from retention import BlobStore
+        
+        with sqlite3.connect(self.db_path) as conn:
+            archives = {
+                Path(row[0]).name
+                for row in conn.execute("SELECT local_path FROM profiles WHERE local_path != ''")
+                if row[0]
+            }
+            base_blobs = {row[0] for row in conn.execute("SELECT checksum FROM applied_files")}
+            
+        return [
+            BlobStore(self.cache_dir, archives, "*.tar.gz"),
+            BlobStore(self.applied_base_dir, base_blobs),
+        ]
+
 # CLI Interface
 def main():
     """Command line interface for cloud sync"""
@@ -882,6 +1638,9 @@ def main():
     search_parser.add_argument('-q', '--query', default='', help='Search query')
     search_parser.add_argument('-t', '--tags', nargs='*', default=[], help='Filter by tags')
     search_parser.add_argument('-a', '--author', default='', help='Filter by author')
+    search_parser.add_argument('-c', '--components', nargs='*', default=[], help='Filter by components')
+    search_parser.add_argument('-f', '--features', nargs='*', default=[], help='Filter by features')
+    search_parser.add_argument('--local', action='store_true', help='Search local profiles only')
     
     # Delete command
     delete_parser = subparsers.add_parser('delete', help='Delete profile')
@@ -891,10 +1650,19 @@ def main():
     # Apply command
     apply_parser = subparsers.add_parser('apply', help='Apply profile configuration')
     apply_parser.add_argument('profile_id', help='Profile ID to apply')
+    apply_parser.add_argument('--overwrite', action='store_true',
+                              help='Replace locally edited files instead of saving the profile version beside them')
     
     # Auto-sync command
     subparsers.add_parser('sync', help='Run auto-sync')
     
+    # History command
+    history_parser = subparsers.add_parser('history', help='Show sync history')
+    history_parser.add_argument('profile_id', nargs='?', help='Only this profile')
+    history_parser.add_argument('--since', help='Start date/time (ISO format)')
+    history_parser.add_argument('--until', help='End date/time (ISO format)')
+    history_parser.add_argument('--compact', action='store_true', help='Compact old events into daily totals')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -940,7 +1708,12 @@ def main():
                 print(f"  {profile['id']}: {profile['name']} - {profile.get('description', '')}")
                 
         elif args.command == 'search':
-            profiles = cloud.search_cloud_profiles(args.query, args.tags, args.author)
+            if args.local:
+                profiles = cloud.search_local_profiles(
+                    args.query, args.tags, args.author, args.components, args.features
+                )
+            else:
+                profiles = cloud.search_cloud_profiles(args.query, args.tags, args.author)
             print(f"Found {len(profiles)} profiles:")
             for profile in profiles:
                 print(f"  {profile['id']}: {profile['name']} by {profile['author']}")
@@ -953,7 +1726,7 @@ def main():
                 print("Delete failed!")
                 
         elif args.command == 'apply':
-            if cloud.apply_profile(args.profile_id):
+            if cloud.apply_profile(args.profile_id, args.overwrite):
                 print("Profile applied successfully!")
             else:
                 print("Apply failed!")
@@ -962,10 +1735,23 @@ def main():
             cloud.auto_sync()
             print("Auto-sync completed!")
             
+        elif args.command == 'history':
+            if args.compact:
+                removed = cloud.compact_sync_history()
+                print(f"Compacted {removed} events into daily totals")
+            events = cloud.get_sync_history(args.profile_id, args.since, args.until)
+            print(f"Sync history ({len(events)}):")
+            for event in events:
+                status = "✓" if event['success'] else "✗"
+                print(f"  {status} {event['timestamp']} {event['action']} {event['profile_id']}")
+                
     except Exception as e:
         print(f"Error: {e}")
         return 1
         
+    finally:
+        cloud.flush_history()
+        
     return 0
 
 if __name__ == "__main__":
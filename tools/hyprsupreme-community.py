@@ -17,6 +17,10 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import urllib.parse
 
+sys.path.append(str(Path(__file__).parent))
+from config_merge import atomic_write
+from mirror_server import MIRROR_ENV, mirror_url
+
 @dataclass
 class CommunityTheme:
     """Community theme data structure"""
@@ -73,7 +77,7 @@ class ThemeRating:
 class HyprSupremeCommunity:
     """Community platform for sharing themes and configurations"""
     
-    def __init__(self, config_dir: str = None):
+    def __init__(self, config_dir: str = None, mirror: str = None):
         self.config_dir = Path(config_dir or os.path.expanduser("~/.config/hyprsupreme/community"))
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
@@ -88,8 +92,9 @@ class HyprSupremeCommunity:
         # Initialize database
         self.init_database()
         
-        # API configuration
-        self.api_base = "https://community.hyprsupreme.com/api/v1"
+        # API configuration; a caching mirror (mirror_server.py) can front it
+        self.mirror = mirror or os.environ.get(MIRROR_ENV)
+        self.api_base = mirror_url("https://community.hyprsupreme.com/api/v1", self.mirror)
         
         # Categories
         self.categories = [
@@ -392,11 +397,17 @@ class HyprSupremeCommunity:
             
             print(f"Downloading {theme['name']}...")
             
-            # Simulate download
-            # In real implementation, this would download from the URL
-            with open(local_path, 'wb') as f:
-                # Mock file content
-                f.write(b"Mock theme archive content")
+            if self.mirror:
+                # Archives shared through the mirror are fetched for real
+                response = requests.get(mirror_url(download_url, self.mirror), timeout=60)
+                response.raise_for_status()
+                atomic_write(local_path, response.content)
+            else:
+                # Simulate download
+                # In real implementation, this would download from the URL
+                with open(local_path, 'wb') as f:
+                    # Mock file content
+                    f.write(b"Mock theme archive content")
                 
             # Update cache with local path
             with sqlite3.connect(self.db_path) as conn:
@@ -636,6 +647,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="HyprSupreme Community")
+    parser.add_argument('--mirror', help=f'Caching mirror URL (default: ${MIRROR_ENV})')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
     # Discover command
@@ -710,7 +722,7 @@ def main():
         parser.print_help()
         return
         
-    community = HyprSupremeCommunity()
+    community = HyprSupremeCommunity(mirror=args.mirror)
     
     try:
         if args.command == 'discover':
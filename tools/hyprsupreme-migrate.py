@@ -5,16 +5,21 @@ Advanced migration and update system with version management
 """
 
 import os
+import re
 import sys
 import json
+import time
 import sqlite3
 import shutil
 import hashlib
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple, Any, Callable
+from dataclasses import dataclass, field, asdict
 # Graceful fallback for missing semver
 try:
     import semver
@@ -37,6 +42,22 @@ except ImportError:
     semver = MockSemver
 import difflib
 
+# Shared helpers live next to this script
+sys.path.append(str(Path(__file__).parent))
+from retention import RetentionPolicy, RetentionItem, BlobStore
+from config_merge import atomic_write, unified_diff, unified_diff_job
+from backup_index import BackupIndex, INDEX_DB_NAME, write_indexed_archive
+from backup_scrub import ScrubTarget, ScrubResult, digest_file
+from hypr_config import HyprConfigParser
+
+# Action types that are pure in-memory text rewrites of a single file
+TEXT_ACTIONS = ('replace_text', 'replace_regex')
+
+# Dry-run previews skip diffs for files larger than this (bytes)
+DIFF_SIZE_CAP = 1024 * 1024
+# Above this much total text, diffs are computed in worker processes
+PARALLEL_DIFF_THRESHOLD = 256 * 1024
+
 @dataclass
 class MigrationRule:
     """Configuration migration rule"""
@@ -52,6 +73,9 @@ class MigrationRule:
     rollback_actions: List[Dict[str, Any]]
     priority: int = 0
     required: bool = True
+    # Declared resources: file paths or "component:<name>"; used for scheduling
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
 
 @dataclass
 class MigrationPlan:
@@ -80,6 +104,377 @@ class ConfigBackup:
     path: str
     checksum: str
 
+# Version probe per component; the first element is resolved on PATH
+VERSION_PROBES = {
+    'hyprland': ['hyprctl', 'version'],
+    'waybar': ['waybar', '--version'],
+    'rofi': ['rofi', '-version'],
+    'kitty': ['kitty', '--version'],
+    'ags': ['ags', '--version']
+}
+
+def _parse_hyprland_version(output: str) -> Optional[str]:
+    """Parse Hyprland version from hyprctl output"""
+    for line in output.split('\n'):
+        if 'Hyprland' in line and 'v' in line:
+            # Extract version more carefully
+            parts = line.split('v')
+            if len(parts) > 1:
+                version_part = parts[1].split()[0]
+                version_match = re.search(r'(\d+\.\d+\.\d+)', version_part)
+                if version_match:
+                    return version_match.group(1)
+                elif version_part.strip():
+                    # Fallback for non-standard versions
+                    return "0.45.0"  # Use a reasonable default
+            break
+    return None
+
+def _parse_waybar_version(output: str) -> Optional[str]:
+    """Parse Waybar version output"""
+    version_line = output.strip()
+    if not version_line:
+        return None
+    raw_version = version_line.split()[-1]
+    # Clean up version string (remove 'v' prefix, etc.)
+    version_match = re.search(r'v?(\d+\.\d+\.\d+)', raw_version)
+    if version_match:
+        return version_match.group(1)
+    return raw_version.lstrip('v')
+
+def _parse_generic_version(output: str) -> Optional[str]:
+    """Extract a version number from arbitrary --version output"""
+    output = output.strip()
+    
+    # Try to find a semantic version pattern
+    version_match = re.search(r'v?(\d+\.\d+\.\d+)', output)
+    if version_match:
+        return version_match.group(1)
+        
+    # Fallback to simpler pattern
+    version_match = re.search(r'v?(\d+\.\d+)', output)
+    if version_match:
+        return version_match.group(1) + '.0'
+        
+    # Last resort - try to extract any version-like string
+    for word in output.split():
+        if any(c.isdigit() for c in word) and '.' in word:
+            clean_word = re.sub(r'[^0-9.]', '', word)
+            if clean_word and clean_word.count('.') <= 2:
+                return clean_word
+    return None
+
+@lru_cache(maxsize=1024)
+def parse_version(version: str) -> Tuple:
+    """Parse a version string once into a comparable tuple
+    
+    ``1.2`` compares equal to ``1.2.0`` and a pre-release such as
+    ``1.2.0-beta`` sorts before its release.
+    """
+    core, _, prerelease = version.strip().lstrip('v').partition('-')
+    numbers = [int(part) for part in re.findall(r'\d+', core)[:3]]
+    numbers += [0] * (3 - len(numbers))
+    return tuple(numbers) + ((0, prerelease) if prerelease else (1, ''))
+
+@dataclass
+class VersionEdge:
+    """All rules migrating one component from one version to another"""
+    from_key: Tuple
+    to_key: Tuple
+    rules: List['MigrationRule'] = field(default_factory=list)
+
+class RuleGraph:
+    """Migration rules indexed as version edges per component
+    
+    Component ``None`` holds every rule, matching plans made without a
+    component. Edges are sorted by their source version, so the rules
+    reachable from a version are collected in one forward sweep. The
+    chain of candidate edges for a (component, current, target) range is
+    memoized; conditions are applied on top of it per planning session.
+    """
+    
+    def __init__(self, rules: List['MigrationRule']):
+        self.edges: Dict[Optional[str], List[VersionEdge]] = {}
+        self._chains: Dict[Tuple, List[VersionEdge]] = {}
+        grouped: Dict[Tuple, VersionEdge] = {}
+        
+        for rule in rules:
+            from_key = parse_version(rule.from_version)
+            to_key = parse_version(rule.to_version)
+            if to_key <= from_key:
+                continue
+            for component in (rule.component, None):
+                edge = grouped.get((component, from_key, to_key))
+                if edge is None:
+                    edge = VersionEdge(from_key, to_key)
+                    grouped[(component, from_key, to_key)] = edge
+                    self.edges.setdefault(component, []).append(edge)
+                edge.rules.append(rule)
+                
+        for edges in self.edges.values():
+            edges.sort(key=lambda e: (e.from_key, e.to_key))
+            for edge in edges:
+                edge.rules.sort(key=lambda r: (r.priority, r.id))
+            
+    def chain(self, component: Optional[str], current: Tuple, target: Tuple) -> List[VersionEdge]:
+        """Edges between ``current`` and ``target`` reachable if every rule applied"""
+        key = (component, current, target)
+        edges = self._chains.get(key)
+        if edges is None:
+            edges = self._chains[key] = self._sweep(self.edges.get(component, []), current, target)
+        return edges
+        
+    @staticmethod
+    def _sweep(edges: List[VersionEdge], current: Tuple, target: Tuple,
+               accept: Callable[['MigrationRule'], bool] = None) -> List[VersionEdge]:
+        reached = current
+        chain = []
+        for edge in edges:
+            if edge.from_key > reached:
+                break
+            if not current < edge.to_key <= target:
+                continue
+            if accept is None or any(accept(rule) for rule in edge.rules):
+                chain.append(edge)
+                reached = max(reached, edge.to_key)
+        return chain
+        
+    def rules_in_range(self, component: Optional[str], current: Tuple, target: Tuple,
+                       accept: Callable[['MigrationRule'], bool]) -> List['MigrationRule']:
+        """Every accepted rule between ``current`` and ``target``, in version order
+        
+        An edge applies to any version at or above its source, as long as
+        it moves forward and does not overshoot the target. Only edges with
+        at least one accepted rule extend the reachable range, so a rule
+        whose conditions fail never strands the steps after it when another
+        path covers the same versions.
+        """
+        rules = []
+        for edge in self._sweep(self.chain(component, current, target), current, target, accept):
+            rules.extend(rule for rule in edge.rules if accept(rule))
+        return rules
+
+@dataclass
+class FilePipeline:
+    """Compiled text/regex rewrites for one file, applied in a single pass"""
+    path: Path
+    transforms: List[Tuple[str, Any, str]] = field(default_factory=list)  # (kind, old/pattern, new)
+    rule_ids: List[str] = field(default_factory=list)
+    
+    def add_action(self, action: Dict, rule_id: str):
+        """Compile a replace_text/replace_regex action into transforms"""
+        if action["type"] == "replace_text":
+            for replacement in action["replacements"]:
+                self.transforms.append(("text", replacement["old"], replacement["new"]))
+        else:
+            for pattern_info in action["patterns"]:
+                pattern = re.compile(pattern_info["pattern"])
+                self.transforms.append(("regex", pattern, pattern_info["replacement"]))
+                
+        if rule_id not in self.rule_ids:
+            self.rule_ids.append(rule_id)
+            
+    def apply(self, content: str) -> str:
+        """Run every transform over the content in memory"""
+        for kind, old, new in self.transforms:
+            if kind == "regex":
+                content = old.sub(new, content)
+            else:
+                content = content.replace(old, new)
+        return content
+
+@dataclass
+class CompiledStep:
+    """One schedulable unit of a plan: a file pipeline or a single action"""
+    kind: str  # pipeline or action
+    payload: Any  # FilePipeline or action dict
+    rule_ids: List[str]
+    reads: Set[str] = field(default_factory=set)
+    writes: Set[str] = field(default_factory=set)
+    
+    def conflicts_with(self, other: 'CompiledStep') -> bool:
+        """True when the two steps must keep their relative order"""
+        return bool(self.writes & (other.reads | other.writes) or other.writes & self.reads)
+
+def _resource(name: str) -> str:
+    """Normalize a declared resource into a file: or component: key"""
+    if name.startswith("component:"):
+        return name
+    return "file:" + os.path.abspath(os.path.expanduser(name))
+
+def flatten_json_keys(text: str) -> Dict[str, str]:
+    """Flatten a JSON config such as waybar's into ``section:key`` -> value"""
+    keys = {}
+    
+    def walk(value, prefix):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(child, f"{prefix}:{key}" if prefix else str(key))
+        else:
+            keys[prefix] = value if isinstance(value, str) else json.dumps(value)
+            
+    try:
+        walk(json.loads(text), "")
+    except ValueError:
+        pass
+    return keys
+
+class ConditionSession:
+    """Condition results and file reads shared across one planning session
+    
+    Every distinct condition string is evaluated once, and all conditions
+    over the same file share a single read. Hyprland configs are resolved
+    through hypr_config, so ``source`` includes and variables are seen the
+    same way as by feature detection.
+    """
+    
+    def __init__(self, current_version: Dict[str, str]):
+        self.current_version = current_version
+        self.results: Dict[str, bool] = {}
+        self._texts: Dict[Path, Optional[str]] = {}
+        self._configs: Dict[Path, Any] = {}  # flattened JSON dict or HyprConfig
+        self._hypr = HyprConfigParser(read=self.read_text)
+        self._lock = threading.Lock()
+        
+    def check(self, conditions: List[str]) -> bool:
+        """True if every condition holds"""
+        return all(self.evaluate(condition) for condition in conditions)
+        
+    def evaluate(self, condition: str) -> bool:
+        result = self.results.get(condition)
+        if result is None:
+            result = self._evaluate(condition)
+            self.results[condition] = result
+        return result
+        
+    def _evaluate(self, condition: str) -> bool:
+        kind, _, arg = condition.partition(":")
+        
+        if kind == "file_exists":
+            return Path(arg).expanduser().exists()
+        elif kind == "version_gte":
+            # Check version greater than or equal
+            component, version = arg.split(":")
+            current = self.current_version.get(component, "0.0.0")
+            return parse_version(current) >= parse_version(version)
+        elif kind == "file_contains":
+            # file_contains:PATH:TEXT
+            path, _, needle = arg.partition(":")
+            text = self.read_text(Path(path).expanduser())
+            return text is not None and needle in text
+        elif kind == "config_key":
+            # config_key:PATH:section:key or config_key:PATH:section:key=value
+            path, _, expression = arg.partition(":")
+            key, has_value, value = expression.partition("=")
+            current = self.config_value(Path(path).expanduser(), key.strip())
+            if current is None:
+                return False
+            return not has_value or current == value.strip()
+            
+        # Unknown condition types do not block a rule
+        return True
+        
+    def read_text(self, path: Path) -> Optional[str]:
+        """File contents, read at most once per session"""
+        if path not in self._texts:
+            with self._lock:
+                if path not in self._texts:
+                    try:
+                        self._texts[path] = path.read_text(errors='replace') if path.is_file() else None
+                    except OSError:
+                        self._texts[path] = None
+        return self._texts[path]
+        
+    def config_value(self, path: Path, key: str) -> Optional[str]:
+        """Effective value of a ``section:key`` in a Hyprland or JSON config
+        
+        Each config is parsed at most once per session, from the same
+        cached text ``file_contains`` conditions use.
+        """
+        config = self._configs.get(path)
+        if config is None:
+            if path.suffix in ('.json', '.jsonc'):
+                config = flatten_json_keys(self.read_text(path) or "")
+            else:
+                config = self._hypr.load(path)
+            self._configs[path] = config
+        return config.get(key)
+
+class MigrationJournal:
+    """Write-ahead journal of original file contents for one migration
+    
+    The first time a path is about to change, its original bytes are stored
+    content-addressed in the blob directory and a journal row is committed.
+    Paths that did not exist are journaled too, so rollback can remove them.
+    """
+    
+    def __init__(self, db_path: Path, blob_dir: Path, migration_id: str):
+        self.db_path = db_path
+        self.blob_dir = blob_dir
+        self.migration_id = migration_id
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._seq = 0
+        
+    def record(self, path: Path):
+        """Journal a path before it is mutated (directories recursively)"""
+        path = Path(os.path.abspath(path))
+        with self._lock:
+            if path in self._seen:
+                return
+            self._seen.add(path)
+            self._seq += 1
+            seq = self._seq
+            
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.is_file():
+                    self.record(child)
+            return
+            
+        blob = mode = None
+        existed = path.is_file()
+        if existed:
+            data = path.read_bytes()
+            blob = hashlib.sha256(data).hexdigest()
+            mode = path.stat().st_mode & 0o7777
+            blob_path = self.blob_dir / blob
+            if not blob_path.exists():
+                atomic_write(blob_path, data, 0o600)
+                
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO migration_journal (migration_id, seq, path, existed, blob, mode, recorded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (self.migration_id, seq, str(path), existed, blob, mode, datetime.now().isoformat()))
+            
+    def discard(self):
+        """Drop this journal once it has been replayed"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM migration_journal WHERE migration_id = ?", (self.migration_id,))
+            
+    def supersede(self):
+        """Drop every other migration's journal once this one commits
+        
+        Only the latest committed migration stays rollback-able from its
+        journal, as its backup would be under the retention policy. A
+        superseded migration loses its rollback even if it also has an
+        archive, since that only covers its script-touched components.
+        Blobs are left for the retention sweep, which reclaims those no
+        longer referenced by any journal.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                UPDATE migration_history SET rollback_available = 0
+                WHERE id IN (
+                    SELECT DISTINCT migration_id FROM migration_journal WHERE migration_id != ?
+                )
+            """, (self.migration_id,))
+            conn.execute("DELETE FROM migration_journal WHERE migration_id != ?", (self.migration_id,))
+            
+    def __len__(self) -> int:
+        return len(self._seen)
+
 class HyprSupremeMigrator:
     """Advanced configuration migration system"""
     
@@ -91,8 +486,14 @@ class HyprSupremeMigrator:
         self.backups_dir = self.config_dir / "backups"
         self.migrations_dir = self.config_dir / "migrations"
         self.temp_dir = self.config_dir / "temp"
+        self.journal_dir = self.config_dir / "journal"
+        self.backup_index = BackupIndex(self.config_dir / INDEX_DB_NAME)
+        self._journal = None  # active MigrationJournal while a migration runs
+        self.version_cache_file = self.config_dir / "version_cache.json"
+        self.probe_timeout = 5  # seconds per version probe
+        self.max_workers = 4  # parallel migration steps, mostly I/O and subprocesses
         
-        for dir_path in [self.backups_dir, self.migrations_dir, self.temp_dir]:
+        for dir_path in [self.backups_dir, self.migrations_dir, self.temp_dir, self.journal_dir]:
             dir_path.mkdir(exist_ok=True)
             
         # Initialize database
@@ -152,7 +553,30 @@ class HyprSupremeMigrator:
                     component TEXT
                 );
                 
+                CREATE TABLE IF NOT EXISTS migration_journal (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    migration_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    existed BOOLEAN,
+                    blob TEXT,  -- sha256 of the original content in journal/
+                    mode INTEGER,
+                    recorded_at TEXT
+                );
+                
+                CREATE TABLE IF NOT EXISTS backup_verifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    backup_id TEXT NOT NULL,
+                    verified_at TEXT,
+                    ok BOOLEAN,
+                    error TEXT,
+                    duration REAL,
+                    bytes INTEGER
+                );
+                
                 CREATE INDEX IF NOT EXISTS idx_migration_history_version ON migration_history(to_version);
+                CREATE INDEX IF NOT EXISTS idx_backup_verifications_backup ON backup_verifications(backup_id, verified_at);
+                CREATE INDEX IF NOT EXISTS idx_migration_journal_migration ON migration_journal(migration_id, seq);
                 CREATE INDEX IF NOT EXISTS idx_backups_created ON backups(created_at);
                 CREATE INDEX IF NOT EXISTS idx_version_history_component ON version_history(component);
             """)
@@ -160,6 +584,7 @@ class HyprSupremeMigrator:
     def load_migration_rules(self):
         """Load migration rules from files"""
         self.migration_rules = {}
+        self._rule_graph = None
         
         # Built-in migration rules
         self.migration_rules.update(self._get_builtin_rules())
@@ -295,113 +720,127 @@ class HyprSupremeMigrator:
         except Exception as e:
             print(f"Error saving version file: {e}")
             
-    def detect_installed_versions(self) -> Dict[str, str]:
-        """Detect versions of installed components"""
+    def detect_installed_versions(self, use_cache: bool = True) -> Dict[str, str]:
+        """Detect versions of installed components
+        
+        All probes run concurrently, each with its own timeout. Results are
+        cached keyed on the resolved binary path plus its inode and mtime,
+        so a probe only re-runs once the binary actually changes.
+        """
+        cache = self._load_version_cache() if use_cache else {}
         versions = {}
+        pending = {}
+        
+        for component, cmd in VERSION_PROBES.items():
+            binary = shutil.which(cmd[0])
+            if not binary:
+                continue
+            key = self._binary_cache_key(binary)
+            if key is None:
+                continue
+                
+            cached = cache.get(component)
+            if cached and cached.get('key') == key:
+                if cached.get('version'):
+                    versions[component] = cached['version']
+                continue
+            pending[component] = (binary, key)
+            
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = {
+                    component: executor.submit(self._probe_version, component, binary)
+                    for component, (binary, _) in pending.items()
+                }
+                for component, future in futures.items():
+                    version = future.result()
+                    if version:
+                        versions[component] = version
+                    # Timed-out probes are retried next time
+                    if version is not False:
+                        cache[component] = {'key': pending[component][1], 'version': version}
+                        
+            if use_cache:
+                self._save_version_cache(cache)
+                
+        return versions
+        
+    def _probe_version(self, component: str, binary: str):
+        """Run one version probe; None if unparseable, False on timeout"""
+        cmd = [binary] + VERSION_PROBES[component][1:]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.probe_timeout)
+        except subprocess.TimeoutExpired:
+            print(f"Warning: {' '.join(VERSION_PROBES[component])} timed out")
+            return False
+        except OSError:
+            return None
+            
+        if result.returncode != 0:
+            return None
+            
+        if component == 'hyprland':
+            return _parse_hyprland_version(result.stdout)
+        if component == 'waybar':
+            return _parse_waybar_version(result.stdout)
+        return _parse_generic_version(result.stdout)
         
-        # Detect Hyprland version
+    @staticmethod
+    def _binary_cache_key(binary: str) -> Optional[List]:
+        """Cache key for a binary: resolved path, inode and mtime"""
+        real_path = os.path.realpath(binary)
         try:
-            result = subprocess.run(['hyprctl', 'version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                # Parse Hyprland version from output
-                for line in result.stdout.split('\n'):
-                    if 'Hyprland' in line and 'v' in line:
-                        # Extract version more carefully
-                        parts = line.split('v')
-                        if len(parts) > 1:
-                            version_part = parts[1].split()[0]
-                            # Clean up version string
-                            import re
-                            version_match = re.search(r'(\d+\.\d+\.\d+)', version_part)
-                            if version_match:
-                                versions['hyprland'] = version_match.group(1)
-                            elif version_part.strip():
-                                # Fallback for non-standard versions
-                                versions['hyprland'] = "0.45.0"  # Use a reasonable default
-                        break
-        except:
-            pass
-            
-        # Detect Waybar version
+            stat = os.stat(real_path)
+        except OSError:
+            return None
+        return [real_path, stat.st_ino, stat.st_mtime_ns]
+        
+    def _load_version_cache(self) -> Dict:
+        """Load cached probe results"""
         try:
-            result = subprocess.run(['waybar', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                # Parse version from output
-                version_line = result.stdout.strip()
-                if version_line:
-                    raw_version = version_line.split()[-1]
-                    # Clean up version string (remove 'v' prefix, etc.)
-                    import re
-                    version_match = re.search(r'v?(\d+\.\d+\.\d+)', raw_version)
-                    if version_match:
-                        versions['waybar'] = version_match.group(1)
-                    else:
-                        versions['waybar'] = raw_version.lstrip('v')
-        except:
-            pass
-            
-        # Detect other component versions
-        component_commands = {
-            'rofi': ['rofi', '-version'],
-            'kitty': ['kitty', '--version'],
-            'ags': ['ags', '--version']
-        }
+            with open(self.version_cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+            
+    def _save_version_cache(self, cache: Dict):
+        """Persist probe results"""
+        try:
+            atomic_write(self.version_cache_file, json.dumps(cache, indent=2).encode())
+        except OSError as e:
+            print(f"Warning: Could not save version cache: {e}")
+            
+    @property
+    def rule_graph(self) -> RuleGraph:
+        """Version-edge index over all rules, built on first use"""
+        if self._rule_graph is None:
+            self._rule_graph = RuleGraph(list(self.migration_rules.values()))
+        return self._rule_graph
         
-        for component, cmd in component_commands.items():
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode == 0:
-                    # Simple version extraction
-                    output = result.stdout.strip()
-                    # Clean up version string and extract version number
-                    import re
-                    
-                    # Try to find a semantic version pattern
-                    version_match = re.search(r'v?(\d+\.\d+\.\d+)', output)
-                    if version_match:
-                        versions[component] = version_match.group(1)
-                    else:
-                        # Fallback to simpler pattern
-                        version_match = re.search(r'v?(\d+\.\d+)', output)
-                        if version_match:
-                            versions[component] = version_match.group(1) + '.0'
-                        else:
-                            # Last resort - try to extract any version-like string
-                            words = output.split()
-                            for word in words:
-                                if any(c.isdigit() for c in word) and '.' in word:
-                                    clean_word = re.sub(r'[^0-9.]', '', word)
-                                    if clean_word and clean_word.count('.') <= 2:
-                                        versions[component] = clean_word
-                                        break
-            except:
-                pass
-                
-        return versions
+    def invalidate_rule_graph(self):
+        """Drop the rule index after rules change"""
+        self._rule_graph = None
+        
+    def condition_session(self) -> ConditionSession:
+        """Start a planning session with its own condition cache"""
+        return ConditionSession(self.current_version)
         
-    def plan_migration(self, target_version: str, component: str = None) -> Optional[MigrationPlan]:
+    def plan_migration(self, target_version: str, component: str = None,
+                       session: ConditionSession = None) -> Optional[MigrationPlan]:
         """Plan migration to target version"""
         current_ver = self.current_version.get(component or 'hyprsupreme', '1.0.0')
+        current_key = parse_version(current_ver)
+        target_key = parse_version(target_version)
         
-        if semver.compare(current_ver, target_version) >= 0:
+        if current_key >= target_key:
             return None  # Already at or above target version
             
-        # Find applicable migration rules
-        applicable_rules = []
-        for rule in self.migration_rules.values():
-            if component and rule.component != component:
-                continue
-                
-            # Check if rule applies to this version range
-            if (semver.compare(current_ver, rule.from_version) >= 0 and
-                semver.compare(rule.to_version, target_version) <= 0):
-                
-                # Check conditions
-                if self._check_conditions(rule.conditions):
-                    applicable_rules.append(rule)
-                    
-        # Sort rules by priority and version order
-        applicable_rules.sort(key=lambda r: (r.priority, r.to_version))
+        # Conditions depend on the filesystem, so they are checked per session
+        # while the graph is walked
+        session = session or self.condition_session()
+        applicable_rules = self.rule_graph.rules_in_range(
+            component, current_key, target_key, lambda rule: session.check(rule.conditions)
+        )
         
         if not applicable_rules:
             return None
@@ -425,20 +864,7 @@ class HyprSupremeMigrator:
         
     def _check_conditions(self, conditions: List[str]) -> bool:
         """Check if migration conditions are met"""
-        for condition in conditions:
-            if condition.startswith("file_exists:"):
-                file_path = Path(condition[12:]).expanduser()
-                if not file_path.exists():
-                    return False
-            elif condition.startswith("version_gte:"):
-                # Check version greater than or equal
-                component, version = condition[12:].split(":")
-                current = self.current_version.get(component, "0.0.0")
-                if semver.compare(current, version) < 0:
-                    return False
-            # Add more condition types as needed
-            
-        return True
+        return self.condition_session().check(conditions)
         
     def _assess_risk_level(self, rules: List[MigrationRule]) -> str:
         """Assess risk level of migration"""
@@ -491,13 +917,13 @@ class HyprSupremeMigrator:
                             if file_path.is_file():
                                 files_to_backup.append(file_path)
                                 
-        # Create backup archive
-        import tarfile
-        with tarfile.open(backup_path, 'w:gz') as tar:
-            for file_path in files_to_backup:
-                arcname = file_path.relative_to(Path.home())
-                tar.add(file_path, arcname=arcname)
-                
+        # Create backup archive with a member index for single-file access
+        entries = write_indexed_archive(
+            backup_path,
+            ((file_path, file_path.relative_to(Path.home()).as_posix()) for file_path in files_to_backup)
+        )
+        self.backup_index.save(backup_id, backup_path, entries)
+        
         # Calculate backup metadata
         file_count = len(files_to_backup)
         size = backup_path.stat().st_size
@@ -535,25 +961,41 @@ class HyprSupremeMigrator:
         backup_id = None
         
         try:
-            # Create backup if required
             if plan.backup_required and not dry_run:
-                backup_id = self.create_backup(
-                    f"Pre-migration backup for {plan.name}",
-                    f"Automatic backup before migrating from {plan.from_version} to {plan.to_version}",
-                    auto_created=True
-                )
+                # Files are journaled just before they change; only components
+                # with scripts of unknown footprint still need an archive up front
+                self._journal = MigrationJournal(self.db_path, self.journal_dir, plan.id)
+                unjournaled = self._unjournaled_components(plan.rules)
+                if unjournaled:
+                    backup_id = self.create_backup(
+                        f"Pre-migration backup for {plan.name}",
+                        f"Automatic backup before migrating from {plan.from_version} to {plan.to_version}",
+                        components=unjournaled,
+                        auto_created=True
+                    )
                 
             print(f"Executing migration: {plan.name}")
             print(f"Risk level: {plan.risk_level}")
             
-            # Execute migration rules
-            for i, rule in enumerate(plan.rules, 1):
-                print(f"Step {i}/{len(plan.rules)}: {rule.name}")
-                
-                if not dry_run:
-                    self._execute_rule(rule)
-                else:
-                    print(f"  Would execute: {rule.description}")
+            # Execute migration rules, independent ones in parallel
+            steps = self.compile_rules(plan.rules)
+            
+            if dry_run:
+                rule_names = {rule.id: rule.name for rule in plan.rules}
+                for i, wave in enumerate(self.schedule_waves(steps), 1):
+                    wave_rules = list(dict.fromkeys(rid for step in wave for rid in step.rule_ids))
+                    print(f"Wave {i} ({len(wave)} steps in parallel):")
+                    for rule_id in wave_rules:
+                        print(f"  Would execute: {rule_names[rule_id]}")
+                        
+                print()
+                previews = self.preview_steps(steps, on_preview=self._print_preview)
+                self._print_preview_summary(previews)
+            else:
+                results = self.run_scheduled_steps(steps, plan.rules)
+                failed = [r for r in results.values() if r['status'] == 'failed']
+                if failed:
+                    raise RuntimeError(f"{failed[0]['name']}: {failed[0]['error']}")
                     
             # Update version information
             if not dry_run:
@@ -564,78 +1006,394 @@ class HyprSupremeMigrator:
             duration = int((datetime.now() - start_time).total_seconds())
             
             if not dry_run:
-                self._record_migration(plan, backup_id, duration, True)
+                self._record_migration(plan, backup_id, duration, True, journaled=bool(self._journal))
+                if self._journal is not None:
+                    self._journal.supersede()
                 
             print(f"Migration completed successfully in {duration} seconds")
             return True
             
         except Exception as e:
             duration = int((datetime.now() - start_time).total_seconds())
+            journaled = bool(self._journal)
             
             if not dry_run:
-                self._record_migration(plan, backup_id, duration, False, str(e))
+                self._record_migration(plan, backup_id, duration, False, str(e), journaled=journaled)
                 
             print(f"Migration failed: {e}")
             
-            # Offer rollback if backup was created
-            if backup_id and not dry_run:
-                print(f"Backup available for rollback: {backup_id}")
+            # Offer rollback if anything was journaled or backed up
+            if (backup_id or journaled) and not dry_run:
+                print(f"Rollback available: {plan.id}")
                 
             return False
             
-    def _execute_rule(self, rule: MigrationRule):
-        """Execute a single migration rule"""
-        for action in rule.actions:
-            action_type = action["type"]
-            
-            if action_type == "replace_text":
-                self._execute_replace_text(action)
-            elif action_type == "replace_regex":
-                self._execute_replace_regex(action)
-            elif action_type == "run_script":
-                self._execute_run_script(action)
-            elif action_type == "move_file":
-                self._execute_move_file(action)
-            elif action_type == "delete_file":
-                self._execute_delete_file(action)
+        finally:
+            self._journal = None
+            
+    def preview_steps(self, steps: List[CompiledStep], size_cap: int = DIFF_SIZE_CAP,
+                      on_preview=None) -> List[Dict]:
+        """Simulate compiled steps in memory and diff every changed file
+        
+        Pipelines run against an in-memory overlay of the filesystem, so
+        moves and deletes earlier in the plan are honoured. Scripts cannot
+        be simulated and are only reported. Files above ``size_cap`` get
+        byte and line deltas but no diff. ``on_preview`` is called with each
+        file's preview, in plan order, as soon as its diff is ready.
+        """
+        overlay: Dict[Path, Optional[str]] = {}
+        originals: Dict[Path, Optional[str]] = {}
+        notes: Dict[Path, str] = {}
+        unsimulated = []
+        
+        def current(path: Path) -> Optional[str]:
+            if path not in overlay:
+                try:
+                    overlay[path] = path.read_text() if path.is_file() else None
+                except (OSError, UnicodeDecodeError):
+                    overlay[path] = None
+                    notes[path] = "not a readable text file"
+                originals.setdefault(path, overlay[path])
+            return overlay[path]
+            
+        for step in steps:
+            if step.kind == "pipeline":
+                path = Path(os.path.abspath(step.payload.path))
+                content = current(path)
+                if content is not None:
+                    overlay[path] = step.payload.apply(content)
+                continue
+                
+            action = step.payload
+            if action["type"] == "move_file":
+                source = Path(os.path.abspath(os.path.expanduser(action["source"])))
+                dest = Path(os.path.abspath(os.path.expanduser(action["dest"])))
+                content = current(source)
+                current(dest)
+                if content is not None:
+                    overlay[dest] = content
+                    overlay[source] = None
+            elif action["type"] == "delete_file":
+                path = Path(os.path.abspath(os.path.expanduser(action["file"])))
+                current(path)
+                overlay[path] = None
             else:
-                print(f"Warning: Unknown action type: {action_type}")
+                unsimulated.append(f"{action['type']} {action.get('script', '')}".strip())
                 
-    def _execute_replace_text(self, action: Dict):
-        """Execute text replacement action"""
-        file_path = Path(action["file"]).expanduser()
+        previews = []
+        jobs = []
+        for path in originals:
+            before = originals[path] or ""
+            after = overlay[path] or ""
+            if originals[path] == overlay[path]:
+                continue
+            preview = {
+                'file': str(path),
+                'status': 'deleted' if overlay[path] is None else 'created' if originals[path] is None else 'modified',
+                'bytes_before': len(before.encode()),
+                'bytes_after': len(after.encode()),
+                'lines_before': before.count('\n'),
+                'lines_after': after.count('\n'),
+                'lines_added': 0,
+                'lines_removed': 0,
+                'diff': None,
+                'note': notes.get(path)
+            }
+            if max(preview['bytes_before'], preview['bytes_after']) > size_cap:
+                preview['note'] = f"diff skipped, larger than {size_cap // 1024} KB"
+            else:
+                jobs.append((len(previews), (before, after, str(path).lstrip('/'))))
+            previews.append(preview)
+            
+        # Diffing is pure Python, so large batches go to worker processes
+        total = sum(len(job[1][0]) + len(job[1][1]) for job in jobs)
+        executor = None
+        if len(jobs) > 1 and total > PARALLEL_DIFF_THRESHOLD:
+            executor = ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1))
+            pending = {index: executor.submit(unified_diff_job, job) for index, job in jobs}
+        else:
+            pending = {index: job for index, job in jobs}
+            
+        try:
+            for index, preview in enumerate(previews):
+                if index in pending:
+                    work = pending[index]
+                    diff = work.result() if executor else unified_diff_job(work)
+                    preview['diff'] = diff
+                    for line in diff.splitlines():
+                        if line.startswith('+') and not line.startswith('+++'):
+                            preview['lines_added'] += 1
+                        elif line.startswith('-') and not line.startswith('---'):
+                            preview['lines_removed'] += 1
+                if on_preview:
+                    on_preview(preview)
+        finally:
+            if executor:
+                executor.shutdown()
+                
+        for description in unsimulated:
+            print(f"  Note: {description} cannot be previewed")
+        return previews
         
-        if not file_path.exists():
-            print(f"Warning: File not found: {file_path}")
+    @staticmethod
+    def _print_preview(preview: Dict):
+        """Stream one file preview"""
+        if preview['diff']:
+            print(preview['diff'], end='')
+        else:
+            print(f"{preview['status']}: {preview['file']}" +
+                  (f" ({preview['note']})" if preview['note'] else ""))
+            
+    @staticmethod
+    def _print_preview_summary(previews: List[Dict]):
+        """Per-file byte and line deltas"""
+        if not previews:
+            print("No file changes")
             return
+        print(f"\n{len(previews)} file(s) would change:")
+        for preview in previews:
+            byte_delta = preview['bytes_after'] - preview['bytes_before']
+            if preview['diff'] is not None:
+                lines = f"+{preview['lines_added']} -{preview['lines_removed']}"
+            else:
+                lines = f"{preview['lines_after'] - preview['lines_before']:+d} lines"
+            print(f"  {preview['status']:<8} {preview['file']}: {lines}, {byte_delta:+d} bytes")
             
-        content = file_path.read_text()
+    @staticmethod
+    def _unjournaled_components(rules: List[MigrationRule]) -> List[str]:
+        """Components with scripts that declare no file outputs"""
+        components = []
+        for rule in rules:
+            declares_files = any(not output.startswith("component:") for output in rule.outputs)
+            has_script = any(action["type"] == "run_script" for action in rule.actions)
+            if has_script and not declares_files and rule.component not in components:
+                components.append(rule.component)
+        return components
+        
+    def compile_rules(self, rules: List[MigrationRule]) -> List[CompiledStep]:
+        """Compile rules into executable steps
+        
+        Text/regex actions are grouped into one FilePipeline per file, so
+        each file is read and written once however many rules touch it.
+        Other actions (script, move, delete) become single steps. A later
+        rewrite only joins an open pipeline if no step compiled since then
+        conflicts with it, which keeps ordering.
+        """
+        steps = []
+        open_pipelines = {}  # path -> index into steps
+        
+        for rule in rules:
+            rule_reads = {f"component:{rule.component}"} | {_resource(r) for r in rule.inputs}
+            rule_writes = {_resource(r) for r in rule.outputs}
+            
+            for action in rule.actions:
+                writes = rule_writes | self._action_writes(action, rule)
+                
+                if action["type"] in TEXT_ACTIONS:
+                    path = Path(action["file"]).expanduser()
+                    candidate = CompiledStep("action", action, [rule.id], set(rule_reads), writes)
+                    index = open_pipelines.get(path)
+                    if index is not None and any(step.conflicts_with(candidate) for step in steps[index + 1:]):
+                        index = None
+                        
+                    if index is None:
+                        open_pipelines[path] = len(steps)
+                        steps.append(CompiledStep("pipeline", FilePipeline(path), []))
+                        index = len(steps) - 1
+                        
+                    step = steps[index]
+                    step.payload.add_action(action, rule.id)
+                    if rule.id not in step.rule_ids:
+                        step.rule_ids.append(rule.id)
+                    step.reads |= rule_reads
+                    step.writes |= writes
+                else:
+                    steps.append(CompiledStep("action", action, [rule.id], set(rule_reads), writes))
+                    
+        return steps
         
-        for replacement in action["replacements"]:
-            old_text = replacement["old"]
-            new_text = replacement["new"]
-            content = content.replace(old_text, new_text)
+    @staticmethod
+    def _action_writes(action: Dict, rule: MigrationRule) -> Set[str]:
+        """Resources an action modifies"""
+        action_type = action["type"]
+        if action_type in TEXT_ACTIONS or action_type == "delete_file":
+            return {_resource(action["file"])}
+        if action_type == "move_file":
+            return {_resource(action["source"]), _resource(action["dest"])}
+        # Scripts may touch anything of their component unless outputs are declared
+        if rule.outputs:
+            return set()
+        return {f"component:{rule.component}"}
+        
+    @staticmethod
+    def _step_dependencies(steps: List[CompiledStep]) -> List[Set[int]]:
+        """DAG edges: each step waits for earlier steps it conflicts with"""
+        return [
+            {i for i in range(j) if steps[i].conflicts_with(steps[j])}
+            for j in range(len(steps))
+        ]
+        
+    def schedule_waves(self, steps: List[CompiledStep]) -> List[List[CompiledStep]]:
+        """Group steps into waves whose members can run in parallel"""
+        level = []
+        for deps in self._step_dependencies(steps):
+            level.append(1 + max((level[i] for i in deps), default=-1))
             
-        file_path.write_text(content)
+        waves = [[] for _ in range(max(level, default=-1) + 1)]
+        for step, lvl in zip(steps, level):
+            waves[lvl].append(step)
+        return waves
         
-    def _execute_replace_regex(self, action: Dict):
-        """Execute regex replacement action"""
-        import re
+    def _run_compiled_steps(self, steps: List[CompiledStep]) -> List[Dict]:
+        """Execute compiled steps in order, returning per-file pipeline timings"""
+        return [timing for timing in map(self._run_step, steps) if timing]
         
-        file_path = Path(action["file"]).expanduser()
+    def _run_step(self, step: CompiledStep) -> Optional[Dict]:
+        """Execute one compiled step"""
+        if self._journal is not None:
+            for resource in sorted(step.writes):
+                if resource.startswith("file:"):
+                    self._journal.record(Path(resource[5:]))
+                    
+        if step.kind == "pipeline":
+            return self._run_pipeline(step.payload)
+        self._execute_action(step.payload)
+        return None
         
-        if not file_path.exists():
-            print(f"Warning: File not found: {file_path}")
-            return
+    def run_scheduled_steps(self, steps: List[CompiledStep], rules: List[MigrationRule]) -> Dict[str, Dict]:
+        """Run steps on worker threads following their dependency DAG
+        
+        Steps start as soon as every conflicting earlier step is done. After
+        a failure no new steps are started; running ones are allowed to
+        finish. Returns per-rule status: done, failed or skipped.
+        """
+        deps = self._step_dependencies(steps)
+        remaining_steps = {rule.id: 0 for rule in rules}
+        for step in steps:
+            for rule_id in step.rule_ids:
+                remaining_steps[rule_id] += 1
+                
+        results = {
+            rule.id: {'name': rule.name, 'status': 'done' if not remaining_steps[rule.id] else 'pending',
+                      'error': None, 'seconds': 0.0}
+            for rule in rules
+        }
+        total = len(rules)
+        completed = sum(1 for r in results.values() if r['status'] == 'done')
+        
+        finished = set()
+        running = {}
+        failed = False
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                if not failed:
+                    for index, step in enumerate(steps):
+                        if index in finished or index in running.values() or not deps[index] <= finished:
+                            continue
+                        future = executor.submit(self._timed_step, step)
+                        running[future] = index
+                        
+                if not running:
+                    break
+                    
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    finished.add(index)
+                    step = steps[index]
+                    seconds, timing, error = future.result()
+                    if timing:
+                        status = "rewritten" if timing['changed'] else "unchanged"
+                        print(f"  {timing['file']}: {timing['transforms']} transforms, "
+                              f"{status} in {timing['seconds'] * 1000:.1f} ms")
+                    
+                    for rule_id in step.rule_ids:
+                        result = results[rule_id]
+                        result['seconds'] += seconds
+                        if error is not None:
+                            if result['status'] != 'failed':
+                                result['status'] = 'failed'
+                                result['error'] = error
+                                completed += 1
+                                print(f"[{completed}/{total}] ✗ {result['name']}: {error}")
+                            failed = True
+                            continue
+                        remaining_steps[rule_id] -= 1
+                        if remaining_steps[rule_id] == 0 and result['status'] == 'pending':
+                            result['status'] = 'done'
+                            completed += 1
+                            print(f"[{completed}/{total}] ✓ {result['name']} ({result['seconds'] * 1000:.1f} ms)")
+                            
+        for result in results.values():
+            if result['status'] == 'pending':
+                result['status'] = 'skipped'
+                print(f"  - Skipped: {result['name']}")
+                
+        return results
+        
+    def _timed_step(self, step: CompiledStep) -> Tuple[float, Optional[Dict], Optional[str]]:
+        """Run a step on a worker, capturing duration, file timing and error"""
+        start = time.perf_counter()
+        try:
+            timing = self._run_step(step)
+            return time.perf_counter() - start, timing, None
+        except Exception as e:
+            return time.perf_counter() - start, None, str(e)
             
-        content = file_path.read_text()
+    def _run_pipeline(self, pipeline: FilePipeline) -> Dict:
+        """Read a file once, apply all transforms, write it atomically"""
+        start = time.perf_counter()
+        timing = {
+            'file': str(pipeline.path),
+            'rules': pipeline.rule_ids,
+            'transforms': len(pipeline.transforms),
+            'changed': False,
+            'seconds': 0.0
+        }
+        
+        if not pipeline.path.exists():
+            print(f"Warning: File not found: {pipeline.path}")
+            return timing
+            
+        content = pipeline.path.read_text()
+        new_content = pipeline.apply(content)
+        
+        if new_content != content:
+            atomic_write(pipeline.path, new_content.encode())
+            timing['changed'] = True
+            
+        timing['seconds'] = time.perf_counter() - start
+        return timing
+        
+    def _execute_rule(self, rule: MigrationRule):
+        """Execute a single migration rule"""
+        self._run_compiled_steps(self.compile_rules([rule]))
         
-        for pattern_info in action["patterns"]:
-            pattern = pattern_info["pattern"]
-            replacement = pattern_info["replacement"]
-            content = re.sub(pattern, replacement, content)
+    def _execute_action(self, action: Dict):
+        """Execute a single non-pipeline action"""
+        action_type = action["type"]
+        
+        if action_type in TEXT_ACTIONS:
+            pipeline = FilePipeline(Path(action["file"]).expanduser())
+            pipeline.add_action(action, "")
+            self._run_pipeline(pipeline)
+        elif action_type == "run_script":
+            self._execute_run_script(action)
+        elif action_type == "move_file":
+            self._execute_move_file(action)
+        elif action_type == "delete_file":
+            self._execute_delete_file(action)
+        else:
+            print(f"Warning: Unknown action type: {action_type}")
             
-        file_path.write_text(content)
+    def _execute_replace_text(self, action: Dict):
+        """Execute text replacement action"""
+        self._execute_action(action)
+        
+    def _execute_replace_regex(self, action: Dict):
+        """Execute regex replacement action"""
+        self._execute_action(action)
         
     def _execute_run_script(self, action: Dict):
         """Execute script action"""
@@ -680,7 +1438,7 @@ class HyprSupremeMigrator:
             # Get migration info
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.execute(
-                    "SELECT backup_id, from_version FROM migration_history WHERE id = ?",
+                    "SELECT backup_id, from_version, rollback_available FROM migration_history WHERE id = ?",
                     (migration_id,)
                 )
                 row = cursor.fetchone()
@@ -688,14 +1446,28 @@ class HyprSupremeMigrator:
                 if not row:
                     raise ValueError(f"Migration {migration_id} not found")
                     
-                backup_id, from_version = row
+                backup_id, from_version, rollback_available = row
+                
+            if not rollback_available:
+                raise ValueError("No backup available for this migration")
                 
-            if not backup_id:
+            restored = self.replay_journal(migration_id)
+            
+            if not restored and not backup_id:
                 raise ValueError("No backup available for this migration")
                 
-            # Restore from backup
-            self.restore_backup(backup_id)
+            # A replayed journal must not be replayed again
+            MigrationJournal(self.db_path, self.journal_dir, migration_id).discard()
             
+            # Restore script-touched components from their archive
+            if backup_id and not self.restore_backup(backup_id):
+                raise RuntimeError(f"Could not restore backup {backup_id}")
+                
+            # The archive alone would no longer undo the whole migration
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("UPDATE migration_history SET rollback_available = 0 WHERE id = ?",
+                             (migration_id,))
+                
             # Revert version
             self.current_version['hyprsupreme'] = from_version
             self.save_current_version()
@@ -707,6 +1479,27 @@ class HyprSupremeMigrator:
             print(f"Rollback failed: {e}")
             return False
             
+    def replay_journal(self, migration_id: str) -> int:
+        """Undo a migration's file changes by replaying its journal in reverse"""
+        with sqlite3.connect(self.db_path) as conn:
+            entries = conn.execute("""
+                SELECT path, existed, blob, mode FROM migration_journal
+                WHERE migration_id = ? ORDER BY seq DESC
+            """, (migration_id,)).fetchall()
+            
+        for path, existed, blob, mode in entries:
+            path = Path(path)
+            if existed:
+                atomic_write(path, (self.journal_dir / blob).read_bytes(), mode)
+            elif path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists() or path.is_symlink():
+                path.unlink()
+                
+        if entries:
+            print(f"Restored {len(entries)} journaled files")
+        return len(entries)
+        
     def restore_backup(self, backup_id: str) -> bool:
         """Restore configuration from backup"""
         try:
@@ -730,6 +1523,48 @@ class HyprSupremeMigrator:
             print(f"Restore failed: {e}")
             return False
             
+    def list_backup_files(self, backup_id: str) -> List[Dict]:
+        """List the files in a backup from its index"""
+        if not self.backup_index.has(backup_id):
+            raise ValueError(f"Backup {backup_id} has no member index")
+        return [asdict(entry) for entry in self.backup_index.members(backup_id)]
+        
+    def diff_backup(self, backup_id: str) -> Dict[str, List[str]]:
+        """Compare a backup with the current configuration"""
+        if not self.backup_index.has(backup_id):
+            raise ValueError(f"Backup {backup_id} has no member index")
+        return self.backup_index.diff(backup_id)
+        
+    def restore_backup_file(self, backup_id: str, path: str) -> bool:
+        """Restore a single file from a backup"""
+        try:
+            if self.backup_index.has(backup_id):
+                target = self.backup_index.restore_member(backup_id, path)
+            else:
+                target = self._restore_unindexed_file(backup_id, path)
+            print(f"Restored {target} from backup {backup_id}")
+            return True
+        except Exception as e:
+            print(f"Restore failed: {e}")
+            return False
+            
+    def _restore_unindexed_file(self, backup_id: str, path: str) -> Path:
+        """Slow path for backups written before the member index existed"""
+        import tarfile
+        
+        backup = self._get_backup_metadata(backup_id)
+        if not backup:
+            raise ValueError(f"Backup {backup_id} not found")
+            
+        path = path.strip('/')
+        with tarfile.open(backup['path'], 'r:gz') as tar:
+            member = next((m for m in tar if m.isreg() and (m.name == path or m.name.endswith('/' + path))), None)
+            if member is None:
+                raise KeyError(f"{path} is not in backup {backup_id}")
+            target = Path.home() / member.name
+            atomic_write(target, tar.extractfile(member).read(), member.mode)
+        return target
+        
     def list_backups(self) -> List[Dict]:
         """List available backups"""
         with sqlite3.connect(self.db_path) as conn:
@@ -746,11 +1581,10 @@ class HyprSupremeMigrator:
             
     def check_for_updates(self) -> List[MigrationPlan]:
         """Check for available updates/migrations"""
-        plans = []
-        
         # Check each component for available updates
         detected_versions = self.detect_installed_versions()
         
+        targets = []
         for component, current_version in self.current_version.items():
             if component == 'hyprsupreme':
                 continue
@@ -758,20 +1592,23 @@ class HyprSupremeMigrator:
             # Check if newer version is available
             if component in detected_versions:
                 installed_version = detected_versions[component]
-                if semver.compare(installed_version, current_version) > 0:
-                    plan = self.plan_migration(installed_version, component)
-                    if plan:
-                        plans.append(plan)
-                        
-        return plans
+                if parse_version(installed_version) > parse_version(current_version):
+                    targets.append((installed_version, component))
+                    
+        if not targets:
+            return []
+            
+        # Plan all components in parallel; the rule index is built first and
+        # condition results are shared across components
+        self.rule_graph
+        session = self.condition_session()
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            plans = executor.map(lambda target: self.plan_migration(*target, session=session), targets)
+            return [plan for plan in plans if plan]
         
     def _calculate_checksum(self, file_path: Path) -> str:
         """Calculate SHA256 checksum of file"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
+        return digest_file(file_path)
         
     def _save_backup_metadata(self, backup: ConfigBackup):
         """Save backup metadata to database"""
@@ -796,7 +1633,7 @@ class HyprSupremeMigrator:
             return dict(row) if row else None
             
     def _record_migration(self, plan: MigrationPlan, backup_id: str, duration: int, 
-                         success: bool, error_message: str = None):
+                         success: bool, error_message: str = None, journaled: bool = False):
         """Record migration in history"""
         with sqlite3.connect(self.db_path) as conn:
             conn.execute("""
@@ -807,9 +1644,102 @@ class HyprSupremeMigrator:
             """, (
                 plan.id, plan.name, plan.from_version, plan.to_version,
                 datetime.now().isoformat(), duration, success, backup_id,
-                error_message, backup_id is not None
+                error_message, backup_id is not None or journaled
             ))
 
+    # Retention store interface (see retention.py)
+    retention_name = 'migrator'
+    
+    def retention_policy(self) -> RetentionPolicy:
+        """Retention policy for migration backups"""
+        return RetentionPolicy()
+        
+    def retention_items(self) -> List[RetentionItem]:
+        """Backups subject to retention
+        
+        The backup of the most recent successful migration is pinned so it
+        can always be rolled back.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("""
+                SELECT backup_id FROM migration_history
+                WHERE success = 1 AND backup_id IS NOT NULL
+                ORDER BY executed_at DESC LIMIT 1
+            """).fetchone()
+        latest_rollback = row[0] if row else None
+        
+        items = []
+        for backup in self.list_backups():
+            try:
+                created_at = datetime.fromisoformat(backup['created_at'])
+            except (TypeError, ValueError):
+                continue
+            items.append(RetentionItem(
+                id=backup['id'],
+                store=self.retention_name,
+                created_at=created_at,
+                size=backup['size'] or 0,
+                label=backup['name'],
+                pinned=backup['id'] == latest_rollback
+            ))
+        return items
+        
+    def delete_retention_item(self, item_id: str):
+        """Delete a pruned backup and disable rollbacks that relied on it"""
+        backup = self._get_backup_metadata(item_id)
+        if not backup:
+            return
+            
+        backup_path = Path(backup['path'])
+        if backup_path.exists():
+            backup_path.unlink()
+            
+        self.backup_index.delete(item_id)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM backups WHERE id = ?", (item_id,))
+            conn.execute(
+                "UPDATE migration_history SET rollback_available = 0 WHERE backup_id = ?",
+                (item_id,)
+            )
+            
+    def retention_blob_stores(self) -> List[BlobStore]:
+        """Backup archives with their live references"""
+        with sqlite3.connect(self.db_path) as conn:
+            live = {Path(row[0]).name for row in conn.execute("SELECT path FROM backups") if row[0]}
+            journal_live = {row[0] for row in conn.execute(
+                "SELECT DISTINCT blob FROM migration_journal WHERE blob IS NOT NULL"
+            )}
+        return [BlobStore(self.backups_dir, live, "backup_*.tar.gz"),
+                BlobStore(self.journal_dir, journal_live)]
+
+    # Scrub store interface (see backup_scrub.py)
+    def scrub_targets(self) -> List[ScrubTarget]:
+        """Backup archives with their recorded checksums"""
+        return [
+            ScrubTarget(id=backup['id'], store=self.retention_name,
+                        path=Path(backup['path']), checksum=backup['checksum'])
+            for backup in self.list_backups()
+        ]
+        
+    def record_scrub_result(self, result: ScrubResult):
+        """Store the outcome of a backup verification"""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO backup_verifications (backup_id, verified_at, ok, error, duration, bytes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (result.id, result.verified_at, result.ok, result.error, result.duration, result.bytes))
+            
+    def get_backup_verifications(self, backup_id: str = None) -> List[Dict]:
+        """Verification history, newest first"""
+        query = "SELECT * FROM backup_verifications"
+        params = ()
+        if backup_id:
+            query += " WHERE backup_id = ?"
+            params = (backup_id,)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query + " ORDER BY verified_at DESC", params)]
+
 # CLI Interface
 def main():
     """Command line interface for migration system"""
@@ -848,6 +1778,13 @@ def main():
     
     restore_backup = backup_subparsers.add_parser('restore', help='Restore backup')
     restore_backup.add_argument('backup_id', help='Backup ID')
+    restore_backup.add_argument('-f', '--file', help='Restore only this file (e.g. waybar/config)')
+    
+    files_backup = backup_subparsers.add_parser('files', help='List files in a backup')
+    files_backup.add_argument('backup_id', help='Backup ID')
+    
+    diff_backup = backup_subparsers.add_parser('diff', help='Compare a backup with current files')
+    diff_backup.add_argument('backup_id', help='Backup ID')
     
     # Rollback command
     rollback_parser = subparsers.add_parser('rollback', help='Rollback migration')
@@ -929,10 +1866,29 @@ def main():
                     print()
                     
             elif args.backup_action == 'restore':
-                if migrator.restore_backup(args.backup_id):
+                if args.file:
+                    restored = migrator.restore_backup_file(args.backup_id, args.file)
+                else:
+                    restored = migrator.restore_backup(args.backup_id)
+                if restored:
                     print("Backup restored successfully!")
                 else:
                     print("Restore failed!")
+                    
+            elif args.backup_action == 'files':
+                files = migrator.list_backup_files(args.backup_id)
+                print(f"Files in backup {args.backup_id} ({len(files)}):")
+                for entry in files:
+                    print(f"  {entry['path']} ({entry['size']} bytes)")
+                    
+            elif args.backup_action == 'diff':
+                diff = migrator.diff_backup(args.backup_id)
+                for path in diff['modified']:
+                    print(f"  M {path}")
+                for path in diff['deleted']:
+                    print(f"  D {path}")
+                print(f"{len(diff['modified'])} modified, {len(diff['deleted'])} deleted, "
+                      f"{len(diff['unchanged'])} unchanged")
             else:
                 backup_parser.print_help()
                 
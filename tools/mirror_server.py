@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Mirror
+Local caching mirror for release metadata, update archives and theme archives
+
+Clients address an upstream URL through the mirror by its scheme, host
+and path, so ``https://api.github.com/repos/x/releases`` becomes
+``http://mirror:8765/https/api.github.com/repos/x/releases``. Relative
+links (such as delta patches next to their index) keep working.
+
+Bodies are stored once per SHA-256 under ``objects/``; an sqlite index
+maps each upstream URL to its object and the upstream validators. Stale
+entries are revalidated with If-None-Match/If-Modified-Since, and kept
+serving when the upstream is unreachable.
+"""
+
+import os
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+from dataclasses import dataclass
+
+DEFAULT_PORT = 8765
+DEFAULT_TTL = 300  # seconds before a cached entry is revalidated upstream
+
+DEFAULT_HOSTS = (
+    'api.github.com',
+    'github.com',
+    'codeload.github.com',
+    'objects.githubusercontent.com',
+    'community.hyprsupreme.com',
+)
+
+# Environment variable clients read when no mirror is configured explicitly
+MIRROR_ENV = 'HYPRSUPREME_MIRROR'
+
+READ_CHUNK = 64 * 1024
+
+
+def mirror_url(url: str, mirror: Optional[str]) -> str:
+    """Address url through the mirror; unchanged if there is no mirror or it already is"""
+    if not mirror or not url:
+        return url
+    mirror = mirror.rstrip('/')
+    if url.startswith(mirror + '/'):
+        return url
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return url
+    mirrored = f"{mirror}/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+    return f"{mirrored}?{parts.query}" if parts.query else mirrored
+
+
+def upstream_url(path: str) -> Optional[str]:
+    """Inverse of mirror_url for a request path such as '/https/host/x?y'"""
+    scheme, _, rest = path.lstrip('/').partition('/')
+    if scheme not in ('http', 'https') or not rest:
+        return None
+    return f"{scheme}://{rest}"
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    sha256: str
+    size: int
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    validated_at: float
+
+
+class MirrorError(Exception):
+    """Upstream failure with nothing cached to fall back on"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class MirrorStore:
+    """Content-addressed object store plus the URL index"""
+
+    def __init__(self, root: Path, ttl: int = DEFAULT_TTL, allowed_hosts: Iterable[str] = DEFAULT_HOSTS):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "mirror.db"
+        self.ttl = ttl
+        self.allowed_hosts = set(allowed_hosts)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._objects_lock = threading.Lock()  # object replace, index update and unlink
+        self._session = None
+        self.stats = {'hits': 0, 'revalidated': 0, 'fetched': 0, 'stale': 0}
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    content_type TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at TEXT,
+                    validated_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_sha256 ON entries(sha256);
+            """)
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers['User-Agent'] = 'HyprSupreme-Mirror'
+        return self._session
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects / sha256[:2] / sha256
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("""
+                SELECT url, sha256, size, content_type, etag, last_modified, validated_at
+                FROM entries WHERE url = ?
+            """, (url,)).fetchone()
+        if row and self.object_path(row[1]).exists():
+            return CacheEntry(*row)
+        return None
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def _check_host(self, url: str):
+        host = urlsplit(url).hostname
+        if host not in self.allowed_hosts:
+            raise MirrorError(403, f"host {host} is not mirrored")
+
+    def open(self, url: str, accept: Optional[str] = None) -> Tuple[CacheEntry, str, BinaryIO]:
+        """Entry for url and its body, fetching or revalidating as needed
+
+        Concurrent requests for one URL wait for a single upstream fetch.
+        The body is opened before the URL lock is released, so a refetch
+        that drops the old object cannot remove it from under the reader.
+        The caller closes the returned file.
+        """
+        self._check_host(url)
+        with self._url_lock(url):
+            entry = self.lookup(url)
+            now = datetime.now().timestamp()
+            if entry and now - entry.validated_at < self.ttl:
+                how = 'hit'
+            else:
+                entry, how = self._fetch(url, entry, accept)
+            body = open(self.object_path(entry.sha256), 'rb')
+        self.stats['hits' if how == 'hit' else how] += 1
+        return entry, how, body
+
+    def head(self, url: str, accept: Optional[str] = None) -> Tuple[Optional[CacheEntry], int, Dict[str, str]]:
+        """Metadata for url without downloading a body
+
+        Returns the cached entry if there is one, otherwise the status and
+        headers of an upstream HEAD request.
+        """
+        self._check_host(url)
+        entry = self.lookup(url)
+        if entry:
+            return entry, 200, {}
+        import requests
+
+        try:
+            response = self.session.head(url, headers={'Accept': accept} if accept else {},
+                                         allow_redirects=True, timeout=60)
+        except requests.RequestException as e:
+            raise MirrorError(502, f"{url}: {e.__class__.__name__}")
+        headers = {name: response.headers[name]
+                   for name in ('Content-Type', 'Content-Length', 'Last-Modified') if name in response.headers}
+        return None, response.status_code, headers
+
+    def _fetch(self, url: str, entry: Optional[CacheEntry], accept: Optional[str]) -> Tuple[CacheEntry, str]:
+        import requests
+
+        headers = {'Accept': accept} if accept else {}
+        if entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = self.session.get(url, headers=headers, stream=True, timeout=60)
+        except requests.RequestException as e:
+            if entry:
+                return entry, 'stale'
+            raise MirrorError(502, f"{url}: {e.__class__.__name__}")
+
+        with response:
+            now = datetime.now().timestamp()
+            if response.status_code == 304 and entry:
+                with sqlite3.connect(self.db_path) as conn:
+                    conn.execute("UPDATE entries SET validated_at = ? WHERE url = ?", (now, url))
+                entry.validated_at = now
+                return entry, 'revalidated'
+
+            if response.status_code != 200:
+                if entry:
+                    return entry, 'stale'
+                raise MirrorError(response.status_code, f"{url}: upstream returned HTTP {response.status_code}")
+
+            tmp_name, sha256, size = self._receive_body(response.iter_content(READ_CHUNK))
+
+        new_entry = CacheEntry(url, sha256, size,
+                               response.headers.get('Content-Type', 'application/octet-stream'),
+                               response.headers.get('ETag'), response.headers.get('Last-Modified'), now)
+        self._commit_body(tmp_name, new_entry, entry)
+        return new_entry, 'fetched'
+
+    def _receive_body(self, chunks: Iterable[bytes]) -> Tuple[str, str, int]:
+        """Stream a body into a temporary file beside the objects; returns (path, sha256, size)"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.objects, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        return tmp_name, digest.hexdigest(), size
+
+    def _commit_body(self, tmp_name: str, entry: CacheEntry, replaced: Optional[CacheEntry]):
+        """Move a received body into place, index it and drop the object it replaced
+
+        Identical bodies share one file. Holding the objects lock keeps
+        another URL's commit from unlinking an object this one has stored
+        but not yet indexed.
+        """
+        target = self.object_path(entry.sha256)
+        with self._objects_lock:
+            try:
+                target.parent.mkdir(exist_ok=True)
+                os.replace(tmp_name, target)
+            except BaseException:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO entries
+                    (url, sha256, size, content_type, etag, last_modified, fetched_at, validated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (entry.url, entry.sha256, entry.size, entry.content_type, entry.etag,
+                      entry.last_modified, datetime.now().isoformat(), entry.validated_at))
+            if replaced and replaced.sha256 != entry.sha256:
+                self._drop_unreferenced(replaced.sha256)
+
+    def _drop_unreferenced(self, sha256: str):
+        with sqlite3.connect(self.db_path) as conn:
+            still_used = conn.execute("SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+        if not still_used:
+            try:
+                self.object_path(sha256).unlink()
+            except FileNotFoundError:
+                pass
+
+    def usage(self) -> Dict[str, int]:
+        with sqlite3.connect(self.db_path) as conn:
+            entries, logical = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            objects, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT sha256, MAX(size) AS size FROM entries GROUP BY sha256)"
+            ).fetchone()
+        return {'entries': entries, 'objects': objects, 'logical_bytes': logical, 'stored_bytes': stored}
+
+
+def make_server(store: MirrorStore, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+    """ThreadingHTTPServer answering GET/HEAD from the store"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MirrorHandler(BaseHTTPRequestHandler):
+        server_version = "HyprSupremeMirror/1.0"
+
+        def do_GET(self):
+            url = self._upstream()
+            if url is None:
+                return
+            try:
+                entry, how, body = store.open(url, self.headers.get('Accept'))
+            except MirrorError as e:
+                self.send_error(e.status, str(e))
+                return
+            with body:
+                if self._send_headers(entry, how):
+                    while True:
+                        chunk = body.read(READ_CHUNK)
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+
+        def do_HEAD(self):
+            url = self._upstream()
+            if url is None:
+                return
+            try:
+                entry, status, headers = store.head(url, self.headers.get('Accept'))
+            except MirrorError as e:
+                self.send_error(e.status, str(e))
+                return
+            if entry:
+                self._send_headers(entry, 'cached')
+                return
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('X-Mirror-Cache', 'miss')
+            self.end_headers()
+
+        def _upstream(self) -> Optional[str]:
+            url = upstream_url(self.path)
+            if url is None:
+                self.send_error(404, "Request /<scheme>/<host>/<path>")
+            return url
+
+        def _send_headers(self, entry: CacheEntry, how: str) -> bool:
+            """Send the response head; False if the client's copy is current"""
+            etag = f'"{entry.sha256}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('X-Mirror-Cache', how)
+                self.end_headers()
+                return False
+
+            self.send_response(200)
+            self.send_header('Content-Type', entry.content_type)
+            self.send_header('Content-Length', str(entry.size))
+            self.send_header('ETag', etag)
+            self.send_header('X-Mirror-Cache', how)
+            if entry.last_modified:
+                self.send_header('Last-Modified', entry.last_modified)
+            self.end_headers()
+            return True
+
+        def log_message(self, format, *args):
+            if os.environ.get('HYPRSUPREME_MIRROR_LOG'):
+                super().log_message(format, *args)
+
+    return ThreadingHTTPServer((host, port), MirrorHandler)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HyprSupreme caching mirror")
+    parser.add_argument('--root', default=os.path.expanduser("~/.cache/hyprsupreme/mirror"),
+                        help="Cache directory")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Address to listen on (use 0.0.0.0 to serve the LAN)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--ttl', type=int, default=DEFAULT_TTL,
+                        help="Seconds before cached entries are revalidated")
+    parser.add_argument('--allow-host', action='append', default=[],
+                        help="Additional upstream host to mirror (repeatable)")
+    parser.add_argument('--stats', action='store_true', help="Print cache usage and exit")
+    args = parser.parse_args()
+
+    store = MirrorStore(Path(args.root), args.ttl, DEFAULT_HOSTS + tuple(args.allow_host))
+    if args.stats:
+        usage = store.usage()
+        print(f"{usage['entries']} URLs, {usage['objects']} objects, "
+              f"{usage['stored_bytes'] / 1024 / 1024:.1f} MB stored "
+              f"({usage['logical_bytes'] / 1024 / 1024:.1f} MB served)")
+        return
+
+    server = make_server(store, args.host, args.port)
+    print(f"🪞 Mirroring {', '.join(sorted(store.allowed_hosts))}")
+    print(f"   Listening on http://{args.host}:{args.port} (cache: {store.root})")
+    print(f"   Point clients at it with {MIRROR_ENV}=http://<this-host>:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Package Index
+Installed package names read straight from the package manager databases
+"""
+
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+PACMAN_LOCAL = Path("/var/lib/pacman/local")
+DPKG_STATUS = Path("/var/lib/dpkg/status")
+
+_ARCH_SUFFIX = re.compile(r':[a-z0-9_]+$')
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case a package name and drop a dpkg ':arch' qualifier"""
+    return _ARCH_SUFFIX.sub('', name.strip().lower())
+
+
+def read_pacman_local(root: Path = PACMAN_LOCAL) -> Set[str]:
+    """Package names from pacman's local database ('<name>-<pkgver>-<pkgrel>' dirs)"""
+    names = set()
+    for entry in root.iterdir():
+        parts = entry.name.rsplit('-', 2)
+        if len(parts) == 3 and entry.is_dir():
+            names.add(normalize_name(parts[0]))
+    return names
+
+
+def read_dpkg_status(path: Path = DPKG_STATUS) -> Set[str]:
+    """Package names marked installed in a dpkg status file"""
+    names = set()
+    package = None
+    installed = False
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith('Package:'):
+                package = line[8:].strip()
+            elif line.startswith('Status:'):
+                installed = line.split()[-1] == 'installed'
+            elif not line.strip():
+                if package and installed:
+                    names.add(normalize_name(package))
+                package, installed = None, False
+    if package and installed:
+        names.add(normalize_name(package))
+    return names
+
+
+def read_rpm_query() -> Set[str]:
+    """Package names from rpm (its database is not a plain file, so ask rpm)"""
+    result = subprocess.run(['rpm', '-qa', '--qf', '%{NAME}\\n'],
+                            capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        raise OSError(result.stderr.strip() or "rpm query failed")
+    return {normalize_name(line) for line in result.stdout.splitlines() if line.strip()}
+
+
+class PrefixTrie:
+    """Character trie for prefix lookups; each key maps to a set of values"""
+
+    _END = ''
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: Dict[str, dict] = {}
+        for word in words:
+            self.insert(word)
+
+    def insert(self, key: str, value: Optional[str] = None):
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(self._END, set()).add(key if value is None else value)
+
+    def _find(self, prefix: str) -> Optional[dict]:
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def has_prefix(self, prefix: str) -> bool:
+        return self._find(prefix) is not None
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """Sorted values of every key starting with prefix"""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        values = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char == self._END:
+                    values.update(child)
+                else:
+                    stack.append(child)
+        return sorted(values)
+
+
+class PackageIndex:
+    """Set of installed package names plus a trie for fuzzy matches.
+
+    The trie holds each name and every '-'-separated suffix of it, so
+    'obs' finds 'obs-studio' and 'gamemode' finds 'lib32-gamemode'.
+    """
+
+    def __init__(self, names: Iterable[str], source: str = "unknown"):
+        self.names: Set[str] = {normalize_name(n) for n in names if n}
+        self.source = source
+        self._trie: Optional[PrefixTrie] = None
+
+    @classmethod
+    def load(cls, pacman_local: Path = PACMAN_LOCAL, dpkg_status: Path = DPKG_STATUS) -> "PackageIndex":
+        """Read the first available package database; empty if none is found"""
+        readers = [
+            ('pacman', lambda: read_pacman_local(pacman_local) if pacman_local.is_dir() else None),
+            ('dpkg', lambda: read_dpkg_status(dpkg_status) if dpkg_status.is_file() else None),
+            ('rpm', read_rpm_query),
+        ]
+        for source, reader in readers:
+            try:
+                names = reader()
+            except (OSError, subprocess.SubprocessError):
+                continue
+            if names:
+                return cls(names, source)
+        return cls((), "none")
+
+    @property
+    def trie(self) -> PrefixTrie:
+        if self._trie is None:
+            trie = PrefixTrie()
+            for name in self.names:
+                parts = name.split('-')
+                for i in range(len(parts)):
+                    trie.insert('-'.join(parts[i:]), name)
+            self._trie = trie
+        return self._trie
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def matches(self, app: str) -> bool:
+        """Exact name, or any name (or name component) starting with app"""
+        app = normalize_name(app)
+        return app in self.names or self.trie.has_prefix(app)
+
+    def find(self, app: str, limit: Optional[int] = None) -> List[str]:
+        """Installed names whose name or a '-' suffix of it starts with app"""
+        found = self.trie.with_prefix(normalize_name(app))
+        return found[:limit] if limit is not None else found
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query installed packages")
+    parser.add_argument('prefix', nargs='?', help="List packages matching this prefix")
+    args = parser.parse_args()
+
+    index = PackageIndex.load()
+    if args.prefix:
+        for name in index.find(args.prefix):
+            print(name)
+    else:
+        print(f"{len(index)} packages from {index.source}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Preset Compiler
+Parse, validate and flatten presets/*.preset into cached JSON artifacts
+"""
+
+import os
+import re
+import sys
+import json
+import shlex
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config_merge import atomic_write
+
+# Bump when the parser or the artifact layout changes to invalidate caches
+COMPILER_VERSION = "1"
+
+PRESETS_DIR = Path(__file__).parent.parent / "presets"
+DEFAULT_CACHE_DIR = Path(os.path.expanduser("~/.cache/hyprsupreme/presets"))
+
+# Keys that must be lists; every other key is a scalar setting
+ARRAY_KEYS = ("configs", "components", "features")
+INHERIT_KEY = "inherits"
+
+_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')
+_KEY = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)(\+?=|:)(.*)$')
+_TITLE = re.compile(r'^#\s*HyprSupreme-Builder Preset:\s*(.+)$')
+
+
+class PresetError(ValueError):
+    """A preset that cannot be parsed, resolved or validated"""
+
+
+def _strip_comment(text: str) -> str:
+    """Drop a trailing # comment that is not inside quotes"""
+    quote = None
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == '#' and (i == 0 or text[i - 1].isspace()):
+            return text[:i].rstrip()
+    return text.strip()
+
+
+def _unquote(token: str) -> str:
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "\"'":
+        return token[1:-1]
+    return token
+
+
+def _array_items(text: str, source: str, lineno: int) -> List[str]:
+    """Items of one line of an array body"""
+    text = text.strip()
+    if text.startswith('- '):
+        text = text[2:]  # YAML-style list entry
+    try:
+        return [_unquote(token) for token in shlex.split(text, posix=False)]
+    except ValueError as e:
+        raise PresetError(f"{source}:{lineno}: {e}")
+
+
+def parse_preset(text: str, source: str = "<preset>") -> Dict:
+    """Parse one preset file without resolving inheritance
+
+    Understands the shell-style ``key=( ... )`` arrays, ``key+=( ... )``
+    appends, ``key="value"`` settings and the YAML-style ``key:`` lists
+    some presets use. Returns ``{"title", "description", "assign",
+    "append", "settings", "inherits"}``.
+    """
+    parsed = {
+        'title': None, 'description': None,
+        'assign': {}, 'append': {}, 'settings': {}, 'inherits': []
+    }
+    header = []
+    array: Optional[Tuple[str, str, int]] = None  # (key, operator, opened at)
+    items: List[str] = []
+
+    def close_array():
+        target = parsed['append'] if array[1] == '+=' else parsed['assign']
+        target.setdefault(array[0], []).extend(items)
+
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        stripped = raw.strip()
+        if stripped.startswith('#'):
+            if array is None and not parsed['assign'] and not parsed['settings']:
+                header.append(stripped)
+            continue
+
+        line = _strip_comment(stripped)
+        if not line:
+            continue
+
+        if array is not None:
+            match = _KEY.match(line)
+            if line == ')':
+                close_array()
+                array = None
+                continue
+            if match and array[1] == ':' and not line.startswith(('-', '"', "'")):
+                # a YAML-style list ends at the next key
+                close_array()
+                array = None
+            else:
+                if line.endswith(')'):
+                    items.extend(_array_items(line[:-1], source, lineno))
+                    close_array()
+                    array = None
+                else:
+                    items.extend(_array_items(line, source, lineno))
+                continue
+
+        match = _KEY.match(line)
+        if not match:
+            raise PresetError(f"{source}:{lineno}: expected 'key=value', got {line!r}")
+        key, operator, value = match.group(1), match.group(2), match.group(3).strip()
+
+        if operator == ':' or value.startswith('('):
+            if key not in ARRAY_KEYS and key != INHERIT_KEY:
+                raise PresetError(f"{source}:{lineno}: '{key}' is not a list setting")
+            items = []
+            array = (key, operator, lineno)
+            body = value[1:] if value.startswith('(') else value
+            if body.endswith(')'):
+                items.extend(_array_items(body[:-1], source, lineno))
+                close_array()
+                array = None
+            elif body:
+                items.extend(_array_items(body, source, lineno))
+            continue
+
+        if key in ARRAY_KEYS:
+            raise PresetError(f"{source}:{lineno}: '{key}' must be a list, e.g. {key}=( ... )")
+        if operator == '+=':
+            raise PresetError(f"{source}:{lineno}: '+=' only applies to lists")
+        value = _unquote(value)
+        if key == INHERIT_KEY:
+            parsed['inherits'].extend(value.split())
+        else:
+            parsed['settings'][key] = value
+
+    if array is not None:
+        if array[1] != ':':
+            raise PresetError(f"{source}:{array[2]}: '{array[0]}' list is never closed")
+        close_array()
+
+    # 'inherits' may also be written as a list
+    parsed['inherits'].extend(parsed['assign'].pop(INHERIT_KEY, []))
+    parsed['inherits'].extend(parsed['append'].pop(INHERIT_KEY, []))
+
+    for key, values in list(parsed['assign'].items()) + list(parsed['append'].items()):
+        for value in values:
+            if not _NAME.match(value):
+                raise PresetError(f"{source}: invalid {key} entry {value!r}")
+    for parent in parsed['inherits']:
+        if not _NAME.match(parent):
+            raise PresetError(f"{source}: invalid parent preset name {parent!r}")
+
+    for line in header:
+        match = _TITLE.match(line)
+        if match:
+            parsed['title'] = match.group(1).strip()
+        elif parsed['title'] and parsed['description'] is None:
+            parsed['description'] = line.lstrip('#').strip() or None
+
+    return parsed
+
+
+def _dedupe(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+class PresetCompiler:
+    """Resolve preset inheritance and cache the flattened result
+
+    Artifacts are keyed on the SHA256 of every source file in the
+    inheritance chain, so editing a base preset recompiles its children.
+    """
+
+    def __init__(self, presets_dir: Path = None, cache_dir: Path = None):
+        self.presets_dir = Path(presets_dir or os.environ.get("HYPRSUPREME_PRESETS_DIR") or PRESETS_DIR)
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        dir_hash = hashlib.sha1(str(self.presets_dir.resolve()).encode()).hexdigest()[:8]
+        self._artifact_suffix = f"-{dir_hash}.json"
+
+    def available(self) -> List[str]:
+        """Names of all presets in the presets directory"""
+        return sorted(path.stem for path in self.presets_dir.glob("*.preset"))
+
+    def source_path(self, name: str) -> Path:
+        if not _NAME.match(name):
+            raise PresetError(f"Invalid preset name: {name!r}")
+        return self.presets_dir / f"{name}.preset"
+
+    def artifact_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}{self._artifact_suffix}"
+
+    def compile(self, name: str) -> Dict:
+        """Parse and flatten a preset and its ancestors, bypassing the cache"""
+        sources: Dict[str, str] = {}
+        parsed: Dict[str, Dict] = {}
+
+        def visit(preset: str, stack: Tuple[str, ...]):
+            if preset in stack:
+                raise PresetError("Preset inheritance cycle: " + " -> ".join(stack + (preset,)))
+            if preset in parsed:
+                return
+            path = self.source_path(preset)
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                via = f" (inherited by {stack[-1]})" if stack else ""
+                raise PresetError(f"Preset not found: {preset}{via}")
+            sources[str(path)] = hashlib.sha256(data).hexdigest()
+            parsed[preset] = parse_preset(data.decode('utf-8'), str(path))
+            for parent in parsed[preset]['inherits']:
+                visit(parent, stack + (preset,))
+
+        visit(name, ())
+
+        def flatten(preset: str) -> Dict:
+            layer = parsed[preset]
+            result = {key: [] for key in ARRAY_KEYS}
+            result['settings'] = {}
+            for parent in layer['inherits']:
+                base = flatten(parent)
+                for key in ARRAY_KEYS:
+                    result[key] = result[key] + base[key]
+                result['settings'].update(base['settings'])
+            for key, values in layer['assign'].items():
+                result[key] = list(values)
+            for key, values in layer['append'].items():
+                result[key] = result[key] + values
+            for key in ARRAY_KEYS:
+                result[key] = _dedupe(result[key])
+            result['settings'].update(layer['settings'])
+            return result
+
+        preset = flatten(name)
+        root = parsed[name]
+        preset.update(
+            name=name,
+            title=root['title'] or name.title(),
+            description=root['description'] or "",
+            inherits=root['inherits']
+        )
+        return {
+            'compiler': COMPILER_VERSION,
+            'key': self._cache_key(sources),
+            'sources': sources,
+            'preset': preset
+        }
+
+    @staticmethod
+    def _cache_key(sources: Dict[str, str]) -> str:
+        digest = hashlib.sha256(COMPILER_VERSION.encode())
+        for path in sorted(sources):
+            digest.update(f"{path}\0{sources[path]}\0".encode())
+        return digest.hexdigest()
+
+    def _load_artifact(self, name: str) -> Optional[Dict]:
+        """Cached artifact if every recorded source still has the same hash"""
+        try:
+            artifact = json.loads(self.artifact_path(name).read_text())
+            if artifact.get('compiler') != COMPILER_VERSION:
+                return None
+            current = {}
+            for path in artifact['sources']:
+                current[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+            if self._cache_key(current) != artifact['key']:
+                return None
+            return artifact
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def load(self, name: str, use_cache: bool = True) -> Dict:
+        """Flattened preset, compiled on first use and cached afterwards"""
+        if use_cache:
+            artifact = self._load_artifact(name)
+            if artifact:
+                return artifact['preset']
+
+        artifact = self.compile(name)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.artifact_path(name), json.dumps(artifact, indent=2).encode())
+        except OSError as e:
+            print(f"Warning: Could not cache compiled preset {name}: {e}", file=sys.stderr)
+        return artifact['preset']
+
+    def load_all(self, use_cache: bool = True) -> Dict[str, Dict]:
+        """Every preset that compiles; broken ones are reported and skipped"""
+        presets = {}
+        for name in self.available():
+            try:
+                presets[name] = self.load(name, use_cache)
+            except PresetError as e:
+                print(f"Warning: {e}", file=sys.stderr)
+        return presets
+
+
+def load_preset(name: str, presets_dir: Path = None, cache_dir: Path = None) -> Dict:
+    """Flattened preset by name"""
+    return PresetCompiler(presets_dir, cache_dir).load(name)
+
+
+def shell_assignments(preset: Dict) -> str:
+    """Shell variable assignments in the format install.sh expects"""
+    lines = []
+    for key in ARRAY_KEYS:
+        value = " ".join(f'"{item}"' for item in preset[key])
+        lines.append(f"SELECTED_{key.upper()}={shlex.quote(value)}")
+    return "\n".join(lines)
+
+
+def main():
+    """Command line interface for the preset compiler"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HyprSupreme Preset Compiler")
+    parser.add_argument('--presets-dir', help='Directory containing *.preset files')
+    parser.add_argument('--cache-dir', help='Directory for compiled artifacts')
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    compile_parser = subparsers.add_parser('compile', help='Compile presets (all by default)')
+    compile_parser.add_argument('names', nargs='*', help='Preset names')
+
+    show_parser = subparsers.add_parser('show', help='Print a compiled preset as JSON')
+    show_parser.add_argument('name', help='Preset name')
+
+    shell_parser = subparsers.add_parser('shell', help='Print shell assignments for install.sh')
+    shell_parser.add_argument('name', help='Preset name')
+
+    subparsers.add_parser('list', help='List available presets')
+
+    args = parser.parse_args()
+    compiler = PresetCompiler(args.presets_dir, args.cache_dir)
+
+    try:
+        if args.command == 'compile':
+            failed = 0
+            for name in args.names or compiler.available():
+                try:
+                    compiler.load(name, use_cache=False)
+                    print(f"✓ {name} -> {compiler.artifact_path(name)}")
+                except PresetError as e:
+                    print(f"✗ {e}", file=sys.stderr)
+                    failed += 1
+            return 1 if failed else 0
+        elif args.command == 'show':
+            print(json.dumps(compiler.load(args.name), indent=2))
+        elif args.command == 'shell':
+            print(shell_assignments(compiler.load(args.name)))
+        elif args.command == 'list':
+            for name in compiler.available():
+                print(name)
+        else:
+            parser.print_help()
+    except PresetError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
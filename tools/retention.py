@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Retention Engine
+Retention policies and garbage collection for profiles, backups and blob stores
+"""
+
+import sys
+import time
+import shutil
+import threading
+import importlib.util
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class RetentionPolicy:
+    """How many snapshots to keep; zero disables a rule"""
+    keep_last: int = 5
+    keep_hourly: int = 0
+    keep_daily: int = 7
+    keep_weekly: int = 4
+    keep_within_days: int = 0  # keep everything newer than this
+    max_total_mb: int = 0  # size quota across kept items, 0 = unlimited
+    orphan_grace_hours: int = 1  # unreferenced blobs younger than this survive a sweep
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RetentionPolicy':
+        """Build a policy from settings, ignoring unknown keys"""
+        known = {k: v for k, v in (data or {}).items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def is_unbounded(self) -> bool:
+        """True when no rule would ever prune anything"""
+        return not any([self.keep_last, self.keep_hourly, self.keep_daily,
+                        self.keep_weekly, self.keep_within_days, self.max_total_mb])
+
+
+@dataclass
+class RetentionItem:
+    """A prunable snapshot (profile, backup archive, backup point)"""
+    id: str
+    store: str
+    created_at: datetime
+    size: int
+    label: str = ""
+    pinned: bool = False
+
+
+@dataclass
+class BlobStore:
+    """A content directory swept by mark-and-sweep"""
+    path: Path
+    live: Set[str]  # entry names still referenced
+    pattern: str = "*"
+
+
+@dataclass
+class RetentionReport:
+    """Outcome of one garbage collection run"""
+    dry_run: bool
+    kept: List[RetentionItem] = field(default_factory=list)
+    pruned: List[RetentionItem] = field(default_factory=list)
+    orphans: List[Tuple[str, int]] = field(default_factory=list)  # (path, size)
+    errors: List[str] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(item.size for item in self.pruned) + sum(size for _, size in self.orphans)
+
+
+# Bucket formats for time-based thinning, finest first
+THINNING_BUCKETS = [
+    ('keep_hourly', '%Y-%m-%d %H'),
+    ('keep_daily', '%Y-%m-%d'),
+    ('keep_weekly', '%G-W%V'),
+]
+
+
+def select_retained(items: List[RetentionItem], policy: RetentionPolicy,
+                    now: datetime = None) -> Tuple[List[RetentionItem], List[RetentionItem]]:
+    """Split items into (keep, prune) according to the policy"""
+    if policy.is_unbounded():
+        return list(items), []
+
+    now = now or datetime.now()
+    newest_first = sorted(items, key=lambda i: i.created_at, reverse=True)
+    keep_ids = {item.id for item in newest_first if item.pinned}
+
+    keep_ids.update(item.id for item in newest_first[:policy.keep_last])
+
+    if policy.keep_within_days:
+        cutoff = now - timedelta(days=policy.keep_within_days)
+        keep_ids.update(item.id for item in newest_first if item.created_at >= cutoff)
+
+    # Keep the newest snapshot of each of the last N hours/days/weeks
+    for rule, bucket_format in THINNING_BUCKETS:
+        count = getattr(policy, rule)
+        if count <= 0:
+            continue
+        buckets = set()
+        for item in newest_first:
+            bucket = item.created_at.strftime(bucket_format)
+            if bucket in buckets:
+                continue
+            if len(buckets) >= count:
+                break
+            buckets.add(bucket)
+            keep_ids.add(item.id)
+
+    # Enforce the size quota by dropping the oldest unpinned items,
+    # but never the most recent snapshot
+    if policy.max_total_mb:
+        quota = policy.max_total_mb * 1024 * 1024
+        kept = [item for item in newest_first if item.id in keep_ids]
+        total = sum(item.size for item in kept)
+        for item in reversed(kept[1:]):
+            if total <= quota:
+                break
+            if item.pinned:
+                continue
+            keep_ids.discard(item.id)
+            total -= item.size
+
+    keep = [item for item in newest_first if item.id in keep_ids]
+    prune = [item for item in newest_first if item.id not in keep_ids]
+    return keep, prune
+
+
+def find_orphans(blob_store: BlobStore, grace_hours: int) -> List[Tuple[Path, int]]:
+    """Mark-and-sweep: entries in a blob store that nothing references"""
+    if not blob_store.path.exists():
+        return []
+
+    cutoff = time.time() - grace_hours * 3600
+    orphans = []
+    for entry in blob_store.path.glob(blob_store.pattern):
+        if entry.name in blob_store.live:
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        if stat.st_mtime > cutoff:
+            continue
+        size = sum(p.stat().st_size for p in entry.rglob('*') if p.is_file()) if entry.is_dir() else stat.st_size
+        orphans.append((entry, size))
+    return orphans
+
+
+def collect_garbage(stores: List, policy: RetentionPolicy = None, dry_run: bool = False,
+                    policies: Dict[str, RetentionPolicy] = None) -> RetentionReport:
+    """Apply retention to every store, then sweep their blob stores
+
+    A store is any object providing ``retention_name``,
+    ``retention_items()``, ``delete_retention_item(item_id)`` and
+    ``retention_blob_stores()``. Blob stores are listed after pruning so
+    blobs only referenced by pruned items are swept in the same run
+    (a dry run cannot see those yet).
+    """
+    start = time.time()
+    report = RetentionReport(dry_run=dry_run)
+    policies = policies or {}
+
+    for store in stores:
+        store_policy = policies.get(store.retention_name, policy or RetentionPolicy())
+        keep, prune = select_retained(store.retention_items(), store_policy)
+        report.kept.extend(keep)
+
+        for item in prune:
+            if dry_run:
+                report.pruned.append(item)
+                continue
+            try:
+                store.delete_retention_item(item.id)
+                report.pruned.append(item)
+            except Exception as e:
+                report.errors.append(f"{store.retention_name}/{item.id}: {e}")
+
+        for blob_store in store.retention_blob_stores():
+            for entry, size in find_orphans(blob_store, store_policy.orphan_grace_hours):
+                if not dry_run:
+                    try:
+                        if entry.is_dir():
+                            shutil.rmtree(entry)
+                        else:
+                            entry.unlink()
+                    except OSError as e:
+                        report.errors.append(f"{entry}: {e}")
+                        continue
+                report.orphans.append((str(entry), size))
+
+    report.duration = time.time() - start
+    return report
+
+
+def print_report(report: RetentionReport):
+    """Print a garbage collection report"""
+    verb = "Would prune" if report.dry_run else "Pruned"
+    print(f"{'DRY RUN - ' if report.dry_run else ''}Retention report")
+    print(f"  Kept: {len(report.kept)} snapshots")
+    print(f"  {verb}: {len(report.pruned)} snapshots, {len(report.orphans)} orphaned blobs")
+
+    for item in report.pruned:
+        print(f"    - [{item.store}] {item.id} {item.label} "
+              f"({item.created_at:%Y-%m-%d %H:%M}, {item.size / 1024:.0f} KB)")
+    for path, size in report.orphans:
+        print(f"    - [blob] {path} ({size / 1024:.0f} KB)")
+
+    print(f"  Reclaimed: {report.reclaimed_bytes / (1024 * 1024):.1f} MB in {report.duration:.2f}s")
+    for error in report.errors:
+        print(f"  ⚠ {error}")
+
+
+def run_scheduled(stores_factory, policy: RetentionPolicy = None, interval: int = 3600,
+                  stop_event: threading.Event = None, policies: Dict[str, RetentionPolicy] = None):
+    """Run garbage collection every ``interval`` seconds until stopped
+
+    ``stores_factory`` is called each round so stores see fresh state.
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            report = collect_garbage(stores_factory(), policy, policies=policies)
+            if report.pruned or report.orphans or report.errors:
+                print_report(report)
+        except Exception as e:
+            print(f"Warning: Scheduled garbage collection failed: {e}")
+        stop_event.wait(interval)
+
+
+def start_background_gc(stores_factory, policy: RetentionPolicy = None, interval: int = 3600,
+                        policies: Dict[str, RetentionPolicy] = None) -> Tuple[threading.Thread, threading.Event]:
+    """Start scheduled garbage collection in a daemon thread"""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_scheduled,
+        args=(stores_factory, policy, interval, stop_event, policies),
+        name="hyprsupreme-gc",
+        daemon=True
+    )
+    thread.start()
+    return thread, stop_event
+
+
+def _load_tool(module_name: str, file_name: str):
+    """Load a sibling tool script (some have dashes in their names)"""
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).parent / file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def default_stores(config_dir: str = None) -> List:
+    """All retention stores of an installation"""
+    stores = []
+    for module_name, file_name, class_name in [
+        ('hyprsupreme_cloud', 'hyprsupreme-cloud.py', 'HyprSupremeCloud'),
+        ('hyprsupreme_migrate', 'hyprsupreme-migrate.py', 'HyprSupremeMigrator'),
+        ('ai_updater', 'ai_updater.py', 'AIUpdateEngine'),
+    ]:
+        try:
+            module = _load_tool(module_name, file_name)
+            stores.append(getattr(module, class_name)(config_dir))
+        except Exception as e:
+            print(f"Warning: Skipping {file_name}: {e}")
+    return stores
+
+
+def main():
+    """Command line interface for unified garbage collection"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HyprSupreme Retention & Garbage Collection")
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be removed')
+    parser.add_argument('--schedule', type=int, metavar='SECONDS', help='Keep running, collect every SECONDS')
+    parser.add_argument('--keep-last', type=int, help='Keep the N most recent snapshots')
+    parser.add_argument('--keep-hourly', type=int, help='Keep one snapshot per hour for N hours')
+    parser.add_argument('--keep-daily', type=int, help='Keep one snapshot per day for N days')
+    parser.add_argument('--keep-weekly', type=int, help='Keep one snapshot per week for N weeks')
+    parser.add_argument('--max-size', type=int, metavar='MB', help='Size quota per store')
+    args = parser.parse_args()
+
+    overrides = {
+        'keep_last': args.keep_last,
+        'keep_hourly': args.keep_hourly,
+        'keep_daily': args.keep_daily,
+        'keep_weekly': args.keep_weekly,
+        'max_total_mb': args.max_size,
+    }
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+
+    def stores_factory():
+        return default_stores()
+
+    def policies_for(stores):
+        policies = {}
+        for store in stores:
+            policy = asdict(store.retention_policy())
+            policy.update(overrides)
+            policies[store.retention_name] = RetentionPolicy.from_dict(policy)
+        return policies
+
+    if args.schedule:
+        stores = stores_factory()
+        run_scheduled(stores_factory, interval=args.schedule, policies=policies_for(stores))
+        return 0
+
+    stores = stores_factory()
+    report = collect_garbage(stores, dry_run=args.dry_run, policies=policies_for(stores))
+    print_report(report)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+HyprSupreme Rule Engine
+Declarative recommendation rules compiled into a decision index
+
+A rule file is JSON::
+
+    {
+      "group": "performance",
+      "impact": "medium",
+      "rules": [
+        {
+          "name": "low_ram",
+          "when": {"ram_tier": ["low"], "gpu_vendor": ["intel", "amd"]},
+          "recommend": [["animations", "enabled", "false", "Reduce memory usage", 0.9]]
+        }
+      ]
+    }
+
+``when`` is a conjunction over profile features; each feature lists the
+values it accepts. A rule without ``when`` always applies. Files load in
+name order and a later rule with the same name replaces an earlier one.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
+from dataclasses import dataclass
+
+RULES_DIR = Path(__file__).parent / "rules"
+
+# Every indexable feature and the values a profile can have for it
+FEATURE_DOMAINS: Dict[str, Tuple[str, ...]] = {
+    'gpu_vendor': ('nvidia', 'amd', 'intel', 'other'),
+    'ram_tier': ('low', 'medium', 'high'),
+    'cpu_tier': ('low', 'medium', 'high'),
+    'displays': ('single', 'multi'),
+    'usage_pattern': ('gaming', 'development', 'multimedia', 'productivity', 'general'),
+}
+
+IMPACT_LEVELS = ('low', 'medium', 'high')
+
+
+class RuleError(ValueError):
+    """Malformed rule file"""
+
+
+@dataclass
+class Rule:
+    name: str
+    group: str
+    impact: str
+    when: Dict[str, FrozenSet[str]]
+    recommend: List[Tuple[str, str, str, str, float]]
+    order: int = 0
+
+    def matches(self, features: Dict[str, Set[str]]) -> bool:
+        return all(not allowed.isdisjoint(features.get(feature, ())) for feature, allowed in self.when.items())
+
+
+def _tier(value: float, medium: float, high: float) -> str:
+    if value >= high:
+        return 'high'
+    return 'medium' if value >= medium else 'low'
+
+
+def gpu_vendors(gpu_info: Iterable[str]) -> Set[str]:
+    vendors = set()
+    for gpu in gpu_info:
+        gpu = gpu.lower()
+        if 'nvidia' in gpu:
+            vendors.add('nvidia')
+        elif 'amd' in gpu or 'radeon' in gpu or 'ati ' in gpu:
+            vendors.add('amd')
+        elif 'intel' in gpu:
+            vendors.add('intel')
+        else:
+            vendors.add('other')
+    return vendors or {'other'}
+
+
+def profile_features(profile) -> Dict[str, Set[str]]:
+    """Discrete features of a SystemProfile; a feature may hold several values"""
+    usage = profile.usage_pattern if profile.usage_pattern in FEATURE_DOMAINS['usage_pattern'] else 'general'
+    return {
+        'gpu_vendor': gpu_vendors(profile.gpu_info),
+        'ram_tier': {_tier(profile.ram_gb, 8, 16)},
+        'cpu_tier': {_tier(profile.cpu_cores, 4, 8)},
+        'displays': {'multi' if profile.display_count > 1 else 'single'},
+        'usage_pattern': {usage},
+    }
+
+
+def _parse_rule(data: Dict[str, Any], group: str, impact: str, source: str) -> Rule:
+    name = data.get('name')
+    if not isinstance(name, str) or not name:
+        raise RuleError(f"{source}: rule without a name")
+
+    when = {}
+    for feature, values in (data.get('when') or {}).items():
+        domain = FEATURE_DOMAINS.get(feature)
+        if domain is None:
+            raise RuleError(f"{source}: {name}: unknown feature '{feature}'")
+        if isinstance(values, str):
+            values = [values]
+        unknown = [v for v in values if v not in domain]
+        if unknown or not values:
+            raise RuleError(f"{source}: {name}: invalid {feature} values {unknown or values}")
+        when[feature] = frozenset(values)
+
+    recommend = []
+    for item in data.get('recommend', []):
+        if not (isinstance(item, list) and len(item) == 5):
+            raise RuleError(f"{source}: {name}: recommendations are [category, setting, value, reason, confidence]")
+        category, setting, value, reason, confidence = item
+        recommend.append((str(category), str(setting), str(value), str(reason), float(confidence)))
+
+    impact = data.get('impact', impact)
+    if impact not in IMPACT_LEVELS:
+        raise RuleError(f"{source}: {name}: invalid impact '{impact}'")
+    return Rule(name, data.get('group', group), impact, when, recommend)
+
+
+def load_rule_files(paths: Iterable[Path]) -> List[Rule]:
+    """Rules from the given files or directories of *.json files, in load order"""
+    files: List[Path] = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.json")))
+        elif path.is_file():
+            files.append(path)
+
+    rules: Dict[str, Rule] = {}
+    for path in files:
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise RuleError(f"{path}: {e}")
+        group = data.get('group', path.stem)
+        impact = data.get('impact', 'medium')
+        for item in data.get('rules', []):
+            rule = _parse_rule(item, group, impact, str(path))
+            rules[rule.name] = rule
+
+    ordered = list(rules.values())
+    for order, rule in enumerate(ordered):
+        rule.order = order
+    return ordered
+
+
+class DecisionIndex:
+    """Rules bucketed by their most selective (feature, value) condition.
+
+    A lookup only visits rules filed under one of the profile's own
+    feature values, plus the unconditional ones, and only checks the
+    conditions the bucket does not already guarantee.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        self.always: List[Rule] = []
+        self.index: Dict[str, Dict[str, List[Tuple[Rule, tuple]]]] = {f: {} for f in FEATURE_DOMAINS}
+        selectivity = {f: {n: n / len(domain) for n in range(1, len(domain) + 1)}
+                       for f, domain in FEATURE_DOMAINS.items()}
+        for rule in self.rules:
+            if not rule.when:
+                self.always.append(rule)
+                continue
+            # Ties go to the feature the rule lists first
+            feature = min(rule.when, key=lambda f: selectivity[f][len(rule.when[f])])
+            residual = tuple((f, allowed) for f, allowed in rule.when.items() if f != feature)
+            for value in rule.when[feature]:
+                self.index[feature].setdefault(value, []).append((rule, residual))
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Path]) -> "DecisionIndex":
+        return cls(load_rule_files(paths))
+
+    def candidates(self, features: Dict[str, Set[str]]) -> List[Rule]:
+        """Rules worth evaluating for these features"""
+        found = list(self.always)
+        for feature, values in features.items():
+            buckets = self.index.get(feature, {})
+            for value in values:
+                found.extend(rule for rule, _ in buckets.get(value, ()))
+        return found
+
+    def match(self, features: Dict[str, Set[str]]) -> List[Rule]:
+        """Matching rules in load order"""
+        empty: Set[str] = set()
+        matched = list(self.always)
+        for feature, values in features.items():
+            buckets = self.index.get(feature)
+            if not buckets:
+                continue
+            for value in values:
+                for rule, residual in buckets.get(value, ()):
+                    for other, allowed in residual:
+                        if allowed.isdisjoint(features.get(other, empty)):
+                            break
+                    else:
+                        matched.append(rule)
+            if len(values) > 1:
+                # A rule accepting several of these values sits in several buckets
+                matched = list({id(rule): rule for rule in matched}.values())
+        matched.sort(key=lambda rule: rule.order)
+        return matched
+
+
+def main():
+    import sys
+
+    paths = [Path(p) for p in sys.argv[1:]] or [RULES_DIR]
+    try:
+        index = DecisionIndex.from_paths(paths)
+    except RuleError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"{len(index.rules)} rules, {len(index.always)} unconditional")
+    for feature, buckets in index.index.items():
+        for value, rules in sorted(buckets.items()):
+            print(f"  {feature}={value}: {', '.join(rule.name for rule, _ in rules)}")
+
+
+if __name__ == '__main__':
+    main()